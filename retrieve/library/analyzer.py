@@ -0,0 +1,87 @@
+import re
+
+from mpstemmer import MPStemmer
+from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
+
+from .util import TermCache
+
+
+class Analyzer:
+    """
+    Text analyzer yang dipakai bersama oleh indexing (parsing_block) dan
+    query (pre_processing_query), sehingga normalisasi keduanya dijamin
+    identik.
+
+    Dalam satu pass terhadap text, analyzer:
+        1. lowercase seluruh text (sekali, bukan per token),
+        2. tokenisasi dengan regex \\w+ (pre-compiled, streaming dengan finditer),
+        3. membuang stopword dengan lookup ke frozenset,
+        4. stemming dengan MPStemmer; hasil stemming yang berupa stopword
+           (misal "adanya" -> "ada") juga dibuang.
+
+    Langkah 3 dan 4 di-cache per token di self.cache (TermCache), karena
+    vocabulary jauh lebih kecil daripada banyaknya token. Token yang dibuang
+    di-cache sebagai string kosong.
+
+    Attributes
+    ----------
+    stemmer: objek dengan method stem(word), default MPStemmer
+    stopwords: frozenset stopword (lowercase), default stopword Sastrawi
+    cache: TermCache dari token (lowercase) ke term hasil normalisasi
+    """
+
+    TOKEN_PATTERN = re.compile(r'\w+')
+
+    def __init__(self, stemmer=None, stopwords=None, cache=None):
+        self.stemmer = stemmer if stemmer is not None else MPStemmer()
+        if stopwords is None:
+            stopwords = StopWordRemoverFactory().get_stop_words()
+        self.stopwords = frozenset(word.lower() for word in stopwords)
+        self.cache = cache if cache is not None else TermCache()
+
+    def normalize(self, token):
+        """
+        Mengembalikan term hasil normalisasi sebuah token (lowercase), atau
+        string kosong jika token adalah stopword. Tanpa cache.
+        """
+        if token in self.stopwords:
+            return ""
+        # https://github.com/ariaghora/mpstemmer/tree/master/mpstemmer
+        try:
+            stemmed = self.stemmer.stem(token)
+        except Exception:
+            stemmed = token
+        return "" if stemmed in self.stopwords else stemmed
+
+    def normalize_token(self, token):
+        """normalize dengan cache; token di-lowercase terlebih dahulu"""
+        return self.cache.get(token.lower(), self.normalize)
+
+    def analyze(self, text):
+        """
+        Generator term (string) dari text, sesuai urutan kemunculannya;
+        stopword tidak di-yield, sehingga posisi term (enumerate) adalah
+        urutan token setelah stopword dibuang.
+        """
+        get = self.cache.get
+        normalize = self.normalize
+        for match in self.TOKEN_PATTERN.finditer(text.lower()):
+            term = get(match.group(), normalize)
+            if term:
+                yield term
+
+    def __call__(self, text):
+        return list(self.analyze(text))
+
+
+if __name__ == '__main__':
+
+    class SuffixStemmer:
+        def stem(self, word):
+            return word[:-3] if word.endswith('nya') else word
+
+    analyzer = Analyzer(stemmer=SuffixStemmer(), stopwords=['dan', 'ada', 'yang'])
+    assert analyzer("Rumahnya DAN mobilnya, yang adanya di sana") == ["rumah", "mobil", "di", "sana"], \
+        "hasil analyzer salah"
+    assert analyzer.normalize_token("Rumahnya") == "rumah", "hasil normalize_token salah"
+    assert analyzer.cache.stats()['hits'] == 1, "cache tidak dipakai"
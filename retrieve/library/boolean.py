@@ -0,0 +1,151 @@
+import heapq
+
+from .index import PostingsCursor
+
+
+def intersect(cursors):
+    """
+    Operator AND: menghasilkan (generator) docID yang ada di SEMUA cursor,
+    terurut menaik.
+
+    Intersection dilakukan secara leapfrog: cursor dengan df terkecil
+    menentukan kandidat, cursor lain di-next_geq ke kandidat tersebut
+    (skip pointer + galloping, tanpa mendecode block yang dilompati). Jika
+    salah satu cursor melewati kandidat, docID-nya menjadi kandidat baru.
+    Saat sebuah docID di-yield, semua cursor berada di docID tersebut,
+    sehingga pemanggil bisa membaca tf() masing-masing cursor.
+    """
+    if not cursors:
+        return
+    cursors = sorted(cursors, key=lambda cursor: cursor.df)
+    doc = cursors[0].doc
+    while doc != PostingsCursor.END:
+        for cursor in cursors[1:]:
+            next_doc = cursor.next_geq(doc)
+            if next_doc != doc:
+                doc = cursors[0].next_geq(next_doc)
+                break
+        else:
+            yield doc
+            doc = cursors[0].next()
+
+
+def union(cursors):
+    """
+    Operator OR: menghasilkan (generator) docID yang ada di SALAH SATU
+    cursor, terurut menaik dan tanpa duplikat.
+    """
+    doc = min((cursor.doc for cursor in cursors), default=PostingsCursor.END)
+    while doc != PostingsCursor.END:
+        yield doc
+        next_doc = PostingsCursor.END
+        for cursor in cursors:
+            if cursor.doc == doc:
+                cursor.next()
+            if cursor.doc < next_doc:
+                next_doc = cursor.doc
+        doc = next_doc
+
+
+def exclude(docs, cursors):
+    """
+    Operator NOT: membuang docID dari iterable terurut docs yang ada di
+    salah satu cursor. Karena docs terurut, cursor cukup di-next_geq maju.
+    """
+    for doc in docs:
+        if all(cursor.next_geq(doc) != doc for cursor in cursors):
+            yield doc
+
+
+def phrase_positions(positions_lists):
+    """
+    Mengembalikan posisi awal (terurut) kemunculan frase di sebuah dokumen:
+    posisi p sehingga p + i ada di positions_lists[i] untuk setiap term
+    ke-i pada frase.
+    """
+    starts = set(positions_lists[0])
+    for i, positions in enumerate(positions_lists[1:], 1):
+        starts &= {position - i for position in positions}
+        if not starts:
+            break
+    return sorted(starts)
+
+
+def phrase(terms, cursors):
+    """
+    Operator frase: menghasilkan (generator) docID yang memuat terms secara
+    berurutan. Kandidat diambil dengan intersect, lalu posisi hanya
+    di-decode untuk dokumen kandidat tersebut.
+
+    Parameters
+    ----------
+    terms: List[int]
+        termID sesuai urutan di frase (boleh berulang)
+    cursors: Dict[int, PostingsCursor]
+        Cursor (dari index posisional) untuk setiap termID unik di terms
+    """
+    for doc in intersect(list(cursors.values())):
+        positions = {term: cursor.positions() for term, cursor in cursors.items()}
+        if phrase_positions([positions[term] for term in terms]):
+            yield doc
+
+
+def merge_unique(doc_lists):
+    """Menggabungkan beberapa iterable docID terurut menjadi satu, tanpa duplikat."""
+    last = None
+    for doc in heapq.merge(*doc_lists):
+        if doc != last:
+            yield doc
+            last = doc
+
+
+def parse_query(query):
+    """
+    Mem-parse query boolean menjadi disjunctive normal form: list of
+    (positif, negatif), masing-masing list of token. Operator ditulis dengan
+    huruf besar: AND, OR, NOT. NOT mengikat paling kuat, lalu AND, lalu OR.
+    Dua term yang bersebelahan tanpa operator dianggap AND.
+
+    contoh: "jantung AND NOT kanker OR paru"
+            -> [(["jantung"], ["kanker"]), (["paru"], [])]
+
+    Tanda kurung tidak didukung.
+    """
+    clauses = []
+    positive, negative = [], []
+    negate = False
+    for token in query.split():
+        if token == 'OR':
+            if positive or negative:
+                clauses.append((positive, negative))
+            positive, negative = [], []
+            negate = False
+        elif token == 'AND':
+            continue
+        elif token == 'NOT':
+            negate = not negate
+        else:
+            (negative if negate else positive).append(token)
+            negate = False
+    if positive or negative:
+        clauses.append((positive, negative))
+    return clauses
+
+
+def evaluate_clause(index, positive, negative, all_docs):
+    """
+    Mengembalikan generator docID terurut dari satu klausa konjungtif:
+    AND dari termID di positive, dikurangi (NOT) termID di negative.
+    Klausa yang hanya berisi NOT dievaluasi terhadap all_docs (semua docID
+    di index, terurut). termID None (term yang tidak ada di koleksi) membuat klausa
+    kosong jika positif, dan diabaikan jika negatif.
+    """
+    if None in positive:
+        return iter(())
+    cursors = [index.get_cursor(term) for term in set(positive)]
+    if None in cursors:
+        return iter(())
+    docs = intersect(cursors) if cursors else iter(all_docs)
+    excluded = [cursor for cursor in (index.get_cursor(term) for term in set(negative) if term is not None)
+                if cursor is not None]
+    return exclude(docs, excluded)
@@ -2,19 +2,97 @@ import os
 import pickle
 import contextlib
 import heapq
-import math
-import re
+import itertools
+import multiprocessing
+import threading
 
-from .index import InvertedIndexReader, InvertedIndexWriter
-from .util import IdMap, merge_and_sort_posts_and_tfs
+from .index import InvertedIndexReader, InvertedIndexWriter, PositionsList
+from .util import (IdMap, FrozenIdMap, TermCache, merge_and_sort_posts_and_tfs,
+                   merge_and_sort_posts_tfs_and_positions)
 from .compression import VBEPostings
+from .scoring import (BM25Scorer, TfIdfScorer, open_cursors, phrase_top_k,
+                      proximity_score, merge_top_k, QUERY_PROCESSORS)
+from .segment import SegmentedIndex, remove_index_files
+from .manifest import BlockManifest
+from .boolean import parse_query, evaluate_clause, merge_unique
+from .analyzer import Analyzer
+import numpy as np
 from tqdm import tqdm
 # from yaudahsearch.settings import RETRIEVE_DIR
 
-from mpstemmer import MPStemmer
-from Sastrawi.StopWordRemover.StopWordRemoverFactory import StopWordRemoverFactory
 
-from operator import itemgetter
+
+class BlockPostings:
+    """
+    Penampung hasil inversion satu block di memori, dengan interface append
+    yang sama dengan InvertedIndexWriter, sehingga write_to_index bisa
+    dipakai oleh worker parallel indexing tanpa menulis ke disk.
+
+    items: List of (term, postings_list, tf_list) atau (term, postings_list,
+        tf_list, positions_list) untuk index posisional, terurut berdasarkan term
+    """
+
+    def __init__(self, positional=False):
+        self.positional = positional
+        self.items = []
+
+    def append(self, term, postings_list, tf_list, positions_list=None):
+        if self.positional:
+            self.items.append((term, postings_list, tf_list, positions_list))
+        else:
+            self.items.append((term, postings_list, tf_list))
+        return self
+
+
+# BSBIIndex milik worker process parallel indexing (masing-masing dengan
+# stemmer sendiri), dibuat sekali per process oleh init_indexing_worker
+worker_index = None
+
+
+def init_indexing_worker(data_dir, output_dir, postings_encoding, positional, term_cache_file):
+    global worker_index
+    worker_index = BSBIIndex(data_dir, output_dir, postings_encoding, positional=positional,
+                             term_cache_file=term_cache_file)
+    # entry baru dikirim ke parent agar bisa ikut disimpan ke term_cache_file
+    worker_index.term_cache.new_entries = {}
+
+
+def parse_block_worker(block_path):
+    """
+    Parsing dan inversion satu block di worker process dengan term_id_map
+    dan doc_id_map LOKAL (kosong untuk setiap block).
+
+    Returns
+    -------
+    (List[str], List[str], List[tuple], (dict, int, int))
+        string untuk setiap termID lokal, string untuk setiap docID lokal,
+        BlockPostings.items dengan termID dan docID lokal, serta entry baru,
+        hits dan misses term cache worker selama parsing block ini
+    """
+    worker_index.term_id_map = IdMap()
+    worker_index.doc_id_map = IdMap()
+    cache = worker_index.term_cache
+    hits, misses = cache.hits, cache.misses
+    td_pairs = worker_index.parsing_block(block_path)
+    postings = BlockPostings(worker_index.positional)
+    worker_index.write_to_index(td_pairs, postings)
+    cache_delta = (cache.drain_new(), cache.hits - hits, cache.misses - misses)
+    return worker_index.term_id_map.id_to_str, worker_index.doc_id_map.id_to_str, postings.items, cache_delta
+
+
+def sort_postings(item):
+    """Mengurutkan item BlockPostings (term, postings_list, tf_list[, positions_list]) berdasarkan docID"""
+    term, postings_list, *rest = item
+    order = sorted(range(len(postings_list)), key=postings_list.__getitem__)
+    return (term,) + tuple([values[i] for i in order] for values in (postings_list, *rest))
+
+
+def write_block_worker(index_id, output_dir, postings_encoding, positional, items):
+    """Menulis items (sudah terurut berdasarkan termID global) ke intermediate index"""
+    with InvertedIndexWriter(index_id, postings_encoding, directory=output_dir,
+                             positional=positional) as index:
+        for item in items:
+            index.append(*item)
 
 
 class BSBIIndex:
@@ -27,54 +105,115 @@ class BSBIIndex:
     data_dir(str): Path ke data
     output_dir(str): Path ke output index files
     postings_encoding: Lihat di compression.py, kandidatnya adalah StandardPostings,
-                    VBEPostings, dsb.
+                    VBEPostings, dsb. AdaptivePostings memilih codec terkecil
+                    untuk setiap postings list.
     index_name(str): Nama dari file yang berisi inverted index
+    positional(bool): Jika True, do_indexing juga menyimpan posisi term di
+                    setiap dokumen, untuk phrase dan proximity query
+    analyzer(Analyzer): Normalisasi text (lowercase, tokenisasi, stopword,
+                    stemming) yang sama untuk indexing dan query
+    term_cache(TermCache): Cache hasil normalisasi per token milik analyzer
+    term_cache_file(str): Jika diberikan, term cache dimuat dari file ini
+                    (jika ada) dan disimpan kembali di akhir do_indexing
+    segments(SegmentedIndex): Segment-segment index yang dibuka oleh
+                    open_index(); merged index hasil do_indexing adalah
+                    segment pertama, dan add_documents menambahkan segment baru
     """
 
-    def __init__(self, data_dir, output_dir, postings_encoding, index_name="main_index"):
+    # perkiraan memori (bytes) term_dict SPIMI untuk setiap term, posting
+    # (entry {docID: TF}, termasuk list posisi untuk index posisional) dan
+    # posisi, diukur dengan tracemalloc di CPython 3.11
+    SPIMI_TERM_BYTES = 240
+    SPIMI_POSTING_BYTES = 44
+    SPIMI_POSITION_BYTES = 36
+
+    def __init__(self, data_dir, output_dir, postings_encoding, index_name="main_index", positional=False,
+                 term_cache_file=None):
         self.term_id_map = IdMap()
         self.doc_id_map = IdMap()
         self.data_dir = data_dir
         self.output_dir = output_dir
         self.index_name = index_name
         self.postings_encoding = postings_encoding
+        self.positional = positional
         
         # Untuk menyimpan nama-nama file dari semua intermediate inverted index
         self.intermediate_indices = []
+
+        # True jika term_id_map dan doc_id_map sudah dimuat (atau baru saja
+        # dibangun oleh do_indexing), agar retrieve tidak memuat ulang per query
+        self.is_loaded = False
+
+        # SegmentedIndex (read-only untuk query) yang dibuka sekali lalu
+        # dipakai bersama oleh semua query, lihat open_index()
+        self.segments = None
+        self.segments_lock = threading.Lock()
+        self.add_documents_lock = threading.Lock()
         
         ## Additional Attributes ##
-        self.stemmer = MPStemmer()
-        self.remover = StopWordRemoverFactory().create_stop_word_remover()
+        self.term_cache_file = term_cache_file
+        self.term_cache = TermCache()
+        if term_cache_file is not None:
+            self.term_cache.load(term_cache_file)
+        self.analyzer = Analyzer(cache=self.term_cache)
 
     def save(self):
-        """Menyimpan doc_id_map and term_id_map ke output directory via pickle"""
+        """
+        Menyimpan doc_id_map and term_id_map ke output directory sebagai
+        FrozenIdMap (sorted string table yang bisa di-mmap)
+        """
 
-        with open(os.path.join(os.path.abspath("retrieve/library"), self.output_dir, 'terms.dict'), 'wb') as f:
-            pickle.dump(self.term_id_map, f)
-        with open(os.path.join(os.path.abspath("retrieve/library"), self.output_dir, 'docs.dict'), 'wb') as f:
-            pickle.dump(self.doc_id_map, f)
+        self.term_id_map.freeze().save(os.path.join(os.path.abspath("retrieve/library"), self.output_dir, 'terms.idmap'))
+        self.doc_id_map.freeze().save(os.path.join(os.path.abspath("retrieve/library"), self.output_dir, 'docs.idmap'))
 
     def load(self):
-        """Memuat doc_id_map and term_id_map dari output directory"""
-        
-        this_dir = os.path.dirname(__file__)
+        """
+        Memuat doc_id_map and term_id_map dari output directory sebagai
+        FrozenIdMap (read-only). Jika yang ada hanya file pickle IdMap dari
+        versi lama (terms.dict dan docs.dict), file pickle tersebut yang dimuat
+        """
 
-        with open(os.path.join(self.output_dir, 'terms.dict'), 'rb') as f:
-            self.term_id_map = pickle.load(f)
-        with open(os.path.join(self.output_dir, 'docs.dict'), 'rb') as f:
-            self.doc_id_map = pickle.load(f)
+        for attr, name in [('term_id_map', 'terms'), ('doc_id_map', 'docs')]:
+            path = os.path.join(self.output_dir, name + '.idmap')
+            if os.path.exists(path):
+                setattr(self, attr, FrozenIdMap.load(path))
+            else:
+                with open(os.path.join(self.output_dir, name + '.dict'), 'rb') as f:
+                    setattr(self, attr, pickle.load(f))
+        self.is_loaded = True
 
-    def pre_processing_text(self, content):
+    def segmented_index(self):
+        """SegmentedIndex (belum dibuka) untuk index di output directory"""
+        return SegmentedIndex(self.output_dir, self.postings_encoding, self.merge_index, self.index_name)
+
+    def open_index(self):
         """
-        Melakukan preprocessing pada text, yakni stemming dan removing stopwords
+        Membuka segment-segment index secara read-only (sekali saja) dan
+        mengembalikan SegmentedIndex-nya. Reader setiap segment dipakai
+        bersama oleh semua pemanggilan retrieve_*, sehingga metadata index
+        tidak dimuat ulang per query; setiap query mengambil snapshot
+        segment yang hidup (with self.open_index().snapshot() as index).
         """
-        # https://github.com/ariaghora/mpstemmer/tree/master/mpstemmer
+        if self.segments is None:
+            with self.segments_lock:
+                if self.segments is None:
+                    self.segments = self.segmented_index().open()
+        return self.segments
 
-        try:
-            stemmed = self.stemmer.stem(content)
-        except:
-            return self.remover.remove(content)
-        return self.remover.remove(stemmed)
+    def close_index(self):
+        """Menutup segment-segment index yang dibuka oleh open_index()"""
+        with self.segments_lock:
+            if self.segments is not None:
+                self.segments.close()
+                self.segments = None
+
+    def pre_processing_text(self, content):
+        """
+        Melakukan preprocessing pada sebuah token, yakni lowercase, stemming dan
+        removing stopwords (lihat Analyzer). Mengembalikan string kosong
+        untuk stopword.
+        """
+        return self.analyzer.normalize_token(content)
 
     def parsing_block(self, block_path):
         """
@@ -94,6 +233,9 @@ class BSBIIndex:
         regex atau boleh juga menggunakan tools lain yang berbasis machine
         learning.
 
+        Tokenisasi, stopword removal dan stemming dilakukan oleh self.analyzer,
+        yang juga dipakai untuk query.
+
         Parameters
         ----------
         block_path : str
@@ -108,42 +250,75 @@ class BSBIIndex:
         List[Tuple[Int, Int]]
             Returns all the td_pairs extracted from the block
             Mengembalikan semua pasangan <termID, docID> dari sebuah block (dalam hal
-            ini sebuah sub-direktori di dalam folder collection)
+            ini sebuah sub-direktori di dalam folder collection).
+            Jika self.positional, yang dikembalikan adalah <termID, docID, posisi>,
+            dengan posisi adalah urutan token di dokumen setelah stopword dibuang.
 
         Harus menggunakan self.term_id_map dan self.doc_id_map untuk mendapatkan
         termIDs dan docIDs. Dua variable ini harus 'persist' untuk semua pemanggilan
         parsing_block(...).
         """
-        block_dir = os.path.join(self.data_dir, block_path) # block directory
+        return self.parse_documents(self.iter_block_documents(block_path))
+
+    def parse_documents(self, documents):
+        """
+        Parsing (seperti parsing_block) untuk iterable documents berisi
+        pasangan (path dokumen, text).
+        """
         res = [] # result pool
-        
-        for i in os.listdir(block_dir):
-            file_dir = os.path.join(block_dir, i)
-            with open(file_dir, 'rb+') as f:
-                # Extract text
-                text = str(f.read(), 'UTF-8')
-                # tokenization
-                tokens = re.findall(r'\w+', text)
-                # stemming dan remove stopwords
-                for i, val in enumerate(tokens):
-                    word = self.pre_processing_text(val).lower()
-                    if word == "":
-                        tokens.pop(i)
-                    else:
-                        tokens[i] = word
-                        res.append((self.term_id_map[word], self.doc_id_map[file_dir]))
+
+        for file_dir, text in documents:
+            # docID di-assign saat term pertama dokumen ditemukan
+            doc_id = None
+            # tokenization, stemming dan remove stopwords
+            for position, word in enumerate(self.analyzer.analyze(text)):
+                term_id = self.term_id_map[word]
+                if doc_id is None:
+                    doc_id = self.doc_id_map[file_dir]
+                if self.positional:
+                    res.append((term_id, doc_id, position))
+                else:
+                    res.append((term_id, doc_id))
         return res
                 
                 
 
+    def iter_block_documents(self, block_path):
+        """
+        Generator (path dokumen, text) untuk setiap dokumen di sebuah block,
+        dibaca satu per satu.
+        """
+        block_dir = os.path.join(self.data_dir, block_path) # block directory
+        yield from self.iter_files(os.path.join(block_dir, i) for i in os.listdir(block_dir))
+
+    def iter_files(self, doc_paths):
+        """Generator (path dokumen, text) untuk setiap file di doc_paths"""
+        for file_dir in doc_paths:
+            with open(file_dir, 'rb') as f:
+                # Extract text
+                text = str(f.read(), 'UTF-8')
+            yield file_dir, text
+
+    def iter_documents(self):
+        """
+        Generator (path dokumen, text) untuk semua dokumen di koleksi, dengan
+        urutan yang sama dengan do_indexing per block.
+        """
+        for block_dir_relative in sorted(next(os.walk(self.data_dir))[1]):
+            yield from self.iter_block_documents(block_dir_relative)
+
     def write_to_index(self, td_pairs, index):
         """
         Melakukan inversion td_pairs (list of <termID, docID> pairs) dan
-        menyimpan mereka ke index. Disini diterapkan konsep BSBI dimana 
-        hanya di-maintain satu dictionary besar untuk keseluruhan block.
-        Namun dalam teknik penyimpanannya digunakan strategi dari SPIMI
-        yaitu penggunaan struktur data hashtable (dalam Python bisa
-        berupa Dictionary)
+        menyimpan mereka ke index. Disini diterapkan konsep BSBI: pasangan
+        <termID, docID> diurutkan, lalu pasangan yang sama dihitung.
+
+        Inversion dilakukan dengan NumPy, bukan dictionary of dictionary:
+        setiap pasangan di-pack menjadi satu int64 (termID << 32 | docID),
+        diurutkan dan dihitung dengan np.unique(return_counts=True), sehingga
+        hasilnya terurut berdasarkan termID lalu docID dan count-nya adalah
+        TF. Batas antar term didapat dari perubahan termID, dan setiap term
+        diberikan ke index sebagai slice yang bersebelahan.
 
         ASUMSI: td_pairs CUKUP di memori
 
@@ -154,32 +329,103 @@ class BSBIIndex:
         Parameters
         ----------
         td_pairs: List[Tuple[Int, Int]]
-            List of termID-docID pairs
+            List of termID-docID pairs (atau termID-docID-posisi untuk
+            index posisional)
         index: InvertedIndexWriter
             Inverted index pada disk (file) yang terkait dengan suatu "block"
         """
-        term_dict = {}
-        for term_id, doc_id in td_pairs:
-            if term_id not in term_dict:
-                term_dict[term_id] = {}
-            curr_term = term_dict[term_id]
-            if doc_id in curr_term:
-                curr_term[doc_id] += 1
+        if index.positional:
+            self.write_to_positional_index(td_pairs, index)
+            return
+
+        if not td_pairs:
+            return
+        pairs = np.fromiter(itertools.chain.from_iterable(td_pairs), dtype=np.int64,
+                            count=2 * len(td_pairs)).reshape(-1, 2)
+        keys, tf_list = np.unique((pairs[:, 0] << 32) | pairs[:, 1], return_counts=True)
+        self.append_sorted_postings(keys, tf_list.tolist(), index)
+
+    def write_to_positional_index(self, td_pairs, index):
+        """
+        Seperti write_to_index, untuk td_pairs berisi <termID, docID, posisi>:
+        posisi dikumpulkan per (term, dokumen), dan TF adalah banyaknya posisi.
+        Triple diurutkan dengan np.lexsort berdasarkan (termID, docID) lalu
+        posisi, sehingga posisi setiap posting sudah terurut dan bersebelahan.
+        """
+        if not td_pairs:
+            return
+        triples = np.fromiter(itertools.chain.from_iterable(td_pairs), dtype=np.int64,
+                              count=3 * len(td_pairs)).reshape(-1, 3)
+        keys = (triples[:, 0] << 32) | triples[:, 1]
+        order = np.lexsort((triples[:, 2], keys))
+        keys = keys[order]
+        positions = triples[order, 2].tolist()
+        # batas antar posting (pasangan termID-docID yang berbeda)
+        bounds = (np.flatnonzero(keys[1:] != keys[:-1]) + 1).tolist()
+        starts = [0] + bounds
+        ends = bounds + [len(keys)]
+        positions_list = [positions[start:end] for start, end in zip(starts, ends)]
+        tf_list = [end - start for start, end in zip(starts, ends)]
+        self.append_sorted_postings(keys[starts], tf_list, index, positions_list)
+
+    def append_sorted_postings(self, keys, tf_list, index, positions_list=None):
+        """
+        Menambahkan postings ke index dari keys (np.ndarray int64 terurut
+        dan unik, termID << 32 | docID) dan tf_list (serta positions_list
+        untuk index posisional) yang sejajar dengan keys.
+        """
+        terms = keys >> 32
+        docs = (keys & 0xFFFFFFFF).tolist()
+        bounds = (np.flatnonzero(terms[1:] != terms[:-1]) + 1).tolist()
+        starts = [0] + bounds
+        ends = bounds + [len(keys)]
+        for term_id, start, end in zip(terms[starts].tolist(), starts, ends):
+            if positions_list is None:
+                index.append(term_id, docs[start:end], tf_list[start:end])
             else:
-                curr_term[doc_id] = 1
-        
+                index.append(term_id, docs[start:end], tf_list[start:end], positions_list[start:end])
+
+    def write_term_dict(self, term_dict, index):
+        """
+        Menulis term_dict (termID -> {docID: TF}, atau termID -> {docID: list
+        posisi} untuk index posisional) ke index, terurut berdasarkan termID
+        lalu docID.
+        """
         for term_id in sorted(term_dict.keys()):
             sorted_docs = sorted(list(term_dict[term_id].keys()))
-            index.append(term_id, sorted_docs, [term_dict[term_id][i] for i in sorted_docs])
+            if index.positional:
+                positions_list = [sorted(term_dict[term_id][i]) for i in sorted_docs]
+                index.append(term_id, sorted_docs, [len(positions) for positions in positions_list],
+                             positions_list)
+            else:
+                index.append(term_id, sorted_docs, [term_dict[term_id][i] for i in sorted_docs])
 
-    def merge_index(self, indices, merged_index):
+    def merge_index(self, indices, merged_index, deleted=None):
         """
         Lakukan merging ke semua intermediate inverted indices menjadi
         sebuah single index.
 
         Ini adalah bagian yang melakukan EXTERNAL MERGE SORT
 
-        Gunakan fungsi merge_and_sort_posts_and_tfs(..) di modul util
+        Merge dilakukan secara streaming di level bytes: setiap intermediate
+        index dibaca berurutan dengan buffered read yang besar
+        (InvertedIndexReader.iter_encoded) tanpa decoding, lalu k-way merge
+        berdasarkan termID dengan heapq.merge. Postings list dari setiap
+        term digabung oleh merge_postings.
+
+        Statistik koleksi merged index adalah gabungan statistik semua
+        intermediate index (CollectionStats.add), sehingga postings yang
+        disalin apa adanya tidak perlu di-decode hanya untuk menghitung
+        panjang dokumen; cf setiap term adalah jumlah cf di setiap index.
+        Karena statistik tersebut sudah final sebelum postings pertama
+        ditulis (merged_index.freeze_stats), upper bound skor BM25 dan
+        metadata Block-Max dihitung saat setiap term di-append, bukan dengan
+        membaca ulang merged index saat ditutup.
+
+        Jika deleted (DeletedDocs) memuat dokumen dari indices, postings
+        dokumen-dokumen tersebut dibuang secara fisik (purge): setiap term
+        di-decode dan difilter, term yang postings-nya habis tidak ditulis,
+        dan dokumen tersebut tidak ikut di statistik koleksi merged index.
 
         Parameters
         ----------
@@ -191,24 +437,141 @@ class BSBIIndex:
         merged_index: InvertedIndexWriter
             Instance InvertedIndexWriter object yang merupakan hasil merging dari
             semua intermediate InvertedIndexWriter objects.
+
+        deleted: DeletedDocs
+            Tombstone bitset dokumen yang dihapus (opsional)
         """
-        # kode berikut mengasumsikan minimal ada 1 term
-        merged_iter = heapq.merge(*indices, key=lambda x: x[0])
-        curr, postings, tf_list = next(merged_iter)  # first item
-        for t, postings_, tf_list_ in merged_iter:  # from the second item
-            if t == curr:
-                zip_p_tf = merge_and_sort_posts_and_tfs(list(zip(postings, tf_list)),
-                                                        list(zip(postings_, tf_list_)))
-                postings = [doc_id for (doc_id, _) in zip_p_tf]
-                tf_list = [tf for (_, tf) in zip_p_tf]
+        for index in indices:
+            merged_index.stats.add(index.stats)
+        if deleted is not None and merged_index.stats.n_deleted(deleted):
+            merged_index.stats = merged_index.stats.without(deleted)
+        else:
+            deleted = None
+        merged_index.freeze_stats()
+
+        disjoint = self.doc_ranges_are_disjoint(indices)
+        merged_iter = heapq.merge(*[index.iter_encoded() for index in indices], key=lambda x: x[0])
+        for term, parts in itertools.groupby(merged_iter, key=lambda x: x[0]):
+            self.merge_postings(term, list(parts), merged_index, disjoint, deleted)
+
+    @staticmethod
+    def doc_ranges_are_disjoint(indices):
+        """
+        True jika docID di setiap index (sesuai urutan indices) semuanya lebih
+        besar dari docID di index-index sebelumnya. Ini selalu benar untuk
+        intermediate index hasil do_indexing (per block, paralel, maupun
+        SPIMI), karena docID di-assign berurutan.
+        """
+        prev_max = -1
+        for index in indices:
+            doc_ids = index.stats.doc_ids()
+            if not len(doc_ids):
+                continue
+            if doc_ids[0] <= prev_max:
+                return False
+            prev_max = doc_ids[-1]
+        return True
+
+    def merge_postings(self, term, parts, merged_index, disjoint, deleted=None):
+        """
+        Menggabungkan postings list sebuah term dari beberapa intermediate
+        index (parts, hasil iter_encoded, sesuai urutan index) lalu
+        menambahkannya ke merged_index.
+
+        1. Hanya ada di satu index dan codec-nya sama: bytes disalin apa
+           adanya (AdaptivePostings memilih codec yang sama untuk list yang
+           sama, sehingga cukup disalin juga).
+        2. Concatenation fast path: rentang docID antar index tidak beririsan
+           dan codec mendukung rebase (StandardPostings, VBEPostings): bytes
+           disambung, hanya docID pertama setiap bagian yang di-encode ulang
+           relatif terhadap docID terakhir bagian sebelumnya (last_doc dari
+           Lexicon, sehingga tidak ada yang di-decode).
+        3. Rentang docID tidak beririsan, codec lain: postings di-decode ke
+           array, disambung dengan np.concatenate dan di-encode ulang.
+        4. Selain itu (docID bisa beririsan): merge umum dengan
+           merge_and_sort_posts_and_tfs (atau versi posisionalnya).
+
+        Pada kasus 1-3, posisi (index posisional) cukup disambung bytes-nya,
+        karena posisi di-encode per posting. Jika ada dokumen yang harus
+        dibuang (deleted), selalu dipakai kasus 4.
+        """
+        if deleted is not None:
+            self.merge_overlapping_postings(term, parts, merged_index, deleted)
+            return
+        target = merged_index.postings_encoding
+        df = sum(part[1] for part in parts)
+        max_tf = max(part[6] for part in parts)
+        cf = sum(part[7] for part in parts)
+        last_doc = parts[-1][8]
+        adaptive = getattr(target, 'ADAPTIVE', False)
+
+        if len(parts) == 1 and (parts[0][2] is target or adaptive):
+            _, df, codec, encoded_postings, encoded_tf, encoded_positions, max_tf, cf, last_doc = parts[0]
+            merged_index.append_encoded(term, df, codec, encoded_postings, encoded_tf, max_tf,
+                                        encoded_positions, cf, last_doc)
+            return
+        if not disjoint:
+            self.merge_overlapping_postings(term, parts, merged_index)
+            return
+
+        encoded_positions = b''.join(part[5] for part in parts)
+        if hasattr(target, 'rebase') and all(part[2] is target for part in parts):
+            encoded_postings = [bytes(parts[0][3])]
+            for prev, part in zip(parts, parts[1:]):
+                encoded_postings.append(target.rebase(part[3], prev[8]))
+            merged_index.append_encoded(term, df, target, b''.join(encoded_postings),
+                                        b''.join(part[4] for part in parts), max_tf, encoded_positions, cf,
+                                        last_doc)
+            return
+
+        postings_list = np.concatenate([codec.decode_array(encoded) for _, _, codec, encoded, *_ in parts])
+        tf_list = np.concatenate([part[2].decode_tf_array(part[4]) for part in parts])
+        codec, encoded_postings, encoded_tf = merged_index.encode_postings(postings_list.tolist(),
+                                                                           tf_list.tolist())
+        merged_index.append_encoded(term, df, codec, encoded_postings, encoded_tf, max_tf,
+                                    encoded_positions, cf, last_doc, postings_list, tf_list)
+
+    def merge_overlapping_postings(self, term, parts, merged_index, deleted=None):
+        """
+        Merge umum (decode ke list) untuk postings list dari index yang
+        rentang docID-nya bisa beririsan: TF dokumen yang sama dijumlahkan
+        dan posisinya digabung. Postings dokumen yang ada di deleted dibuang;
+        term tidak ditulis jika tidak ada postings yang tersisa.
+        """
+        postings, tf_list, positions_list = [], [], []
+        for _, df, codec, encoded_postings, encoded_tf, encoded_positions, *_ in parts:
+            postings_ = codec.decode(encoded_postings)
+            tf_list_ = codec.decode_tf(encoded_tf)
+            if merged_index.positional:
+                positions = PositionsList(encoded_positions, encoded_tf, codec)
+                merged = merge_and_sort_posts_tfs_and_positions(
+                    list(zip(postings, tf_list, positions_list)),
+                    list(zip(postings_, tf_list_, [positions[i] for i in range(df)])))
+                positions_list = [positions for (_, _, positions) in merged]
             else:
-                merged_index.append(curr, postings, tf_list)
-                curr, postings, tf_list = t, postings_, tf_list_
-        merged_index.append(curr, postings, tf_list)
+                merged = merge_and_sort_posts_and_tfs(list(zip(postings, tf_list)),
+                                                      list(zip(postings_, tf_list_)))
+            postings = [doc_id for (doc_id, *_) in merged]
+            tf_list = [tf for (_, tf, *_) in merged]
+
+        if deleted is not None:
+            live = [i for i, doc_id in enumerate(postings) if doc_id not in deleted]
+            if not live:
+                return
+            postings = [postings[i] for i in live]
+            tf_list = [tf_list[i] for i in live]
+            if merged_index.positional:
+                positions_list = [positions_list[i] for i in live]
 
-    def retrieve_tfidf(self, query, k=10):
+        codec, encoded_postings, encoded_tf = merged_index.encode_postings(postings, tf_list)
+        encoded_positions = VBEPostings.encode_positions(positions_list) if merged_index.positional else None
+        merged_index.append_encoded(term, len(postings), codec, encoded_postings, encoded_tf,
+                                    max(tf_list, default=0), encoded_positions, sum(tf_list), postings[-1],
+                                    np.array(postings), np.array(tf_list))
+
+    def retrieve_tfidf(self, query, k=10, mode='daat'):
         """
-        Melakukan Ranked Retrieval dengan skema TaaT (Term-at-a-Time).
+        Melakukan Ranked Retrieval dengan skema DaaT (Document-at-a-Time).
         Method akan mengembalikan top-K retrieval results.
 
         w(t, D) = (1 + log tf(t, D))       jika tf(t, D) > 0
@@ -222,7 +585,7 @@ class BSBIIndex:
         catatan: 
             1. informasi DF(t) ada di dictionary postings_dict pada merged index
             2. informasi TF(t, D) ada di tf_list
-            3. informasi N bisa didapat dari doc_length pada merged index, len(doc_length)
+            3. informasi N bisa didapat dari statistik koleksi merged index, stats.n_docs
 
         Parameters
         ----------
@@ -232,6 +595,11 @@ class BSBIIndex:
             contoh: Query "universitas indonesia depok" artinya ada
             tiga terms: universitas, indonesia, dan depok
 
+        mode: str
+            Query processor: 'daat' (exhaustive), 'wand', 'maxscore', 'bmw',
+            'and' (hanya dokumen yang memuat semua term), atau 'and_or'
+            (AND dulu, kembali ke OR jika hasilnya kurang dari k).
+
         Result
         ------
         List[(int, str)]
@@ -242,33 +610,27 @@ class BSBIIndex:
         JANGAN LEMPAR ERROR/EXCEPTION untuk terms yang TIDAK ADA di collection.
 
         """
-        self.load()
+        if not self.is_loaded:
+            self.load()
         res = []
         # query pre processing
-        q_terms = self.pre_processing_query(query)
+        q_terms = self.query_term_ids(query, keep_unknown=True)
         
-        if q_terms == []:
+        if all(term is None for term in q_terms):
             return []
-        
-        for i, t in enumerate(q_terms):
-            q_terms[i] = self.term_id_map[t]
                 
-        with InvertedIndexReader(self.index_name, self.postings_encoding, directory=self.output_dir) as index:
-            docs_score = self.tfidf_scoring(index, q_terms)
-            for doc in sorted(docs_score, key=itemgetter(0), reverse=True):
-                res.append([doc[0], self.doc_id_map[doc[1]]])
-                k-=1
-                if k <= 0:
-                    break
+        with self.open_index().snapshot() as index:
+            for score, doc in self.tfidf_scoring(index, q_terms, k, mode):
+                res.append([score, self.doc_id_map[doc]])
         
         return res
         # scoring
         
             
 
-    def retrieve_bm25(self, query, k=10, k1=1.2, b=0.75):
+    def retrieve_bm25(self, query, k=10, k1=1.2, b=0.75, mode='daat'):
         """
-        Melakukan Ranked Retrieval dengan skema scoring BM25 dan framework TaaT (Term-at-a-Time).
+        Melakukan Ranked Retrieval dengan skema scoring BM25 dan framework DaaT (Document-at-a-Time).
         Method akan mengembalikan top-K retrieval results.
 
         Parameters
@@ -279,6 +641,15 @@ class BSBIIndex:
             contoh: Query "universitas indonesia depok" artinya ada
             tiga terms: universitas, indonesia, dan depok
 
+        mode: str
+            Query processor: 'daat' (exhaustive), atau dynamic pruning
+            'wand' / 'maxscore' yang memakai upper bound skor per term, dan
+            'bmw' (Block-Max WAND) yang memakai upper bound per block postings,
+            yang disimpan saat indexing. Semua mode tersebut menghasilkan
+            top-k yang sama. Mode 'and' hanya mengembalikan dokumen yang
+            memuat semua term, dan 'and_or' menjalankan 'and' dulu lalu
+            kembali ke query OR jika hasilnya kurang dari k dokumen.
+
         Result
         ------
         List[(int, str)]
@@ -288,29 +659,23 @@ class BSBIIndex:
 
         """
         # self.do_indexing()
-        self.load()
+        if not self.is_loaded:
+            self.load()
         res = []
         # query pre processing
-        q_terms = self.pre_processing_query(query)
+        q_terms = self.query_term_ids(query, keep_unknown=True)
         
-        if q_terms == []:
+        if all(term is None for term in q_terms):
             return []
         
-        for i, t in enumerate(q_terms):
-            q_terms[i] = self.term_id_map[t]
-        
-        with InvertedIndexReader(self.index_name, self.postings_encoding, directory=self.output_dir) as index:
-            docs_score = self.bm25_scoring(index, q_terms, k1, b)
-            for doc in sorted(docs_score, key=itemgetter(0), reverse=True):
-                res.append([doc[0], self.doc_id_map[doc[1]]])
-                k-=1
-                if k <= 0:
-                    break
+        with self.open_index().snapshot() as index:
+            for score, doc in self.bm25_scoring(index, q_terms, k1, b, k, mode):
+                res.append([score, self.doc_id_map[doc]])
                 
         return res
         
          
-    def do_indexing(self):
+    def do_indexing(self, workers=1, memory_budget=None, incremental=True):
         """
         Base indexing code
         BAGIAN UTAMA untuk melakukan Indexing dengan skema BSBI (blocked-sort
@@ -319,38 +684,338 @@ class BSBIIndex:
         Method ini scan terhadap semua data di collection, memanggil parsing_block
         untuk parsing dokumen dan memanggil write_to_index yang melakukan inversion
         di setiap block dan menyimpannya ke index yang baru.
+
+        Parameters
+        ----------
+        workers: int
+            Banyaknya process untuk parsing dan inversion block (lihat
+            index_blocks_parallel); 1 berarti sequential, None berarti
+            sebanyak CPU. Hasilnya identik untuk berapapun workers.
+        memory_budget: int
+            Jika diberikan (dalam bytes), indexing dilakukan secara SPIMI
+            tanpa memandang pembagian folder (lihat index_spimi), sehingga
+            memori yang dipakai untuk postings dibatasi; workers diabaikan.
+            Merged index yang dihasilkan identik dengan indexing per block.
+        incremental: bool
+            Jika True (dan tanpa memory_budget), hanya block yang berubah
+            sejak indexing sebelumnya yang di-parse ulang; intermediate
+            index block lainnya dipakai lagi (lihat BlockManifest), lalu
+            semua di-merge ulang. termID dan docID lama dipertahankan
+            (id map dimuat dari output directory), sehingga docID dokumen
+            baru bisa lebih besar dari docID block sesudahnya; skor setiap
+            dokumen tetap sama dengan indexing dari awal.
         """
-        # loop untuk setiap sub-directory di dalam folder collection (setiap block)
-        for block_dir_relative in tqdm(sorted(next(os.walk(self.data_dir))[1])):
-            td_pairs = self.parsing_block(block_dir_relative)
-            index_id = 'intermediate_index_'+block_dir_relative
-            self.intermediate_indices.append(index_id)
-            with InvertedIndexWriter(index_id, self.postings_encoding, directory=self.output_dir) as index:
-                self.write_to_index(td_pairs, index)
-                td_pairs = None
+        # reader lama (jika ada) menunjuk ke index yang akan ditulis ulang
+        self.close_index()
+
+        manifest = BlockManifest(os.path.join(self.output_dir, 'blocks.manifest'),
+                                 {'postings_encoding': self.postings_encoding.__name__,
+                                  'positional': self.positional})
+        if incremental and memory_budget is None:
+            manifest.load()
+        else:
+            manifest.remove()
+        # intermediate index lama hanya bisa dipakai dengan id map yang
+        # menghasilkannya
+        if manifest.blocks and not self.is_loaded:
+            if os.path.exists(os.path.join(self.output_dir, 'terms.idmap')):
+                self.load()
+            else:
+                manifest.blocks = {}
+
+        # id map hasil load() bersifat read-only; indexing perlu versi mutable
+        if isinstance(self.term_id_map, FrozenIdMap):
+            self.term_id_map = self.term_id_map.thaw()
+        if isinstance(self.doc_id_map, FrozenIdMap):
+            self.doc_id_map = self.doc_id_map.thaw()
+
+        blocks = sorted(next(os.walk(self.data_dir))[1])
+        self.intermediate_indices = []
+        workers = workers or os.cpu_count() or 1
+        if memory_budget is not None:
+            self.index_spimi(memory_budget)
+        else:
+            files = {block: manifest.scan(block, os.path.join(self.data_dir, block)) for block in blocks}
+            changed = [block for block in blocks
+                       if not manifest.is_unchanged(block, files[block])
+                       or not os.path.exists(os.path.join(self.output_dir, manifest.blocks[block]['index'] + '.dict'))]
+            for block, entry in manifest.blocks.items():
+                if block not in files:
+                    remove_index_files(self.output_dir, entry['index'])
+
+            if workers > 1 and len(changed) > 1:
+                self.index_blocks_parallel(changed, min(workers, len(changed)))
+            else:
+                # loop untuk setiap sub-directory di dalam folder collection (setiap block)
+                for block_dir_relative in tqdm(changed):
+                    td_pairs = self.parsing_block(block_dir_relative)
+                    index_id = 'intermediate_index_'+block_dir_relative
+                    with InvertedIndexWriter(index_id, self.postings_encoding, directory=self.output_dir,
+                                             positional=self.positional) as index:
+                        self.write_to_index(td_pairs, index)
+                        td_pairs = None
+            self.intermediate_indices = ['intermediate_index_'+block for block in blocks]
+            manifest.blocks = {block: {'index': 'intermediate_index_'+block, 'files': files[block]}
+                               for block in blocks}
 
         self.save()
+        if memory_budget is None:
+            manifest.save()
+        self.is_loaded = True
+
+        if self.term_cache_file is not None:
+            self.term_cache.save(self.term_cache_file)
+        stats = self.term_cache.stats()
+        print(f"term cache: {stats['hits']} hits, {stats['misses']} misses "
+              f"(hit rate {stats['hit_rate']:.1%}), {stats['size']} entry")
 
-        with InvertedIndexWriter(self.index_name, self.postings_encoding, directory=self.output_dir) as merged_index:
+        # merged index ditulis sebagai segment baru, bukan menimpa file index
+        # lama di tempat: engine yang sedang berjalan masih me-mmap file
+        # tersebut, dan truncate di bawah mmap berakibat SIGBUS.
+        # merged index menyimpan upper bound skor BM25 per term untuk
+        # dynamic pruning, dihitung dengan k1 dan b default retrieve_bm25
+        segments = self.segmented_index()
+        merged_name = segments.new_segment_name()
+        with InvertedIndexWriter(merged_name, self.postings_encoding, directory=self.output_dir,
+                                 bm25_params=(1.2, 0.75), positional=self.positional) as merged_index:
             with contextlib.ExitStack() as stack:
                 indices = [stack.enter_context(InvertedIndexReader(index_id, self.postings_encoding, directory=self.output_dir))
                            for index_id in self.intermediate_indices]
                 self.merge_index(indices, merged_index)
-                
+
+        # commit lewat manifest: merged index yang baru adalah satu-satunya
+        # segment; segment lama (termasuk hasil add_documents sebelumnya,
+        # yang sudah tercakup di koleksi) di-unlink
+        segments.reset([merged_name])
+
+    def add_documents(self, doc_paths):
+        """
+        Menambahkan dokumen baru ke index tanpa indexing ulang seluruh
+        koleksi: dokumen di-parse dan di-invert ke satu segment baru yang
+        kecil, lalu segment tersebut di-publish (SegmentedIndex.add_segment)
+        sehingga langsung terlihat oleh query berikutnya. Segment-segment
+        kecil dipadatkan oleh background merge.
+
+        Dokumen baru mendapat docID baru (lebih besar dari semua docID yang
+        ada), dan term baru mendapat termID baru; id map disimpan ulang
+        sebelum segment di-publish. Dokumen yang pernah dihapus boleh
+        ditambahkan lagi.
+
+        Parameters
+        ----------
+        doc_paths: List[str]
+            Path file dokumen, dalam bentuk yang sama dengan nama dokumen di
+            doc_id_map (misal os.path.join(data_dir, block, nama file))
+
+        Returns
+        -------
+        str
+            Nama segment baru, atau None jika dokumen tidak memuat term apapun
+        """
+        return self.index_documents(doc_paths, update=False)
+
+    def update_documents(self, doc_paths):
+        """
+        Meng-index ulang dokumen yang isinya berubah, sebagai delete + add:
+        dokumen mendapat docID baru di segment baru, dan docID lamanya
+        ditandai dihapus pada commit manifest yang sama (lihat
+        SegmentedIndex.add_segment). Dokumen yang belum ada di index
+        diperlakukan seperti add_documents.
+
+        Returns
+        -------
+        str
+            Nama segment baru, atau None jika dokumen tidak memuat term apapun
+        """
+        return self.index_documents(doc_paths, update=True)
+
+    def delete_documents(self, doc_paths):
+        """
+        Menghapus dokumen dari index dengan menandai docID-nya di tombstone
+        bitset (SegmentedIndex.delete_documents). Dokumen yang dihapus
+        langsung tidak muncul di hasil query maupun di statistik koleksi;
+        postings-nya dibuang saat segment-nya di-merge. Path yang tidak ada
+        di index diabaikan.
+
+        Returns
+        -------
+        int
+            Banyaknya dokumen yang dihapus
+        """
+        with self.add_documents_lock:
+            if not self.is_loaded:
+                self.load()
+            segments = self.open_index()
+            with segments.snapshot() as index:
+                doc_ids = [self.doc_id_map.get(doc_path) for doc_path in doc_paths]
+                doc_ids = [doc_id for doc_id in doc_ids if doc_id is not None and doc_id not in index.deleted]
+            segments.delete_documents(doc_ids)
+            return len(doc_ids)
+
+    def index_documents(self, doc_paths, update):
+        """Implementasi add_documents dan update_documents"""
+        with self.add_documents_lock:
+            if not self.is_loaded:
+                self.load()
+            segments = self.open_index()
+            with segments.snapshot() as index:
+                positional = index.positional
+                deleted = index.deleted
+            old_doc_ids, reassigned = [], []
+            for doc_path in doc_paths:
+                doc_id = self.doc_id_map.get(doc_path)
+                if doc_id is None:
+                    continue
+                if doc_id not in deleted:
+                    if not update:
+                        raise ValueError(f"dokumen sudah ada di index: {doc_path}")
+                    old_doc_ids.append(doc_id)
+                reassigned.append(doc_path)
+            if isinstance(self.term_id_map, FrozenIdMap):
+                self.term_id_map = self.term_id_map.thaw()
+            if isinstance(self.doc_id_map, FrozenIdMap):
+                self.doc_id_map = self.doc_id_map.thaw()
+            for doc_path in reassigned:
+                self.doc_id_map.reassign(doc_path)
+
+            td_pairs = self.parse_documents(self.iter_files(doc_paths))
+            if not td_pairs:
+                self.save()
+                segments.delete_documents(old_doc_ids)
+                return None
+            name = segments.new_segment_name()
+            with InvertedIndexWriter(name, self.postings_encoding, directory=self.output_dir,
+                                     bm25_params=segments.bm25_params, positional=positional) as index:
+                self.write_to_index(td_pairs, index)
+            self.save()
+            segments.add_segment(name, old_doc_ids)
+            return name
+
+    def index_blocks_parallel(self, blocks, workers):
+        """
+        Membangun intermediate index untuk setiap block dengan sebuah pool
+        berisi workers process.
+
+        Setiap worker mem-parsing dan meng-invert satu block dengan term_id_map
+        dan doc_id_map lokal (parse_block_worker), sehingga worker tidak perlu
+        berbagi state. Hasilnya diproses di sini sesuai urutan block: string
+        term dan dokumen lokal dipetakan ke ID global lewat self.term_id_map
+        dan self.doc_id_map, lalu postings di-remap dan diurutkan ulang
+        berdasarkan termID global. Karena block diproses berurutan dan ID
+        lokal diberikan sesuai urutan kemunculan, ID global yang dihasilkan
+        sama persis dengan indexing sequential. Mapping docID lokal ke global
+        monoton naik, sehingga postings list tetap terurut tanpa sort ulang.
+
+        Pengecualiannya adalah indexing incremental (lihat do_indexing):
+        dokumen yang sudah ada di doc_id_map memakai docID lamanya, sehingga
+        mapping-nya bisa tidak monoton dan postings diurutkan ulang.
+
+        Penulisan intermediate index (encoding) juga dikerjakan oleh pool
+        (write_block_worker), paralel dengan parsing block-block berikutnya.
+        """
+        initargs = (self.data_dir, self.output_dir, self.postings_encoding, self.positional,
+                    self.term_cache_file)
+        with multiprocessing.Pool(workers, initializer=init_indexing_worker, initargs=initargs) as pool:
+            writes = []
+            parsed = pool.imap(parse_block_worker, blocks)
+            for block_dir_relative, (terms, docs, items, cache_delta) in zip(blocks,
+                                                                              tqdm(parsed, total=len(blocks))):
+                self.term_cache.update(*cache_delta)
+                term_ids = [self.term_id_map[term] for term in terms]
+                doc_ids = [self.doc_id_map[doc] for doc in docs]
+                items = sorted(((term_ids[term], [doc_ids[doc] for doc in postings_list]) + tuple(rest)
+                                for term, postings_list, *rest in items),
+                               key=lambda item: item[0])
+                if any(prev > doc for prev, doc in zip(doc_ids, doc_ids[1:])):
+                    items = [sort_postings(item) for item in items]
+                index_id = 'intermediate_index_'+block_dir_relative
+                writes.append(pool.apply_async(write_block_worker, (index_id, self.output_dir,
+                                                                    self.postings_encoding,
+                                                                    self.positional, items)))
+            for write in writes:
+                write.get()
+
+    def index_spimi(self, memory_budget):
+        """
+        Single-pass in-memory indexing (SPIMI) dengan batas memori.
+
+        Dokumen dibaca satu per satu (iter_documents) dan postings-nya
+        langsung diakumulasikan ke satu term_dict (termID -> {docID: TF}
+        atau {docID: list posisi}), tanpa membangun list td_pairs. Ketika
+        perkiraan memori term_dict mencapai memory_budget bytes, term_dict
+        ditulis (spill) sebagai satu run terurut (intermediate index) dan
+        dikosongkan. Spill hanya dilakukan di batas dokumen. Di akhir, semua
+        run di-merge oleh do_indexing seperti intermediate index biasa.
+
+        Memori term_dict diperkirakan dari banyaknya term, postings, dan
+        posisi (SPIMI_TERM_BYTES, SPIMI_POSTING_BYTES, SPIMI_POSITION_BYTES),
+        karena mengukur ukuran objek Python secara tepat terlalu mahal.
+        """
+        term_dict = {}
+        estimated = 0
+        n_runs = 0
+        for file_dir, text in tqdm(self.iter_documents()):
+            doc_id = None
+            for position, word in enumerate(self.analyzer.analyze(text)):
+                term_id = self.term_id_map[word]
+                if doc_id is None:
+                    doc_id = self.doc_id_map[file_dir]
+                curr_term = term_dict.get(term_id)
+                if curr_term is None:
+                    curr_term = term_dict[term_id] = {}
+                    estimated += self.SPIMI_TERM_BYTES
+                if self.positional:
+                    if doc_id in curr_term:
+                        curr_term[doc_id].append(position)
+                    else:
+                        curr_term[doc_id] = [position]
+                        estimated += self.SPIMI_POSTING_BYTES
+                    estimated += self.SPIMI_POSITION_BYTES
+                elif doc_id in curr_term:
+                    curr_term[doc_id] += 1
+                else:
+                    curr_term[doc_id] = 1
+                    estimated += self.SPIMI_POSTING_BYTES
+            if estimated >= memory_budget:
+                self.write_spimi_run(term_dict, n_runs)
+                n_runs += 1
+                term_dict = {}
+                estimated = 0
+        if term_dict or n_runs == 0:
+            self.write_spimi_run(term_dict, n_runs)
+
+    def write_spimi_run(self, term_dict, run):
+        """Menulis term_dict sebagai run ke-run (intermediate index) SPIMI"""
+        index_id = 'intermediate_index_spimi_' + str(run)
+        self.intermediate_indices.append(index_id)
+        with InvertedIndexWriter(index_id, self.postings_encoding, directory=self.output_dir,
+                                 positional=self.positional) as index:
+            self.write_term_dict(term_dict, index)
+
     ### Additional Functions ###
     def pre_processing_query(self, query):
-        # tokenization
-        q_terms = re.findall(r'\w+', query)
-        # stemming and stopwords removal
-        for i, q in enumerate(q_terms):
-            word = self.pre_processing_text(q)
-            if word == "":
-                q_terms.pop(i)
-            else:
-                q_terms[i] = word
-        return q_terms 
+        """
+        Mengembalikan list term dari query, dinormalisasi dengan analyzer
+        yang sama dengan indexing (lowercase, tokenisasi, stopword removal,
+        stemming).
+        """
+        return self.analyzer(query)
+
+    def query_term_ids(self, query, keep_unknown=False):
+        """
+        Mengembalikan list termID dari query. Term yang tidak ada di koleksi
+        dibuang (atau menjadi None jika keep_unknown), BUKAN di-assign termID
+        baru, sehingga term_id_map tidak berubah saat query (aman dipakai
+        bersama oleh banyak thread).
+        """
+        q_terms = []
+        for t in self.pre_processing_query(query):
+            term_id = self.term_id_map.get(t)
+            if term_id is not None or keep_unknown:
+                q_terms.append(term_id)
+        return q_terms
     
-    def tfidf_scoring(self, index, queries):
+    def tfidf_scoring(self, index, queries, k=10, mode='daat'):
         """
         w(t, D) = (1 + log tf(t, D))       jika tf(t, D) > 0
                 = 0                        jika sebaliknya
@@ -359,39 +1024,162 @@ class BSBIIndex:
 
         Score = untuk setiap term di query, akumulasikan w(t, Q) * w(t, D).
                 (tidak perlu dinormalisasi dengan panjang dokumen)
-                
+
+        Skor diakumulasikan per dokumen secara DaaT (Document-at-a-Time) dan
+        hanya top-k (score, docID) yang dikembalikan, terurut mengecil.
+        mode memilih query processor di scoring.QUERY_PROCESSORS.
         """
-        res = []
-        for query in queries:
-            postings = index.get_postings_list(query)
-            if not postings == []:
-                docs, tf = postings
-            else: continue
-            idf = math.log10(len(index.doc_length)/len(docs))
-            for i,doc in enumerate(docs):
-                wtd = 1 + math.log10(tf[i])
-                res.append([wtd*idf, doc])
-        
-        return res
+        return self.rank(index, queries, TfIdfScorer(index), k, mode)
     
-    def bm25_scoring(self, index, queries, k1, b):
+    def bm25_scoring(self, index, queries, k1, b, k=10, mode='daat'):
         """
-        Scoring dengan Okapi BM25
-                
+        Scoring dengan Okapi BM25, diakumulasikan per dokumen secara DaaT
+        (Document-at-a-Time). Mengembalikan top-k (score, docID) terurut mengecil.
+        mode memilih query processor di scoring.QUERY_PROCESSORS.
         """
-        res = []
-        for query in queries:
-            postings = index.get_postings_list(query)
-            if not postings == []:
-                docs, tf = postings
-            else: continue
-            idf = math.log10(len(index.doc_length)/len(docs))
-            for i,doc in enumerate(docs):
-                #document length normalization factor
-                dlnf = ((1-b)+(b*index.doc_length[doc]/index.avg_doc_length))
-                bm25 = idf*((k1+1)*tf[i])/(k1*dlnf+tf[i])
-                res.append([bm25, doc])
-        return res
+        return self.rank(index, queries, BM25Scorer(index, k1, b), k, mode)
+
+    def rank(self, index, queries, scorer, k, mode):
+        """
+        Menjalankan query processor mode dengan scorer. Mode 'and_or'
+        menjalankan query konjungtif (AND) lebih dulu, yang jauh lebih murah
+        untuk query panjang, dan baru kembali ke query disjungtif (OR, dengan
+        WAND) jika dokumen yang memuat semua term kurang dari k.
+
+        index adalah SegmentSnapshot: query processor dijalankan terpisah di
+        setiap segment dengan bobot term dari df global, lalu top-k semua
+        segment digabung (merge_top_k).
+
+        queries boleh memuat None untuk term yang tidak ada di koleksi: tidak
+        ada dokumen yang memenuhi 'and', sehingga 'and' mengembalikan list
+        kosong dan 'and_or' langsung memakai query OR.
+        """
+        if None in queries:
+            if mode == 'and':
+                return []
+            if mode == 'and_or':
+                mode = 'wand'
+            queries = [term for term in queries if term is not None]
+        if mode == 'and_or':
+            res = self.rank(index, queries, scorer, k, 'and')
+            if len(res) >= k:
+                return res
+            mode = 'wand'
+        results = []
+        for segment in index.segments:
+            cursors = open_cursors(segment, queries, scorer, index.df)
+            # untuk AND, segment yang tidak memuat salah satu term tidak
+            # mungkin berisi dokumen yang cocok
+            if mode == 'and' and len(cursors) < len(set(queries)):
+                continue
+            results.append(QUERY_PROCESSORS[mode](cursors, scorer, k))
+        return merge_top_k(results, k)
+
+    def retrieve_boolean(self, query):
+        """
+        Boolean retrieval (tanpa ranking) dengan operator AND, OR, dan NOT
+        (huruf besar). NOT mengikat paling kuat, lalu AND, lalu OR; dua term
+        bersebelahan tanpa operator dianggap AND.
+
+            contoh: "jantung AND NOT kanker OR paru"
+
+        Setiap term di-preprocess seperti query biasa. Term yang hilang
+        karena stopword diabaikan, term yang tidak ada di koleksi tidak
+        cocok dengan dokumen manapun.
+
+        Result
+        ------
+        List[str]
+            Nama dokumen yang memenuhi query, terurut berdasarkan docID.
+        """
+        if not self.is_loaded:
+            self.load()
+        clauses = []
+        for positive, negative in parse_query(query):
+            clauses.append(([self.term_id_map.get(word) for token in positive
+                             for word in self.pre_processing_query(token)],
+                            [self.term_id_map.get(word) for token in negative
+                             for word in self.pre_processing_query(token)]))
+
+        with self.open_index().snapshot() as index:
+            # docID antar segment tidak beririsan, sehingga setiap klausa
+            # cukup dievaluasi per segment
+            docs = merge_unique([evaluate_clause(segment, positive, negative, segment.stats.doc_ids().tolist())
+                                 for segment in index.segments
+                                 for positive, negative in clauses if positive or negative])
+            return [self.doc_id_map[doc] for doc in docs]
+
+    def retrieve_phrase(self, query, k=10, k1=1.2, b=0.75):
+        """
+        Phrase query: hanya dokumen yang memuat term-term query secara
+        berurutan (setelah preprocessing, sehingga stopword di antara term
+        diabaikan) yang dikembalikan, dengan ranking BM25. Membutuhkan index
+        posisional (BSBIIndex dengan positional=True saat indexing).
+
+        Result
+        ------
+        List[(int, str)]
+            Top-K (score, nama dokumen) terurut mengecil berdasarkan skor.
+        """
+        if not self.is_loaded:
+            self.load()
+        with self.open_index().snapshot() as index:
+            if not index.positional:
+                raise ValueError("phrase query membutuhkan index posisional")
+            terms = [self.term_id_map.get(word) for word in self.pre_processing_query(query)]
+            # term yang tidak ada di koleksi membuat frase tidak mungkin cocok
+            if terms == [] or None in terms:
+                return []
+
+            scorer = BM25Scorer(index, k1, b)
+            results = []
+            for segment in index.segments:
+                cursors = open_cursors(segment, terms, scorer, index.df)
+                # begitu juga term yang tidak ada di segment ini
+                if len(cursors) == len(set(terms)):
+                    results.append(phrase_top_k(cursors, terms, scorer, k))
+            return [[score, self.doc_id_map[doc]] for score, doc in merge_top_k(results, k)]
+
+    def retrieve_proximity(self, query, k=10, window=8, candidates=100, k1=1.2, b=0.75):
+        """
+        Ranked retrieval BM25 ditambah skor proximity (lihat
+        scoring.proximity_score): top-candidates dokumen hasil BM25 di-rerank
+        dengan skor BM25 + proximity term-term query dalam jarak window
+        token. Posisi hanya di-decode untuk dokumen kandidat tersebut.
+        Membutuhkan index posisional.
+
+        Result
+        ------
+        List[(int, str)]
+            Top-K (score, nama dokumen) terurut mengecil berdasarkan skor.
+        """
+        if not self.is_loaded:
+            self.load()
+        with self.open_index().snapshot() as index:
+            if not index.positional:
+                raise ValueError("proximity query membutuhkan index posisional")
+            terms = self.query_term_ids(query)
+            if terms == []:
+                return []
+
+            scorer = BM25Scorer(index, k1, b)
+            bm25 = self.rank(index, terms, scorer, max(k, candidates), 'wand')
+            # term yang semua dokumennya sudah dihapus tidak berkontribusi
+            weights = [scorer.term_weight(df) if df else 0.0 for df in map(index.df, terms)]
+            res = []
+            for segment in index.segments:
+                cursors = {term: segment.get_cursor(term) for term in set(terms)}
+                # kandidat dikunjungi terurut docID agar cursor cukup maju dengan next_geq
+                for score, doc in sorted(bm25, key=lambda x: x[1]):
+                    if doc not in segment.stats:
+                        continue
+                    positions = {term: (cursor.positions() if cursor is not None and cursor.next_geq(doc) == doc
+                                        else [])
+                                 for term, cursor in cursors.items()}
+                    score += proximity_score([positions[term] for term in terms], weights, window)
+                    res.append((score, doc))
+        res.sort(key=lambda x: (-x[0], x[1]))
+        return [[score, self.doc_id_map[doc]] for score, doc in res[:k]]
     
 
 if __name__ == "__main__":
@@ -399,6 +1187,6 @@ if __name__ == "__main__":
     BSBI_instance = BSBIIndex(data_dir='collections',
                               postings_encoding=VBEPostings,
                               output_dir='index')
-    BSBI_instance.do_indexing()  # memulai indexing!
+    BSBI_instance.do_indexing(workers=None)  # memulai indexing (paralel, sebanyak CPU)!
     
     # print()
\ No newline at end of file
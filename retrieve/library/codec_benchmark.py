@@ -0,0 +1,172 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+import numpy as np
+
+from .compression import CODECS, AdaptivePostings
+from .index import InvertedIndexReader
+from .segment import SegmentedIndex
+
+
+def iter_lists(index_name, directory, postings_encoding=AdaptivePostings):
+    """
+    Membaca (generator) setiap (postings_list, tf_list) dari index, satu
+    term setiap kali, sehingga index besar tidak perlu dimuat seluruhnya ke
+    memori. Setiap term di-decode dengan codec yang tercatat di Lexicon;
+    postings_encoding hanya dipakai untuk index format lama.
+    """
+    with InvertedIndexReader(index_name, postings_encoding, directory=directory) as index:
+        for entry in index:
+            yield entry[1], entry[2]
+
+
+def benchmark_codec(codec, lists):
+    """
+    Meng-encode lalu men-decode setiap (postings_list, tf_list) di lists
+    dengan codec dan mengukur ukuran hasil encode, waktu encode dan decode,
+    serta kebenaran round-trip.
+
+    Untuk AdaptivePostings, encode adalah AdaptivePostings.choose (mencoba
+    semua kandidat), dan decode memakai codec yang terpilih.
+
+    Returns
+    -------
+    dict
+        Statistik codec (lihat run_benchmark)
+    """
+    adaptive = getattr(codec, 'ADAPTIVE', False)
+    n_lists = n_postings = 0
+    postings_bytes = tf_bytes = 0
+    encode_seconds = decode_seconds = 0.0
+    failures = []
+    chosen = {}
+    for postings_list, tf_list in lists:
+        n_lists += 1
+        n_postings += len(postings_list)
+        try:
+            start = time.perf_counter()
+            if adaptive:
+                list_codec, encoded_postings, encoded_tf = codec.choose(postings_list, tf_list)
+            else:
+                list_codec = codec
+                encoded_postings = codec.encode(postings_list)
+                encoded_tf = codec.encode_tf(tf_list)
+            middle = time.perf_counter()
+            decoded_postings = list_codec.decode(encoded_postings)
+            decoded_tf = list_codec.decode_tf(encoded_tf)
+            end = time.perf_counter()
+        except (ValueError, OverflowError) as e:
+            # misal Simple8bPostings untuk nilai >= 2^60
+            failures.append({'list': n_lists - 1, 'error': str(e)})
+            continue
+        encode_seconds += middle - start
+        decode_seconds += end - middle
+        postings_bytes += len(encoded_postings)
+        tf_bytes += len(encoded_tf)
+        chosen[list_codec.__name__] = chosen.get(list_codec.__name__, 0) + 1
+        if decoded_postings != list(postings_list) or decoded_tf != list(tf_list):
+            failures.append({'list': n_lists - 1, 'error': 'hasil decoding tidak sama dengan list original'})
+
+    # setiap posting terdiri dari dua integer: docID dan TF
+    n_integers = 2 * n_postings
+    stats = {
+        'lists': n_lists,
+        'postings': n_postings,
+        'postings_bytes': postings_bytes,
+        'tf_bytes': tf_bytes,
+        'index_bytes': postings_bytes + tf_bytes,
+        'bytes_per_posting': (postings_bytes + tf_bytes) / n_postings if n_postings else 0.0,
+        'encode_seconds': encode_seconds,
+        'decode_seconds': decode_seconds,
+        'encode_integers_per_second': n_integers / encode_seconds if encode_seconds else 0.0,
+        'decode_integers_per_second': n_integers / decode_seconds if decode_seconds else 0.0,
+        'roundtrip_ok': not failures,
+        'failures': failures[:10],
+        'n_failures': len(failures),
+    }
+    if adaptive:
+        stats['chosen'] = chosen
+    return stats
+
+
+def run_benchmark(index_name, directory, codecs=None):
+    """
+    Menjalankan benchmark_codec untuk setiap codec terhadap semua postings
+    list dan TF list di index. Index dibaca ulang (streaming) untuk setiap
+    codec; waktu membaca index tidak ikut diukur.
+
+    Parameters
+    ----------
+    index_name: str
+        Nama index (segment), misal "segment_0"
+    directory: str
+        Direktori index
+    codecs: List[class]
+        Codec yang diukur; default semua codec di CODECS ditambah
+        AdaptivePostings
+
+    Returns
+    -------
+    dict
+        {'index': ..., 'environment': ..., 'codecs': {nama codec: statistik}},
+        siap di-dump sebagai JSON
+    """
+    codecs = codecs or list(CODECS) + [AdaptivePostings]
+    stored_bytes = os.path.getsize(os.path.join(directory, index_name + '.index'))
+    result = {
+        'index': {'name': index_name, 'directory': directory, 'stored_bytes': stored_bytes},
+        'environment': {'python': platform.python_version(), 'numpy': np.__version__,
+                        'platform': platform.platform()},
+        'codecs': {},
+    }
+    for codec in codecs:
+        result['codecs'][codec.__name__] = benchmark_codec(codec, iter_lists(index_name, directory))
+    return result
+
+
+def format_table(result):
+    """Ringkasan hasil run_benchmark yang mudah dibaca manusia"""
+    lines = [f"{'codec':20s} {'bytes':>10s} {'B/posting':>10s} {'enc int/s':>12s} "
+             f"{'dec int/s':>12s}  round-trip"]
+    for name, stats in result['codecs'].items():
+        lines.append(f"{name:20s} {stats['index_bytes']:10d} {stats['bytes_per_posting']:10.3f} "
+                     f"{stats['encode_integers_per_second']:12.0f} {stats['decode_integers_per_second']:12.0f}  "
+                     f"{'OK' if stats['roundtrip_ok'] else 'GAGAL (%d)' % stats['n_failures']}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+
+    # Benchmark semua codec terhadap postings list merged index:
+    #   python -m retrieve.library.codec_benchmark --json hasil.json
+    this_dir = os.path.dirname(__file__)
+    parser = argparse.ArgumentParser(description="Benchmark codec postings list terhadap index")
+    parser.add_argument('--index-dir', default=os.path.join(this_dir, 'index'))
+    parser.add_argument('--index-name',
+                        help="nama segment; default segment pertama di manifest main_index "
+                             "(merged index hasil do_indexing)")
+    parser.add_argument('--codec', action='append',
+                        help="nama codec (boleh berulang); default semua codec")
+    parser.add_argument('--json', help="path file output JSON ('-' untuk stdout)")
+    args = parser.parse_args()
+
+    available = {codec.__name__: codec for codec in list(CODECS) + [AdaptivePostings]}
+    unknown = [name for name in args.codec or [] if name not in available]
+    if unknown:
+        parser.error(f"codec tidak dikenal: {', '.join(unknown)}; pilihan: {', '.join(available)}")
+    codecs = [available[name] for name in args.codec] if args.codec else None
+
+    index_name = args.index_name or SegmentedIndex(args.index_dir, None, None).read_manifest()[0][0]
+    result = run_benchmark(index_name, args.index_dir, codecs)
+    if args.json == '-':
+        json.dump(result, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_table(result))
+        if args.json:
+            with open(args.json, 'w') as f:
+                json.dump(result, f, indent=2)
@@ -1,5 +1,7 @@
 import array
 
+import numpy as np
+
 
 class StandardPostings:
     """ 
@@ -89,6 +91,61 @@ class StandardPostings:
         """
         return StandardPostings.decode(encoded_tf_list)
 
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Seperti decode, tetapi mengembalikan np.ndarray (tanpa copy)"""
+        return np.frombuffer(encoded_postings_list, dtype=np.dtype('L'))
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Seperti decode_tf, tetapi mengembalikan np.ndarray (tanpa copy)"""
+        return StandardPostings.decode_array(encoded_tf_list)
+
+    @staticmethod
+    def block_offsets(postings_list, block_size):
+        """
+        Posisi byte awal setiap block (block_size postings) di dalam hasil
+        encode(postings_list), ditambah panjang total di akhir. Dipakai untuk
+        menyimpan metadata Block-Max, agar satu block bisa di-decode sendiri.
+        """
+        itemsize = array.array('L').itemsize
+        starts = np.arange(0, len(postings_list), block_size)
+        return np.append(starts * itemsize, len(postings_list) * itemsize)
+
+    @staticmethod
+    def tf_block_offsets(tf_list, block_size):
+        """Seperti block_offsets, untuk hasil encode_tf(tf_list)"""
+        return StandardPostings.block_offsets(tf_list, block_size)
+
+    @staticmethod
+    def decode_block(encoded_block, prev_doc):
+        """
+        Decode satu block postings hasil slicing dengan block_offsets.
+        prev_doc (docID terakhir block sebelumnya) tidak dibutuhkan di sini
+        karena yang disimpan adalah docID asli.
+        """
+        return StandardPostings.decode(encoded_block)
+
+    @staticmethod
+    def decode_tf_block(encoded_block):
+        """Decode satu block TF list hasil slicing dengan tf_block_offsets"""
+        return StandardPostings.decode_tf(encoded_block)
+
+    @staticmethod
+    def last_doc(encoded_postings_list):
+        """docID terakhir dari postings list yang sudah di-encode"""
+        return int(StandardPostings.decode_array(encoded_postings_list)[-1])
+
+    @staticmethod
+    def rebase(encoded_postings_list, prev_doc):
+        """
+        Mengembalikan encoded_postings_list yang siap disambung (concatenate)
+        setelah postings list lain yang docID terakhirnya prev_doc. Karena
+        yang disimpan adalah docID asli, tidak ada yang perlu diubah.
+        TF list selalu bisa disambung apa adanya.
+        """
+        return bytes(encoded_postings_list)
+
 
 class VBEPostings:
     """ 
@@ -107,8 +164,17 @@ class VBEPostings:
 
     ASUMSI: postings_list untuk sebuah term MUAT di memori!
 
+    Encoding dan decoding dilakukan per list secara vectorized dengan NumPy
+    (vb_encode_array dan vb_decode_array), byte-for-byte sama dengan
+    vb_encode_number per angka. decode_array dan decode_tf_array
+    mengembalikan np.ndarray; decode dan decode_tf tetap mengembalikan list.
+    List yang pendek (kurang dari BATCH_MIN angka/byte) tetap diproses per
+    byte, karena overhead pemanggilan NumPy lebih mahal untuk list pendek.
+
     """
 
+    BATCH_MIN = 128
+
     @staticmethod
     def vb_encode_number(number):
         """
@@ -132,11 +198,31 @@ class VBEPostings:
         Melakukan encoding (tentunya dengan compression) terhadap
         list of numbers, dengan Variable-Byte Encoding
         """
+        if len(list_of_numbers) >= VBEPostings.BATCH_MIN:
+            return VBEPostings.vb_encode_array(list_of_numbers)
         res = bytearray()
         for i in list_of_numbers:
             res += VBEPostings.vb_encode_number(i)
         return res
 
+    @staticmethod
+    def vb_encode_array(numbers):
+        """
+        Variable-Byte Encoding untuk seluruh list sekaligus dengan NumPy.
+        Byte ke-j dari belakang setiap angka adalah (n >> 7j) & 127, dan
+        byte terakhir setiap angka diberi continuation bit 128, sama dengan
+        vb_encode_number.
+        """
+        numbers = np.asarray(numbers, dtype=np.uint64)
+        lengths = VBEPostings.vb_lengths(numbers)
+        ends = np.cumsum(lengths)
+        res = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+        for j in range(int(lengths.max()) if len(lengths) else 0):
+            has_byte = lengths > j
+            res[ends[has_byte] - 1 - j] = (numbers[has_byte] >> np.uint64(7 * j)) & np.uint64(127)
+        res[ends - 1] |= 128
+        return res.tobytes()
+
     @staticmethod
     def encode(postings_list):
         """
@@ -155,7 +241,9 @@ class VBEPostings:
             bytearray yang merepresentasikan urutan integer di postings_list
         """
         # Mengubah ke list of gaps
-        postings_list_gaps = postings_list.copy()
+        if len(postings_list) >= VBEPostings.BATCH_MIN:
+            return VBEPostings.vb_encode_array(np.diff(np.asarray(postings_list, dtype=np.int64), prepend=0))
+        postings_list_gaps = list(postings_list)
         for i in range(1, len(postings_list_gaps)):
             postings_list_gaps[-i] -= postings_list_gaps[-i-1]
         
@@ -185,6 +273,8 @@ class VBEPostings:
         Decoding sebuah bytestream yang sebelumnya di-encode dengan
         variable-byte encoding.
         """
+        if len(encoded_bytestream) >= VBEPostings.BATCH_MIN:
+            return VBEPostings.vb_decode_array(encoded_bytestream).tolist()
         numbers = []
         n = 0
         for byte in encoded_bytestream:
@@ -196,6 +286,31 @@ class VBEPostings:
                 n = 0
         return numbers
 
+    @staticmethod
+    def vb_decode_array(encoded_bytestream):
+        """
+        Decoding Variable-Byte Encoding secara vectorized dengan NumPy.
+        Akhir setiap angka ditemukan dari continuation bit (byte >= 128),
+        lalu byte ke-j dari belakang setiap angka digeser 7j bit dan
+        dijumlahkan. Byte sisa tanpa continuation bit di akhir diabaikan,
+        sama seperti decoding byte-per-byte.
+
+        Returns
+        -------
+        np.ndarray (int64)
+        """
+        data = np.frombuffer(encoded_bytestream, dtype=np.uint8)
+        ends = np.flatnonzero(data >= 128)
+        numbers = (data[ends] & 127).astype(np.int64)
+        starts = np.empty_like(ends)
+        starts[:1] = 0
+        starts[1:] = ends[:-1] + 1
+        lengths = ends - starts + 1
+        for j in range(1, int(lengths.max()) if len(lengths) else 0):
+            has_byte = lengths > j
+            numbers[has_byte] |= data[ends[has_byte] - j].astype(np.int64) << (7 * j)
+        return numbers
+
     @staticmethod
     def decode(encoded_postings_list):
         """
@@ -214,12 +329,19 @@ class VBEPostings:
         List[int]
             list of docIDs yang merupakan hasil decoding dari encoded_postings_list
         """
+        if len(encoded_postings_list) >= VBEPostings.BATCH_MIN:
+            return VBEPostings.decode_array(encoded_postings_list).tolist()
         res = VBEPostings.vb_decode(encoded_postings_list)
         for i in range(1, len(res)):
             res[i] += res[i-1]
             
         return res
 
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Seperti decode, tetapi mengembalikan np.ndarray (int64) of docIDs"""
+        return np.cumsum(VBEPostings.vb_decode_array(encoded_postings_list))
+
     @staticmethod
     def decode_tf(encoded_tf_list):
         """
@@ -238,12 +360,796 @@ class VBEPostings:
         """
         return VBEPostings.vb_decode(encoded_tf_list)
 
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Seperti decode_tf, tetapi mengembalikan np.ndarray (int64)"""
+        return VBEPostings.vb_decode_array(encoded_tf_list)
+
+    @staticmethod
+    def vb_lengths(numbers):
+        """Banyaknya byte hasil Variable-Byte Encoding untuk setiap number"""
+        numbers = np.asarray(numbers, dtype=np.uint64)
+        lengths = np.ones(len(numbers), dtype=np.int64)
+        for shift in range(7, 64, 7):
+            lengths += numbers >= (1 << shift)
+        return lengths
+
+    @staticmethod
+    def block_offsets(postings_list, block_size):
+        """
+        Posisi byte awal setiap block (block_size postings) di dalam hasil
+        encode(postings_list), ditambah panjang total di akhir. Dipakai untuk
+        menyimpan metadata Block-Max, agar satu block bisa di-decode sendiri.
+        """
+        gaps = np.diff(np.asarray(postings_list, dtype=np.int64), prepend=0)
+        return VBEPostings._offsets(VBEPostings.vb_lengths(gaps), block_size)
+
+    @staticmethod
+    def tf_block_offsets(tf_list, block_size):
+        """Seperti block_offsets, untuk hasil encode_tf(tf_list)"""
+        return VBEPostings._offsets(VBEPostings.vb_lengths(tf_list), block_size)
+
+    @staticmethod
+    def _offsets(lengths, block_size):
+        ends = np.concatenate(([0], np.cumsum(lengths)))
+        return np.append(ends[0:len(lengths):block_size], ends[-1])
+
+    @staticmethod
+    def decode_block(encoded_block, prev_doc):
+        """
+        Decode satu block postings hasil slicing dengan block_offsets. Gap
+        pertama di block dihitung relatif terhadap prev_doc, yaitu docID
+        terakhir dari block sebelumnya (0 untuk block pertama).
+        """
+        res = VBEPostings.vb_decode(encoded_block)
+        res[0] += prev_doc
+        for i in range(1, len(res)):
+            res[i] += res[i-1]
+        return res
+
+    @staticmethod
+    def decode_tf_block(encoded_block):
+        """Decode satu block TF list hasil slicing dengan tf_block_offsets"""
+        return VBEPostings.vb_decode(encoded_block)
+
+    @staticmethod
+    def last_doc(encoded_postings_list):
+        """docID terakhir (jumlah semua gap) dari postings list yang sudah di-encode"""
+        return int(VBEPostings.vb_decode_array(encoded_postings_list).sum())
+
+    @staticmethod
+    def rebase(encoded_postings_list, prev_doc):
+        """
+        Mengembalikan encoded_postings_list yang siap disambung (concatenate)
+        setelah postings list lain yang docID terakhirnya prev_doc: hanya
+        angka pertama (docID pertama, yang disimpan apa adanya) yang diganti
+        dengan gap terhadap prev_doc, sisa bytes tidak disentuh. TF list
+        selalu bisa disambung apa adanya.
+        """
+        encoded = bytes(encoded_postings_list)
+        # byte terakhir setiap angka VBE mempunyai continuation bit 128
+        end = next(i for i, byte in enumerate(encoded) if byte >= 128) + 1
+        first_doc = VBEPostings.vb_decode(encoded[:end])[0]
+        return bytes(VBEPostings.vb_encode_number(first_doc - prev_doc)) + encoded[end:]
+
+    @staticmethod
+    def encode_positions(positions_list):
+        """
+        Encode posisi kemunculan term di setiap dokumen pada postings list.
+        Posisi di setiap dokumen disimpan sebagai gap (posisi pertama relatif
+        terhadap 0) lalu di-encode dengan VBE, dan hasilnya disambung untuk
+        semua dokumen. Banyaknya posisi per dokumen sama dengan TF-nya,
+        sehingga batas antar dokumen tidak perlu disimpan.
+
+        Parameters
+        ----------
+        positions_list: List[List[int]]
+            Untuk setiap posting, list posisi (terurut) term di dokumen tersebut
+
+        Returns
+        -------
+        bytes
+        """
+        gaps = []
+        for positions in positions_list:
+            prev = 0
+            for position in positions:
+                gaps.append(position - prev)
+                prev = position
+        return VBEPostings.vb_encode(gaps)
+
+    @staticmethod
+    def positions_offsets(encoded_positions, tf_list):
+        """
+        Posisi byte awal posisi-posisi setiap dokumen di hasil
+        encode_positions, ditambah panjang total di akhir. Dihitung dari
+        byte penutup setiap angka VBE (byte >= 128) tanpa decoding.
+        """
+        ends = np.flatnonzero(np.frombuffer(encoded_positions, dtype=np.uint8) >= 128) + 1
+        return np.concatenate(([0], ends[np.cumsum(tf_list, dtype=np.int64) - 1]))
+
+    @staticmethod
+    def decode_positions(encoded_positions):
+        """Decode posisi-posisi SATU dokumen (hasil slicing dengan positions_offsets)"""
+        res = VBEPostings.vb_decode(encoded_positions)
+        for i in range(1, len(res)):
+            res[i] += res[i-1]
+        return res
+
+
+def _bit_widths(numbers):
+    """Banyaknya bit yang dibutuhkan setiap number (0 untuk number 0)"""
+    numbers = np.asarray(numbers, dtype=np.uint64)
+    # eksponen dari np.frexp adalah banyaknya bit, tetapi konversi ke float64
+    # hanya tepat untuk angka < 2^53: 32 bit atas dan bawah dihitung terpisah
+    high = np.frexp((numbers >> np.uint64(32)).astype(np.float64))[1]
+    low = np.frexp((numbers & np.uint64(0xFFFFFFFF)).astype(np.float64))[1]
+    return np.where(high > 0, high + 32, low).astype(np.int64)
+
+
+def _gaps(postings_list):
+    """Gap-based list dari postings_list (posting pertama relatif terhadap 0)"""
+    return np.diff(np.asarray(postings_list, dtype=np.int64), prepend=0)
+
+
+def _chunk_offsets(chunk_sizes, block_size, chunk):
+    """
+    Posisi byte awal setiap block (block_size angka) dari ukuran setiap chunk
+    (chunk angka) hasil encoding, ditambah panjang total di akhir. Block
+    harus tersusun dari chunk utuh.
+    """
+    if block_size % chunk != 0:
+        raise ValueError(f"block_size harus kelipatan {chunk}")
+    ends = np.concatenate(([0], np.cumsum(chunk_sizes, dtype=np.int64)))
+    return np.append(ends[0:len(chunk_sizes):block_size // chunk], ends[-1])
+
+
+class PForDeltaPostings:
+    """
+    Patched Frame-of-Reference (PForDelta). Seperti VBEPostings, yang
+    di-encode adalah gap dari postings list, tetapi dengan bit-packing per
+    chunk berisi CHUNK (128) angka:
+
+        1 byte   : banyaknya angka di chunk (n)
+        1 byte   : lebar bit b
+        1 byte   : banyaknya exception (e)
+        ceil(n * b / 8) bytes : b bit terbawah setiap angka (bit-packed)
+        e bytes  : posisi exception di chunk
+        VBE      : bit sisanya (angka >> b) untuk setiap exception
+
+    b dipilih per chunk agar ukuran chunk minimal, sehingga beberapa gap
+    besar (exception) tidak membuat semua angka di chunk memakai banyak bit.
+    Packing dan unpacking dilakukan dengan NumPy. Block-Max (lihat
+    InvertedIndexWriter) membutuhkan block_size kelipatan CHUNK.
+    """
+
+    CHUNK = 128
+    # EXCEPTION_BYTES[b, w]: bytes untuk menyimpan angka dengan lebar w
+    # sebagai exception di chunk dengan lebar bit b (1 byte posisi + VBE
+    # dari angka >> b), 0 jika angka tersebut muat di b bit
+    EXCEPTION_BYTES = np.where(np.arange(65) > np.arange(65)[:, None],
+                               1 + -(-(np.arange(65) - np.arange(65)[:, None]) // 7), 0)
+    # LOW_MASKS[b]: b bit terbawah
+    LOW_MASKS = np.array([(1 << b) - 1 for b in range(65)], dtype=np.uint64)
+
+    @staticmethod
+    def plan_chunks(numbers):
+        """
+        Memilih lebar bit b setiap chunk tanpa melakukan packing: dari
+        banyaknya angka per lebar bit di setiap chunk, ukuran chunk untuk
+        semua kandidat b dihitung sekaligus (perkalian matriks dengan
+        EXCEPTION_BYTES). Kandidat b adalah lebar bit yang muncul di chunk;
+        jika ukurannya sama, dipilih b terkecil.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray, np.ndarray]
+            (lebar bit setiap angka, b setiap chunk, ukuran bytes setiap chunk)
+        """
+        chunk = PForDeltaPostings.CHUNK
+        widths = _bit_widths(numbers)
+        n_chunks = -(-len(widths) // chunk)
+        counts = np.bincount(np.arange(len(widths)) // chunk * 65 + widths,
+                             minlength=n_chunks * 65).reshape(n_chunks, 65)
+        lengths = counts.sum(axis=1)
+        sizes = -(-lengths[:, None] * np.arange(65) // 8) + counts @ PForDeltaPostings.EXCEPTION_BYTES.T
+        sizes = np.where(counts > 0, sizes, np.iinfo(np.int64).max)
+        b = np.argmin(sizes, axis=1)
+        return widths, b, 3 + sizes[np.arange(n_chunks), b]
+
+    @staticmethod
+    def chunk_sizes(numbers):
+        """Ukuran bytes setiap chunk hasil encode_numbers(numbers), tanpa encoding"""
+        return PForDeltaPostings.plan_chunks(np.asarray(numbers, dtype=np.uint64))[2]
+
+    @staticmethod
+    def encode_numbers(numbers):
+        """
+        Encode list of (non-negative) numbers, per chunk. Setelah b setiap
+        chunk dipilih (plan_chunks), posisi setiap bagian chunk di output
+        sudah diketahui, sehingga header, packed bits (sekaligus untuk semua
+        chunk dengan n dan b yang sama), posisi exception dan VBE exception
+        ditulis langsung ke buffer output dengan NumPy.
+        """
+        numbers = np.asarray(numbers, dtype=np.uint64)
+        chunk = PForDeltaPostings.CHUNK
+        widths, b, sizes = PForDeltaPostings.plan_chunks(numbers)
+        n_chunks = len(b)
+        starts = np.cumsum(sizes) - sizes
+        res = np.empty(int(sizes.sum()), dtype=np.uint8)
+        chunk_ids = np.arange(len(numbers)) // chunk
+        number_b = b[chunk_ids]
+        lengths = np.bincount(chunk_ids, minlength=n_chunks)
+        exceptions = np.flatnonzero(widths > number_b)
+        exception_chunks = chunk_ids[exceptions]
+        n_exceptions = np.bincount(exception_chunks, minlength=n_chunks)
+        res[starts] = lengths
+        res[starts + 1] = b
+        res[starts + 2] = n_exceptions
+
+        # packed bits: b bit terbawah setiap angka, dikelompokkan per (n, b)
+        low = (numbers & PForDeltaPostings.LOW_MASKS[number_b]).astype('<u8')
+        for n, width in set(zip(lengths.tolist(), b.tolist())):
+            if width == 0:
+                continue
+            group = np.flatnonzero((lengths == n) & (b == width))
+            # dibatasi per 1024 chunk agar array bit (8 byte per bit) kecil
+            for i in range(0, len(group), 1024):
+                part = group[i:i + 1024]
+                values = low[part[:, None] * chunk + np.arange(n)]
+                bits = np.unpackbits(values.view(np.uint8).reshape(len(part), n, 8), axis=2,
+                                     bitorder='little')[:, :, :width]
+                packed = np.packbits(bits.reshape(len(part), n * width), axis=1, bitorder='little')
+                res[(starts[part] + 3)[:, None] + np.arange(packed.shape[1])] = packed
+
+        # posisi exception (urutan di dalam chunk), lalu VBE dari bit sisanya
+        exception_starts = starts + 3 + -(-lengths * b // 8)
+        ranks = np.arange(len(exceptions)) - (np.cumsum(n_exceptions) - n_exceptions)[exception_chunks]
+        res[exception_starts[exception_chunks] + ranks] = exceptions % chunk
+        high = numbers[exceptions] >> number_b[exceptions].astype(np.uint64)
+        vbe = np.frombuffer(VBEPostings.vb_encode_array(high), dtype=np.uint8)
+        vbe_chunks = np.repeat(exception_chunks, VBEPostings.vb_lengths(high))
+        vbe_bytes = np.bincount(vbe_chunks, minlength=n_chunks)
+        vbe_starts = exception_starts + n_exceptions
+        res[vbe_starts[vbe_chunks] + np.arange(len(vbe)) - (np.cumsum(vbe_bytes) - vbe_bytes)[vbe_chunks]] = vbe
+        return res.tobytes()
+
+    @staticmethod
+    def decode_numbers(encoded):
+        """
+        Decode hasil encode_numbers menjadi np.ndarray (int64). Header
+        setiap chunk dibaca lebih dulu, lalu semua chunk penuh dengan lebar
+        bit yang sama di-unpack sekaligus, begitu juga semua exception.
+        """
+        data = np.frombuffer(encoded, dtype=np.uint8)
+        raw = bytes(encoded)
+        chunk = PForDeltaPostings.CHUNK
+        # chunk penuh per lebar bit b: (posisi packed bits, posisi output)
+        full = {}
+        partial = []
+        exception_ranges, exception_targets, exception_shifts = [], [], []
+        pos, total = 0, 0
+        while pos < len(raw):
+            n, b, e = raw[pos], raw[pos + 1], raw[pos + 2]
+            pos += 3
+            if n == chunk:
+                full.setdefault(b, []).append((pos, total))
+            else:
+                partial.append((pos, total, n, b))
+            pos += -(-n * b // 8)
+            if e > 0:
+                exception_targets.extend(total + i for i in raw[pos:pos + e])
+                exception_shifts.extend([b] * e)
+                pos += e
+                start = pos
+                # VBE untuk e exception: berakhir di byte penutup ke-e
+                while e > 0:
+                    if raw[pos] >= 128:
+                        e -= 1
+                    pos += 1
+                exception_ranges.append(raw[start:pos])
+            total += n
+
+        res = np.empty(total, dtype=np.int64)
+        for b, chunks in full.items():
+            starts, targets = np.array(chunks, dtype=np.int64).T
+            # chunk penuh: 128 * b bit = 16 * b byte
+            packed = data[starts[:, None] + np.arange(16 * b)]
+            bits = np.unpackbits(packed, axis=1, bitorder='little').reshape(len(chunks), chunk, b)
+            res[targets[:, None] + np.arange(chunk)] = bits.astype(np.int64) @ (np.int64(1) << np.arange(b, dtype=np.int64))
+        for start, target, n, b in partial:
+            bits = np.unpackbits(data[start:start + -(-n * b // 8)], bitorder='little')[:n * b]
+            res[target:target + n] = bits.reshape(n, b).astype(np.int64) @ (np.int64(1) << np.arange(b, dtype=np.int64))
+        if exception_targets:
+            high = VBEPostings.vb_decode_array(b''.join(exception_ranges))
+            res[exception_targets] |= high << np.array(exception_shifts, dtype=np.int64)
+        return res
+
+    @staticmethod
+    def encode(postings_list):
+        """Encode postings_list (sebagai gap) menjadi stream of bytes"""
+        return PForDeltaPostings.encode_numbers(_gaps(postings_list))
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """Decode postings_list dari stream of bytes hasil encode"""
+        return PForDeltaPostings.decode_array(encoded_postings_list).tolist()
+
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Seperti decode, tetapi mengembalikan np.ndarray (int64) of docIDs"""
+        return np.cumsum(PForDeltaPostings.decode_numbers(encoded_postings_list))
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """Encode list of term frequencies menjadi stream of bytes"""
+        return PForDeltaPostings.encode_numbers(tf_list)
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """Decode list of term frequencies dari stream of bytes hasil encode_tf"""
+        return PForDeltaPostings.decode_numbers(encoded_tf_list).tolist()
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Seperti decode_tf, tetapi mengembalikan np.ndarray (int64)"""
+        return PForDeltaPostings.decode_numbers(encoded_tf_list)
+
+    @staticmethod
+    def block_offsets(postings_list, block_size):
+        """
+        Posisi byte awal setiap block (block_size postings) di dalam hasil
+        encode(postings_list), ditambah panjang total di akhir.
+        """
+        return _chunk_offsets(PForDeltaPostings.chunk_sizes(_gaps(postings_list)),
+                              block_size, PForDeltaPostings.CHUNK)
+
+    @staticmethod
+    def tf_block_offsets(tf_list, block_size):
+        """Seperti block_offsets, untuk hasil encode_tf(tf_list)"""
+        return _chunk_offsets(PForDeltaPostings.chunk_sizes(np.asarray(tf_list, dtype=np.uint64)),
+                              block_size, PForDeltaPostings.CHUNK)
+
+    @staticmethod
+    def decode_block(encoded_block, prev_doc):
+        """
+        Decode satu block postings hasil slicing dengan block_offsets. Gap
+        pertama di block dihitung relatif terhadap prev_doc.
+        """
+        return (np.cumsum(PForDeltaPostings.decode_numbers(encoded_block)) + prev_doc).tolist()
+
+    @staticmethod
+    def decode_tf_block(encoded_block):
+        """Decode satu block TF list hasil slicing dengan tf_block_offsets"""
+        return PForDeltaPostings.decode_tf(encoded_block)
+
+
+class Simple8bPostings:
+    """
+    Simple-8b: gap dari postings list di-pack ke word 64-bit. 4 bit teratas
+    setiap word adalah selector yang menentukan berapa angka (n) dengan
+    lebar berapa bit (b) yang di-pack di 60 bit sisanya (lihat SELECTORS).
+    Selector 0 dan 1 menyimpan 128 (satu chunk penuh) dan 120 angka 1 tanpa
+    bit data (gap 1 dan TF 1 sangat sering muncul).
+
+    Angka di-pack per chunk berisi CHUNK (128) angka, dan word terakhir di
+    sebuah chunk hanya memakai selector dengan n <= sisa angka di chunk,
+    sehingga setiap word selalu penuh (tidak perlu menyimpan banyaknya
+    angka) dan setiap block Block-Max (kelipatan CHUNK) dimulai di awal
+    word. Decoding dilakukan untuk semua word sekaligus dengan NumPy.
+    Angka harus < 2^60.
+    """
+
+    CHUNK = 128
+    # selector -> (banyaknya angka, lebar bit)
+    SELECTORS = [(128, 0), (120, 0), (60, 1), (30, 2), (20, 3), (15, 4), (12, 5), (10, 6),
+                 (8, 7), (7, 8), (6, 10), (5, 12), (4, 15), (3, 20), (2, 30), (1, 60)]
+
+    @staticmethod
+    def chunk_words(numbers):
+        """
+        Memilih selector (greedy, angka terbanyak dulu) untuk numbers.
+        Word-word ditelusuri untuk semua chunk secara paralel: setiap langkah
+        memilih selector word berikutnya di setiap chunk, untuk semua
+        selector sekaligus, dengan prefix count (per chunk) angka yang tidak
+        muat di lebar bit setiap selector.
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            (selector, start) setiap word, terurut berdasarkan start
+        """
+        numbers = np.asarray(numbers, dtype=np.uint64)
+        total = len(numbers)
+        if total > 0 and int(numbers.max()) >= (1 << 60):
+            raise ValueError("Simple8bPostings hanya bisa menyimpan angka < 2^60")
+        chunk = Simple8bPostings.CHUNK
+        counts = np.array([n for n, _ in Simple8bPostings.SELECTORS])
+        bits = np.array([b for _, b in Simple8bPostings.SELECTORS])
+        n_chunks = -(-total // chunk)
+        # misses[s, c, i]: banyaknya angka di chunk c sebelum posisi i yang
+        # tidak muat di lebar bit selector s (untuk b = 0: angka yang bukan 1)
+        fits = np.zeros((len(bits), n_chunks * chunk), dtype=bool)
+        fits[:, :total] = _bit_widths(numbers) <= bits[:, None]
+        fits[bits == 0, :total] = numbers == 1
+        misses = np.zeros((len(bits), n_chunks, chunk + 1), dtype=np.uint8)
+        np.cumsum(~fits.reshape(len(bits), n_chunks, chunk), axis=2, dtype=np.uint8, out=misses[:, :, 1:])
+
+        rows = np.arange(len(bits))[:, None]
+        lanes = np.arange(n_chunks)
+        lengths = np.minimum(chunk, total - lanes * chunk)
+        offsets = np.zeros(n_chunks, dtype=np.int64)
+        word_selectors, word_starts = [], []
+        while len(lanes):
+            # n angka mulai dari offset muat jika masih ada di chunk dan tidak
+            # ada miss di [offset, offset + n); selector terakhir (1 angka 60
+            # bit) selalu muat, dan dipilih selector pertama yang muat
+            ends = np.minimum(offsets + counts[:, None], chunk)
+            fit = (lengths - offsets >= counts[:, None]) & \
+                (misses[rows, lanes, ends] == misses[rows, lanes, offsets])
+            fit[-1] = True
+            selectors = np.argmax(fit, axis=0)
+            word_selectors.append(selectors)
+            word_starts.append(lanes * chunk + offsets)
+            offsets = offsets + counts[selectors]
+            # word tidak pernah melewati akhir chunk
+            active = offsets < lengths
+            lanes, lengths, offsets = lanes[active], lengths[active], offsets[active]
+        if not word_starts:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        starts = np.concatenate(word_starts)
+        order = np.argsort(starts, kind='stable')
+        return np.concatenate(word_selectors)[order], starts[order]
+
+    @staticmethod
+    def encode_numbers(numbers):
+        """
+        Encode list of (non-negative) numbers menjadi stream of 64-bit words.
+        Selector setiap word dipilih dengan chunk_words, lalu packing
+        dilakukan dengan NumPy untuk semua word dengan selector yang sama
+        sekaligus, kebalikan dari decode_numbers.
+        """
+        numbers = np.asarray(numbers, dtype=np.uint64)
+        selectors, starts = Simple8bPostings.chunk_words(numbers)
+        if len(selectors) == 0:
+            return b''
+        res = selectors.astype('<u8') << np.uint64(60)
+        for selector in np.unique(selectors).tolist():
+            n, b = Simple8bPostings.SELECTORS[selector]
+            if b == 0:
+                continue
+            mask = selectors == selector
+            shifts = (b * np.arange(n)).astype(np.uint64)
+            values = numbers[starts[mask][:, None] + np.arange(n)] << shifts
+            res[mask] |= np.bitwise_or.reduce(values, axis=1)
+        return res.tobytes()
+
+    @staticmethod
+    def chunk_sizes(numbers):
+        """Ukuran bytes setiap chunk hasil encode_numbers(numbers), tanpa packing"""
+        chunk = Simple8bPostings.CHUNK
+        _, starts = Simple8bPostings.chunk_words(numbers)
+        return np.bincount(starts // chunk, minlength=-(-len(numbers) // chunk)) * 8
+
+    @staticmethod
+    def decode_numbers(encoded):
+        """Decode hasil encode_numbers menjadi np.ndarray (int64), semua word sekaligus"""
+        words = np.frombuffer(encoded, dtype='<u8')
+        selectors = (words >> np.uint64(60)).astype(np.int64)
+        counts = np.array([n for n, _ in Simple8bPostings.SELECTORS])[selectors]
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1])).astype(np.int64)
+        res = np.empty(int(counts.sum()), dtype=np.int64)
+        for selector in np.unique(selectors).tolist():
+            n, b = Simple8bPostings.SELECTORS[selector]
+            mask = selectors == selector
+            targets = starts[mask][:, None] + np.arange(n)
+            if b == 0:
+                res[targets] = 1
+            else:
+                shifts = (b * np.arange(n)).astype(np.uint64)
+                res[targets] = ((words[mask][:, None] >> shifts) & np.uint64((1 << b) - 1)).astype(np.int64)
+        return res
+
+    @staticmethod
+    def encode(postings_list):
+        """Encode postings_list (sebagai gap) menjadi stream of bytes"""
+        return Simple8bPostings.encode_numbers(_gaps(postings_list))
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """Decode postings_list dari stream of bytes hasil encode"""
+        return Simple8bPostings.decode_array(encoded_postings_list).tolist()
+
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Seperti decode, tetapi mengembalikan np.ndarray (int64) of docIDs"""
+        return np.cumsum(Simple8bPostings.decode_numbers(encoded_postings_list))
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """Encode list of term frequencies menjadi stream of bytes"""
+        return Simple8bPostings.encode_numbers(tf_list)
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """Decode list of term frequencies dari stream of bytes hasil encode_tf"""
+        return Simple8bPostings.decode_numbers(encoded_tf_list).tolist()
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Seperti decode_tf, tetapi mengembalikan np.ndarray (int64)"""
+        return Simple8bPostings.decode_numbers(encoded_tf_list)
+
+    @staticmethod
+    def block_offsets(postings_list, block_size):
+        """
+        Posisi byte awal setiap block (block_size postings) di dalam hasil
+        encode(postings_list), ditambah panjang total di akhir.
+        """
+        return _chunk_offsets(Simple8bPostings.chunk_sizes(_gaps(postings_list)),
+                              block_size, Simple8bPostings.CHUNK)
+
+    @staticmethod
+    def tf_block_offsets(tf_list, block_size):
+        """Seperti block_offsets, untuk hasil encode_tf(tf_list)"""
+        return _chunk_offsets(Simple8bPostings.chunk_sizes(tf_list),
+                              block_size, Simple8bPostings.CHUNK)
+
+    @staticmethod
+    def decode_block(encoded_block, prev_doc):
+        """
+        Decode satu block postings hasil slicing dengan block_offsets. Gap
+        pertama di block dihitung relatif terhadap prev_doc.
+        """
+        return (np.cumsum(Simple8bPostings.decode_numbers(encoded_block)) + prev_doc).tolist()
+
+    @staticmethod
+    def decode_tf_block(encoded_block):
+        """Decode satu block TF list hasil slicing dengan tf_block_offsets"""
+        return Simple8bPostings.decode_tf(encoded_block)
+
+
+class EliasFanoSequence:
+    """
+    Akses acak ke sequence tidak-menurun hasil EliasFanoPostings.encode_values
+    TANPA decoding dari awal.
+
+    Setiap angka x dipecah menjadi l bit bawah (disimpan di lower, bit-packed)
+    dan x >> l bit atas, yang disimpan di bit vector upper sebagai bit 1 pada
+    posisi (x >> l) + i. Posisi bit 1 ke-(SAMPLE * k) disimpan sebagai sample,
+    sehingga angka pertama setiap chunk (SAMPLE angka) bisa dihitung
+    langsung, dan satu chunk bisa di-decode tanpa menyentuh chunk lain.
+    """
+
+    SAMPLE = 128
+    HEADER = 5  # n (4 byte) + l (1 byte)
+
+    def __init__(self, encoded):
+        raw = bytes(encoded)
+        self.n = int.from_bytes(raw[0:4], 'little')
+        self.l = raw[4]
+        n_samples = -(-self.n // self.SAMPLE)
+        pos = self.HEADER
+        self.samples = np.frombuffer(raw, dtype='<u4', count=n_samples, offset=pos).tolist()
+        pos += 4 * n_samples
+        lower_len = -(-self.n * self.l // 8)
+        self.lower = raw[pos:pos + lower_len]
+        self.upper = raw[pos + lower_len:]
+        self.mask = (1 << self.l) - 1
+
+    def __len__(self):
+        return self.n
+
+    @property
+    def n_chunks(self):
+        return len(self.samples)
+
+    def low(self, i):
+        """l bit bawah dari angka ke-i"""
+        start = i * self.l
+        return (int.from_bytes(self.lower[start >> 3:((start + self.l) >> 3) + 1], 'little')
+                >> (start & 7)) & self.mask
+
+    def chunk_first(self, k):
+        """Angka pertama di chunk ke-k (angka ke-SAMPLE * k), O(1)"""
+        i = k * self.SAMPLE
+        return ((self.samples[k] - i) << self.l) | self.low(i)
+
+    def find_chunk(self, target, lo=0):
+        """
+        Chunk terakhir k >= lo dengan chunk_first(k) <= target (atau lo jika
+        tidak ada), dengan galloping lalu binary search di atas chunk_first.
+        """
+        step, hi = 1, lo + 1
+        while hi < self.n_chunks and self.chunk_first(hi) <= target:
+            lo = hi
+            hi += step
+            step *= 2
+        hi = min(hi, self.n_chunks)
+        # invariant: chunk_first(lo) <= target (atau lo awal), chunk_first(hi) > target
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if self.chunk_first(mid) <= target:
+                lo = mid
+            else:
+                hi = mid
+        return lo
+
+    def decode_chunk(self, k):
+        """Decode angka-angka di chunk ke-k sebagai list"""
+        start = k * self.SAMPLE
+        count = min(self.SAMPLE, self.n - start)
+        # bit 1 chunk ini berada di antara sample ke-k dan sample ke-(k+1)
+        first_bit = self.samples[k]
+        last_bit = self.samples[k + 1] if k + 1 < self.n_chunks else len(self.upper) * 8
+        window = np.frombuffer(self.upper, dtype=np.uint8)[first_bit >> 3:(last_bit >> 3) + 1]
+        ones = np.flatnonzero(np.unpackbits(window, bitorder='little'))
+        ones = ones[ones >= (first_bit & 7)][:count] + (first_bit & ~7)
+        high = ones - np.arange(start, start + count)
+        if self.l == 0:
+            return high.tolist()
+        lower = np.frombuffer(self.lower, dtype=np.uint8)
+        bit_start = start * self.l
+        bits = np.unpackbits(lower[bit_start >> 3:((bit_start + count * self.l) >> 3) + 1], bitorder='little')
+        bits = bits[bit_start & 7:(bit_start & 7) + count * self.l].reshape(count, self.l)
+        low = bits.astype(np.int64) @ (np.int64(1) << np.arange(self.l, dtype=np.int64))
+        return ((high << self.l) | low).tolist()
+
+    def select(self, i):
+        """Angka ke-i (decode satu chunk saja)"""
+        return self.decode_chunk(i // self.SAMPLE)[i % self.SAMPLE]
+
+    def decode_all(self):
+        """Decode seluruh sequence sebagai np.ndarray (int64)"""
+        if self.n == 0:
+            return np.zeros(0, dtype=np.int64)
+        ones = np.flatnonzero(np.unpackbits(np.frombuffer(self.upper, dtype=np.uint8), bitorder='little'))[:self.n]
+        high = ones - np.arange(self.n)
+        if self.l == 0:
+            return high
+        bits = np.unpackbits(np.frombuffer(self.lower, dtype=np.uint8), bitorder='little')[:self.n * self.l]
+        low = bits.reshape(self.n, self.l).astype(np.int64) @ (np.int64(1) << np.arange(self.l, dtype=np.int64))
+        return (high << self.l) | low
+
+
+class EliasFanoPostings:
+    """
+    Elias-Fano untuk postings list (docIDs yang terurut naik), dengan sample
+    setiap 128 angka (lihat EliasFanoSequence). TF list disimpan sebagai
+    prefix sum-nya (yang juga terurut naik karena TF >= 1) dengan Elias-Fano,
+    sehingga TF posting ke-i juga bisa diakses acak: S(i) - S(i - 1).
+
+    Format: n (4 byte), l (1 byte), sample (4 byte per 128 angka), lower
+    bits, lalu upper bits.
+
+    Berbeda dengan codec lain, block postings TIDAK bisa di-decode dari
+    potongan bytes (decode_block), karena bit atas seluruh list berada di
+    satu bit vector. Sebagai gantinya InvertedIndexReader.get_cursor
+    memberikan EliasFanoCursor (RANDOM_ACCESS) yang melakukan select dan
+    next_geq langsung di representasi ter-encode.
+    """
+
+    RANDOM_ACCESS = True
+
+    @staticmethod
+    def encode_values(values):
+        """Encode sequence tidak-menurun (non-negative) dengan Elias-Fano"""
+        values = np.asarray(values, dtype=np.int64)
+        n = len(values)
+        if n == 0:
+            return bytes([0, 0, 0, 0, 0])
+        universe = int(values[-1]) + 1
+        l = max(0, (universe // n).bit_length() - 1)
+        positions = (values >> l) + np.arange(n)
+        upper = np.zeros(int(positions[-1]) + 1, dtype=np.uint8)
+        upper[positions] = 1
+        lower = ((values[:, None] >> np.arange(l)) & 1).astype(np.uint8)
+        return (n.to_bytes(4, 'little') + bytes([l]) +
+                positions[::EliasFanoSequence.SAMPLE].astype('<u4').tobytes() +
+                np.packbits(lower.ravel(), bitorder='little').tobytes() +
+                np.packbits(upper, bitorder='little').tobytes())
+
+    @staticmethod
+    def encode(postings_list):
+        """Encode postings_list (docIDs terurut naik) menjadi stream of bytes"""
+        return EliasFanoPostings.encode_values(postings_list)
+
+    @staticmethod
+    def decode(encoded_postings_list):
+        """Decode postings_list dari stream of bytes hasil encode"""
+        return EliasFanoPostings.decode_array(encoded_postings_list).tolist()
+
+    @staticmethod
+    def decode_array(encoded_postings_list):
+        """Seperti decode, tetapi mengembalikan np.ndarray (int64) of docIDs"""
+        return EliasFanoSequence(encoded_postings_list).decode_all()
+
+    @staticmethod
+    def encode_tf(tf_list):
+        """Encode prefix sum dari list of term frequencies"""
+        return EliasFanoPostings.encode_values(np.cumsum(np.asarray(tf_list, dtype=np.int64)))
+
+    @staticmethod
+    def decode_tf(encoded_tf_list):
+        """Decode list of term frequencies dari stream of bytes hasil encode_tf"""
+        return EliasFanoPostings.decode_tf_array(encoded_tf_list).tolist()
+
+    @staticmethod
+    def decode_tf_array(encoded_tf_list):
+        """Seperti decode_tf, tetapi mengembalikan np.ndarray (int64)"""
+        return np.diff(EliasFanoSequence(encoded_tf_list).decode_all(), prepend=0)
+
+    @staticmethod
+    def block_offsets(postings_list, block_size):
+        """
+        Block Elias-Fano tidak byte-addressable; offset selalu 0 kecuali
+        panjang total di akhir. Cursor memakai select/next_geq sebagai gantinya.
+        """
+        n_blocks = -(-len(postings_list) // block_size)
+        return np.append(np.zeros(n_blocks, dtype=np.int64), len(EliasFanoPostings.encode(postings_list)))
+
+    @staticmethod
+    def tf_block_offsets(tf_list, block_size):
+        """Seperti block_offsets, untuk hasil encode_tf(tf_list)"""
+        n_blocks = -(-len(tf_list) // block_size)
+        return np.append(np.zeros(n_blocks, dtype=np.int64), len(EliasFanoPostings.encode_tf(tf_list)))
+
+
+class AdaptivePostings:
+    """
+    Bukan codec, melainkan penanda untuk InvertedIndexWriter agar memilih
+    codec per postings list: untuk setiap term, postings list dan TF list
+    di-encode dengan setiap codec di CANDIDATES dan yang hasilnya paling
+    kecil yang disimpan (jika sama besar, yang decoding-nya lebih cepat,
+    yaitu yang lebih awal di CANDIDATES). Codec terpilih dicatat di Lexicon
+    (kolom codec, lihat CODECS), dan InvertedIndexReader men-decode setiap
+    term dengan codec-nya masing-masing.
+
+    Postings list pendek (kurang dari MIN_LENGTH) langsung memakai
+    VBEPostings: untuk list sependek itu VBE hampir selalu yang terkecil,
+    dan mencoba semua codec hanya memperlambat indexing.
+    """
+
+    ADAPTIVE = True
+    CANDIDATES = None  # diisi setelah definisi CODECS, lihat di bawah
+    MIN_LENGTH = 32
+
+    @staticmethod
+    def choose(postings_list, tf_list):
+        """
+        Mengembalikan (codec, encoded_postings, encoded_tf) dengan ukuran
+        encoded_postings + encoded_tf terkecil.
+        """
+        if len(postings_list) < AdaptivePostings.MIN_LENGTH:
+            return VBEPostings, VBEPostings.encode(postings_list), VBEPostings.encode_tf(tf_list)
+        best = None
+        for codec in AdaptivePostings.CANDIDATES:
+            encoded_postings = codec.encode(postings_list)
+            encoded_tf = codec.encode_tf(tf_list)
+            size = len(encoded_postings) + len(encoded_tf)
+            if best is None or size < best[0]:
+                best = (size, codec, encoded_postings, encoded_tf)
+        return best[1:]
+
+
+# Codec yang bisa dicatat di Lexicon; id codec adalah posisinya di tuple ini,
+# sehingga urutannya TIDAK boleh diubah (hanya boleh ditambah di akhir)
+CODECS = (StandardPostings, VBEPostings, PForDeltaPostings, Simple8bPostings, EliasFanoPostings)
+
+# urutan dari yang decoding-nya paling cepat
+AdaptivePostings.CANDIDATES = (VBEPostings, Simple8bPostings, PForDeltaPostings, EliasFanoPostings)
+
+
+def codec_id(codec):
+    """Id dari codec di CODECS (yang dicatat di Lexicon)"""
+    return CODECS.index(codec)
+
 
 if __name__ == '__main__':
 
     postings_list = [34, 67, 89, 454, 2345738]
     tf_list = [12, 10, 3, 4, 1]
-    for Postings in [StandardPostings, VBEPostings]:
+    for Postings in [StandardPostings, VBEPostings, PForDeltaPostings, Simple8bPostings, EliasFanoPostings]:
         print(Postings.__name__)
         encoded_postings_list = Postings.encode(postings_list)
         encoded_tf_list = Postings.encode_tf(tf_list)
@@ -259,4 +1165,30 @@ if __name__ == '__main__':
         print("hasil decoding (TF list) : ", decoded_tf_list)
         assert decoded_posting_list == postings_list, "hasil decoding tidak sama dengan postings original"
         assert decoded_tf_list == tf_list, "hasil decoding tidak sama dengan postings original"
+        assert Postings.decode_array(encoded_postings_list).tolist() == postings_list, "hasil decoding array salah"
+        assert Postings.decode_tf_array(encoded_tf_list).tolist() == tf_list, "hasil decoding array salah"
         print()
+
+    postings_list = list(range(0, 3000, 3))
+    tf_list = [1] * len(postings_list)
+    codec, encoded_postings, encoded_tf = AdaptivePostings.choose(postings_list, tf_list)
+    print("codec terpilih untuk postings list panjang:", codec.__name__)
+    assert codec.decode(encoded_postings) == postings_list, "hasil decoding tidak sama dengan postings original"
+    assert codec.decode_tf(encoded_tf) == tf_list, "hasil decoding tidak sama dengan postings original"
+
+    # concatenation fast path merge: list kedua di-rebase terhadap docID
+    # terakhir list pertama lalu bytes-nya disambung
+    for codec in (StandardPostings, VBEPostings):
+        first, second = codec.encode([3, 300, 1000]), codec.encode([1200, 1500])
+        assert codec.last_doc(first) == 1000, "last_doc salah"
+        spliced = bytes(first) + codec.rebase(second, codec.last_doc(first))
+        assert codec.decode(spliced) == [3, 300, 1000, 1200, 1500], "hasil rebase salah"
+
+    # ukuran chunk (untuk Block-Max) dihitung tanpa encoding, harus sama
+    # dengan hasil encode; chunk penuh berisi angka 1 cukup satu word
+    numbers = [1] * 128 + [5, 1 << 40, 0, 7] * 40
+    for codec in (PForDeltaPostings, Simple8bPostings):
+        sizes = [len(codec.encode_numbers(numbers[i:i + 128])) for i in range(0, len(numbers), 128)]
+        assert codec.chunk_sizes(numbers).tolist() == sizes, "ukuran chunk salah"
+        assert codec.decode_numbers(codec.encode_numbers(numbers)).tolist() == numbers, "hasil decoding salah"
+    assert Simple8bPostings.chunk_sizes([1] * 128).tolist() == [8], "chunk angka 1 harus satu word"
@@ -0,0 +1,180 @@
+import os
+import threading
+
+from .bsbi import BSBIIndex
+from .compression import VBEPostings
+from .letor import Letor
+
+
+class SearchEngine:
+    """
+    Search engine yang resident di memori selama satu proses (worker) hidup.
+
+    Sebelumnya setiap HTTP request membuat BSBIIndex baru (yang juga membuat
+    MPStemmer dan stopword remover Sastrawi), memuat ulang terms.dict dan
+    docs.dict, lalu search.retrieve membuat Letor baru yang memuat ulang
+    lsi.model dan ranker.joblib. Di sini semuanya dimuat SEKALI saat worker
+    boot, lalu dipakai bersama oleh semua view dan oleh search.retrieve.
+    Merged index juga dibuka sekali (read-only) dan dipakai bersama.
+
+    Setelah dimuat, jalur query hanya membaca state engine (tidak ada
+    mutasi), sehingga aman dipakai bersama oleh banyak thread.
+
+    Pemakaian engine diambil dengan acquire_engine() (with ... as engine)
+    agar engine yang diganti oleh reset_engine() baru ditutup (mmap index,
+    file descriptor, thread background merge) setelah semua request yang
+    masih memakainya selesai, seperti snapshot di SegmentedIndex.
+
+    Attributes
+    ----------
+    bsbi(BSBIIndex): Abstraksi index yang id map-nya sudah dimuat
+    letor(Letor): Reranker yang model dan ranker-nya sudah dimuat
+    users(int): Banyaknya pemakai (acquire_engine) yang belum selesai
+    retired(bool): True jika engine sudah diganti oleh reset_engine()
+    """
+
+    def __init__(self, data_dir, output_dir, postings_encoding=VBEPostings, letor=None):
+        self.bsbi = BSBIIndex(data_dir=data_dir,
+                              postings_encoding=postings_encoding,
+                              output_dir=output_dir)
+        self.bsbi.load()
+        self.bsbi.open_index()
+        self.letor = letor if letor is not None else Letor()
+        self.users = 0
+        self.retired = False
+
+    def close(self):
+        """Menutup index yang dibuka engine"""
+        self.bsbi.close_index()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        release_engine(self)
+
+    def search(self, query, k=100):
+        """
+        Retrieval dengan BM25 lalu rerank top-k hasilnya menggunakan letor.
+
+        Returns
+        -------
+        List[str]
+            Path dokumen terurut berdasarkan skor letor
+        """
+        # membuat query menjadi lower, karena docs di index dengan huruf2 kecil
+        query = query.lower()
+
+        bm25_docs = [doc for (_, doc) in self.bsbi.retrieve_bm25(query, k=k)]
+        if bm25_docs == []:
+            return []
+        # rerank hasil BM25 menggunakan letor
+        return [doc for (doc, _) in self.letor.rerank(query, bm25_docs)]
+
+    def doc_id(self, doc_path):
+        """Mengembalikan doc ID dari path dokumen, atau None jika tidak ada."""
+        return self.bsbi.doc_id_map.get(doc_path)
+
+    def doc_path(self, doc_id):
+        """Mengembalikan path dokumen dari doc ID."""
+        return self.bsbi.doc_id_map[doc_id]
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine(letor=None):
+    """
+    Mengembalikan SearchEngine milik proses ini, dan membuatnya pada
+    pemanggilan pertama. Setiap worker (proses) punya satu engine sendiri.
+
+    letor (opsional) adalah Letor yang sudah di-train/dimuat, misal hasil
+    training saat boot, agar engine tidak memuat ulang lsi.model dan
+    ranker.joblib dari disk. Hanya dipakai saat engine dibuat.
+    """
+    global _engine
+    # double-checked locking, agar request paralel pada saat boot
+    # tidak memuat index lebih dari sekali
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                this_dir = os.path.dirname(__file__)
+                _engine = SearchEngine(data_dir=os.path.join(this_dir, 'collections'),
+                                       output_dir=os.path.join(this_dir, 'index'),
+                                       letor=letor)
+    return _engine
+
+
+def acquire_engine():
+    """
+    Seperti get_engine(), tetapi engine ditandai sedang dipakai sampai
+    dilepas dengan release_engine() (atau keluar dari with), sehingga
+    reset_engine() tidak menutupnya selama request masih berjalan.
+    """
+    engine = get_engine()
+    with _engine_lock:
+        engine.users += 1
+    return engine
+
+
+def release_engine(engine):
+    with _engine_lock:
+        engine.users -= 1
+        close = engine.retired and engine.users == 0
+    if close:
+        engine.close()
+
+
+def reset_engine():
+    """
+    Membuang engine saat ini (misal setelah re-indexing); dibuat ulang saat
+    get_engine() berikutnya. Engine lama ditutup sekarang jika tidak sedang
+    dipakai, atau oleh release_engine() pemakai terakhirnya.
+    """
+    global _engine
+    with _engine_lock:
+        old, _engine = _engine, None
+        if old is None:
+            return
+        old.retired = True
+        close = old.users == 0
+    if close:
+        old.close()
+
+
+if __name__ == "__main__":
+
+    # Membandingkan latency dan alokasi memori per query antara cara lama
+    # (membangun BSBIIndex per request) dengan engine yang resident.
+    import time
+    import tracemalloc
+
+    this_dir = os.path.dirname(__file__)
+    data_dir = os.path.join(this_dir, 'collections')
+    output_dir = os.path.join(this_dir, 'index')
+    with open(os.path.join(this_dir, 'qrels-folder/test_queries.txt')) as f:
+        queries = [" ".join(line.strip().split()[1:]) for line in f]
+
+    def per_request(query):
+        bsbi = BSBIIndex(data_dir=data_dir, postings_encoding=VBEPostings, output_dir=output_dir)
+        bsbi.load()
+        res = bsbi.retrieve_bm25(query, k=100)
+        bsbi.close_index()
+        return res
+
+    engine = SearchEngine(data_dir=data_dir, output_dir=output_dir)
+
+    def resident(query):
+        return engine.bsbi.retrieve_bm25(query, k=100)
+
+    for name, fn in [("per-request", per_request), ("resident", resident)]:
+        tracemalloc.start()
+        start = time.perf_counter()
+        for query in queries:
+            fn(query)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{name:12s}: {1000 * elapsed / len(queries):8.2f} ms/query, "
+              f"peak alokasi {peak / 2**20:8.2f} MiB")
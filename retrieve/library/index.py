@@ -1,7 +1,724 @@
 import pickle
 import os
+import mmap
+import threading
+from bisect import bisect_left
+
+import numpy as np
+
+from .compression import StandardPostings, VBEPostings, EliasFanoSequence, CODECS, codec_id
+
+
+class Lexicon:
+    """
+    Representasi biner dari postings_dict yang bisa di-mmap.
+
+    Setiap entry lexicon adalah satu baris NumPy structured array dengan
+    kolom fixed-width, terurut berdasarkan term ID:
+
+        term         : termID
+        offset       : start_position_in_index_file
+        df           : number_of_postings_in_list
+        postings_len : length_in_bytes_of_postings_list
+        tf_len       : length_in_bytes_of_tf_list
+        max_tf       : TF terbesar pada postings list
+        max_impact   : nilai maksimum ((k1 + 1) * tf) / (k1 * dlnf + tf) BM25
+                       pada postings list (NaN jika tidak dihitung), dipakai
+                       sebagai upper bound skor untuk dynamic pruning
+        block_start  : posisi block pertama term ini di metadata Block-Max
+                       (file .blk), jika ada
+        positions_len: length_in_bytes_of_positions, posisi-posisi term
+                       (index posisional) yang disimpan setelah TF list;
+                       0 jika index tidak posisional
+        codec        : id codec (posisi di compression.CODECS) yang dipakai
+                       untuk postings list dan TF list term ini, sehingga
+                       setiap term bisa memakai codec yang berbeda (lihat
+                       compression.AdaptivePostings)
+        cf           : collection frequency, jumlah TF term di seluruh koleksi
+        last_doc     : docID terakhir pada postings list, agar merge bisa
+                       menyambung postings list (rebase) tanpa decoding
+
+    Array disimpan dalam format .npy, sehingga saat dibaca cukup di-mmap
+    (np.load dengan mmap_mode) tanpa membangun jutaan objek Python seperti
+    pada pickled dictionary of 4-tuple. Lookup menggunakan direct index jika
+    term ID-nya padat (0..V-1, seperti pada merged index) dan binary search
+    (np.searchsorted) jika tidak.
+
+    Lexicon berperilaku seperti dictionary read-only yang memetakan termID
+    ke 4-tuple, sehingga dapat menggantikan postings_dict di reader.
+    """
+
+    DTYPE = np.dtype([('term', '<u4'),
+                      ('offset', '<u8'),
+                      ('df', '<u4'),
+                      ('postings_len', '<u4'),
+                      ('tf_len', '<u4'),
+                      ('max_tf', '<u4'),
+                      ('max_impact', '<f8'),
+                      ('block_start', '<u8'),
+                      ('positions_len', '<u4'),
+                      ('codec', 'u1'),
+                      ('cf', '<u8'),
+                      ('last_doc', '<u4')])
+
+    def __init__(self, entries):
+        """
+        Parameters
+        ----------
+        entries: np.ndarray
+            Structured array dengan dtype Lexicon.DTYPE, terurut berdasarkan term
+        """
+        self.entries = entries
+        self.terms = entries['term']
+        self.offsets = entries['offset']
+        self.dfs = entries['df']
+        self.postings_lens = entries['postings_len']
+        self.tf_lens = entries['tf_len']
+        self.max_tfs = entries['max_tf']
+        self.max_impacts = entries['max_impact']
+        self.block_starts = entries['block_start']
+        self.positions_lens = entries['positions_len']
+        # Lexicon yang ditulis sebelum ada kolom codec: semua term memakai
+        # postings_encoding reader
+        self.codecs = entries['codec'] if 'codec' in entries.dtype.names else None
+        self.cfs = entries['cf'] if 'cf' in entries.dtype.names else None
+        self.last_docs = entries['last_doc'] if 'last_doc' in entries.dtype.names else None
+        n = len(entries)
+        self.is_dense = n == 0 or (int(self.terms[0]) == 0 and int(self.terms[-1]) == n - 1)
+
+    @classmethod
+    def from_postings_dict(cls, postings_dict, max_tf, max_impact=None, block_start=None,
+                           positions_length=None, codec=None, cf=None, last_doc=None):
+        """
+        Membangun Lexicon dari postings_dict (termID -> 4-tuple), max_tf
+        (termID -> TF terbesar), max_impact (termID -> impact BM25 terbesar,
+        opsional), block_start (termID -> posisi block pertama, opsional),
+        positions_length (termID -> panjang bytes posisi, opsional),
+        codec (termID -> id codec, opsional; default VBEPostings), cf
+        (termID -> collection frequency, opsional) dan last_doc (termID ->
+        docID terakhir, opsional).
+        """
+        max_impact = max_impact or {}
+        block_start = block_start or {}
+        positions_length = positions_length or {}
+        codec = codec or {}
+        cf = cf or {}
+        last_doc = last_doc or {}
+        default_codec = codec_id(VBEPostings)
+        return cls(np.array([(term,) + tuple(postings_dict[term]) +
+                             (max_tf[term], max_impact.get(term, np.nan), block_start.get(term, 0),
+                              positions_length.get(term, 0), codec.get(term, default_codec),
+                              cf.get(term, 0), last_doc.get(term, 0))
+                             for term in sorted(postings_dict)],
+                            dtype=cls.DTYPE))
+
+    @classmethod
+    def load(cls, path):
+        """Memuat Lexicon dari file .npy dengan mmap (read-only)."""
+        try:
+            entries = np.load(path, mmap_mode='r')
+        except ValueError:
+            # file dengan 0 entry tidak bisa di-mmap
+            entries = np.load(path)
+        return cls(entries)
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.entries))
+
+    def find(self, term):
+        """Mengembalikan posisi entry untuk term, atau -1 jika tidak ada."""
+        n = len(self.terms)
+        if self.is_dense:
+            return term if 0 <= term < n else -1
+        i = int(np.searchsorted(self.terms, term))
+        return i if i < n and self.terms[i] == term else -1
+
+    def get(self, term, default=None):
+        i = self.find(term)
+        if i < 0:
+            return default
+        return self.entry_at(i)
+
+    def get_bounds(self, term):
+        """
+        Mengembalikan (max_tf, max_impact) untuk term, atau None jika term
+        tidak ada; max_impact None jika tidak dihitung saat indexing.
+        """
+        i = self.find(term)
+        return self.bounds_at(i) if i >= 0 else None
+
+    def get_positions_length(self, term):
+        """
+        Panjang bytes posisi-posisi term (0 jika index tidak posisional),
+        atau None jika term tidak ada.
+        """
+        i = self.find(term)
+        return self.positions_length_at(i) if i >= 0 else None
+
+    def get_codec(self, term):
+        """
+        Codec (class di compression.CODECS) untuk postings list term, atau
+        None jika term tidak ada atau Lexicon tidak mencatat codec.
+        """
+        i = self.find(term)
+        return self.codec_at(i) if i >= 0 else None
+
+    # Accessor per baris (posisi hasil find), agar pemanggil yang butuh
+    # beberapa kolom dari term yang sama cukup sekali mencari term-nya
+
+    def entry_at(self, i):
+        """(offset, df, postings_len, tf_len) dari baris i"""
+        return (int(self.offsets[i]), int(self.dfs[i]),
+                int(self.postings_lens[i]), int(self.tf_lens[i]))
+
+    def bounds_at(self, i):
+        """(max_tf, max_impact) dari baris i"""
+        max_impact = float(self.max_impacts[i])
+        return int(self.max_tfs[i]), (None if np.isnan(max_impact) else max_impact)
+
+    def positions_length_at(self, i):
+        return int(self.positions_lens[i])
+
+    def codec_at(self, i):
+        if self.codecs is None:
+            return None
+        return CODECS[self.codecs[i]]
+
+    def get_term_stats(self, term):
+        """
+        Mengembalikan (df, cf, max_tf) untuk term, atau None jika term tidak
+        ada; cf None jika Lexicon tidak mencatat collection frequency.
+        """
+        i = self.find(term)
+        if i < 0:
+            return None
+        cf = int(self.cfs[i]) if self.cfs is not None else None
+        return int(self.dfs[i]), cf, int(self.max_tfs[i])
+
+    def __getitem__(self, term):
+        entry = self.get(term)
+        if entry is None:
+            raise KeyError(term)
+        return entry
+
+    def __contains__(self, term):
+        return self.find(term) >= 0
+
+    def __len__(self):
+        return len(self.terms)
+
+    def __iter__(self):
+        return (int(term) for term in self.terms)
+
+
+class CollectionStats:
+    """
+    Statistik koleksi yang dibutuhkan scoring (TF-IDF, BM25), dipelihara
+    secara inkremental saat indexing sehingga tidak perlu dihitung ulang
+    dari seluruh doc_length setiap kali index ditulis atau dibaca.
+
+    Statistik per dokumen disimpan di NumPy array doc_lengths yang di-index
+    dengan docID (0 berarti docID tidak ada di index), dan di disk disimpan
+    sebagai file .npy (sidecar .stats) yang di-mmap saat dibaca. Statistik
+    per term (df, cf, max_tf) disimpan di Lexicon.
+
+    Attributes
+    ----------
+    doc_lengths: np.ndarray
+        Panjang (banyaknya token) setiap dokumen, di-index dengan docID
+    n_docs: int
+        N, banyaknya dokumen di koleksi
+    total_tokens: int
+        Jumlah panjang semua dokumen
+    """
+
+    DTYPE = np.dtype('<u4')
+
+    def __init__(self, doc_lengths=None):
+        self.doc_lengths = (np.zeros(0, dtype=self.DTYPE) if doc_lengths is None
+                            else doc_lengths)
+        self.n_docs = int(np.count_nonzero(self.doc_lengths))
+        self.total_tokens = int(self.doc_lengths.sum(dtype=np.int64))
+        # b -> list faktor normalisasi panjang BM25 per docID (lihat length_norm)
+        self.length_norms = {}
+
+    @property
+    def avg_doc_length(self):
+        return self.total_tokens / self.n_docs if self.n_docs else 0
+
+    @classmethod
+    def from_dict(cls, doc_length):
+        """Dari dictionary docID -> panjang dokumen (format metadata lama)"""
+        doc_lengths = np.zeros(max(doc_length, default=-1) + 1, dtype=cls.DTYPE)
+        doc_lengths[list(doc_length)] = list(doc_length.values())
+        return cls(doc_lengths)
+
+    @classmethod
+    def load(cls, path):
+        """Memuat statistik dari file .npy dengan mmap (read-only)."""
+        try:
+            doc_lengths = np.load(path, mmap_mode='r')
+        except ValueError:
+            # file dengan 0 entry tidak bisa di-mmap
+            doc_lengths = np.load(path)
+        return cls(doc_lengths)
+
+    def save(self, path):
+        # docID terbesar yang ada; sisa kapasitas (lihat add_postings) dibuang
+        size = int(np.flatnonzero(self.doc_lengths)[-1]) + 1 if self.n_docs else 0
+        with open(path, 'wb') as f:
+            np.save(f, np.ascontiguousarray(self.doc_lengths[:size], dtype=self.DTYPE))
+
+    def add_postings(self, postings_list, tf_list):
+        """
+        Menambahkan kontribusi satu postings list (docID terurut dan unik)
+        ke panjang dokumen, N dan total token.
+        """
+        if not postings_list:
+            return
+        docs = np.asarray(postings_list, dtype=np.int64)
+        tfs = np.asarray(tf_list, dtype=np.int64)
+        if docs[-1] >= len(self.doc_lengths):
+            # kapasitas digandakan agar append tetap amortized O(1) per docID
+            grown = np.zeros(max(2 * len(self.doc_lengths), int(docs[-1]) + 1), dtype=self.DTYPE)
+            grown[:len(self.doc_lengths)] = self.doc_lengths
+            self.doc_lengths = grown
+        self.n_docs += int(np.count_nonzero(self.doc_lengths[docs] == 0))
+        self.doc_lengths[docs] += tfs.astype(self.DTYPE)
+        self.total_tokens += int(tfs.sum())
+        self.length_norms.clear()
+
+    def add(self, other):
+        """Menggabungkan statistik koleksi lain (misal intermediate index saat merge)"""
+        size = max(len(self.doc_lengths), len(other.doc_lengths))
+        doc_lengths = np.zeros(size, dtype=self.DTYPE)
+        doc_lengths[:len(self.doc_lengths)] = self.doc_lengths
+        doc_lengths[:len(other.doc_lengths)] += other.doc_lengths
+        self.__init__(doc_lengths)
+
+    def doc_ids(self):
+        """docID semua dokumen di koleksi, terurut"""
+        return np.flatnonzero(self.doc_lengths)
+
+    def n_deleted(self, deleted):
+        """Banyaknya dokumen koleksi ini yang sudah dihapus (ada di DeletedDocs deleted)"""
+        if not len(deleted):
+            return 0
+        return int(np.count_nonzero(deleted.mask(len(self.doc_lengths)) & (self.doc_lengths > 0)))
+
+    def without(self, deleted):
+        """Statistik koleksi tanpa dokumen-dokumen yang ada di DeletedDocs deleted"""
+        doc_lengths = np.array(self.doc_lengths, dtype=self.DTYPE)
+        doc_lengths[deleted.mask(len(doc_lengths))] = 0
+        return CollectionStats(doc_lengths)
+
+    def __contains__(self, doc):
+        return 0 <= doc < len(self.doc_lengths) and self.doc_lengths[doc] > 0
+
+    def length_norm(self, b):
+        """
+        List faktor normalisasi panjang BM25 (1 - b) + b * dl / avdl untuk
+        setiap docID. Dihitung sekali (vectorized) per nilai b lalu
+        di-cache, sehingga scoring cukup satu lookup per posting.
+        """
+        norms = self.length_norms.get(b)
+        if norms is None:
+            if self.n_docs:
+                norms = ((1 - b) + (b * self.doc_lengths / self.avg_doc_length)).tolist()
+            else:
+                norms = []
+            self.length_norms[b] = norms
+        return norms
+
+
+class DeletedDocs:
+    """
+    Tombstone bitset: bit ke-d bernilai 1 jika dokumen dengan docID d sudah
+    dihapus. Disimpan sebagai NumPy bit array (np.packbits dengan bitorder
+    'little'), satu bit per docID.
+
+    DeletedDocs tidak diubah setelah dibuat (delete mengembalikan objek
+    baru), sehingga aman dipakai bersama oleh query yang sedang berjalan.
+
+    Attributes
+    ----------
+    bits: np.ndarray
+        Bit array (uint8) hasil np.packbits
+    lookup: bytes
+        Salinan bits sebagai bytes untuk pengecekan per docID di cursor;
+        indexing bytes menghasilkan int Python langsung
+    """
+
+    def __init__(self, bits=None):
+        self.bits = np.zeros(0, dtype=np.uint8) if bits is None else np.asarray(bits, dtype=np.uint8)
+        self.lookup = self.bits.tobytes()
+        self.count = int(np.count_nonzero(np.unpackbits(self.bits)))
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, doc):
+        i = doc >> 3
+        return i < len(self.lookup) and (self.lookup[i] >> (doc & 7)) & 1 == 1
+
+    def mask(self, size):
+        """Array bool sepanjang size: True untuk docID yang sudah dihapus"""
+        mask = np.zeros(size, dtype=bool)
+        bits = np.unpackbits(self.bits, bitorder='little')[:size].astype(bool)
+        mask[:len(bits)] = bits
+        return mask
+
+    def delete(self, doc_ids):
+        """DeletedDocs baru yang juga menandai doc_ids sebagai dihapus"""
+        doc_ids = np.fromiter(doc_ids, dtype=np.int64)
+        if not len(doc_ids):
+            return self
+        mask = self.mask(max(8 * len(self.bits), int(doc_ids.max()) + 1))
+        mask[doc_ids] = True
+        return DeletedDocs(np.packbits(mask, bitorder='little'))
+
+
+def gallop_left(seq, target, lo=0):
+    """
+    Galloping (exponential) search: posisi pertama i >= lo dengan
+    seq[i] >= target, seperti bisect_left(seq, target, lo). Jarak dari lo
+    dilipatgandakan (1, 2, 4, ...) sampai melewati target, lalu binary search
+    hanya di rentang terakhir. Biayanya O(log d) dengan d jarak lompatan,
+    sehingga lompatan pendek (kasus umum saat intersection) sangat murah.
+    """
+    step = 1
+    hi = lo
+    while hi < len(seq) and seq[hi] < target:
+        lo = hi + 1
+        hi += step
+        step *= 2
+    return bisect_left(seq, target, lo, min(hi, len(seq)))
+
+
+class PositionsList:
+    """
+    Posisi-posisi sebuah term di setiap dokumen pada postings list-nya,
+    yang masih ter-encode (lihat VBEPostings.encode_positions). Posisi satu
+    dokumen baru di-decode ketika diminta (positions_list[i] untuk posting
+    ke-i), sehingga pada phrase/proximity query hanya posisi di dokumen
+    kandidat yang di-decode.
+    """
+
+    def __init__(self, encoded_positions, encoded_tf, postings_encoding):
+        self.encoded_positions = encoded_positions
+        self.encoded_tf = encoded_tf
+        self.postings_encoding = postings_encoding
+        self.offsets = None
+
+    def __getitem__(self, i):
+        if self.offsets is None:
+            # batas antar dokumen diturunkan dari TF list (sekali per term)
+            tf_list = self.postings_encoding.decode_tf_array(self.encoded_tf)
+            self.offsets = VBEPostings.positions_offsets(self.encoded_positions, tf_list).tolist()
+        return VBEPostings.decode_positions(self.encoded_positions[self.offsets[i]:self.offsets[i + 1]])
+
+    def __len__(self):
+        if self.offsets is None:
+            self[0]
+        return len(self.offsets) - 1
+
+
+class PostingsCursor:
+    """
+    Cursor di atas postings list (docIDs) dan TF list sebuah term, untuk
+    query processing document-at-a-time (DaaT).
+
+    Attributes
+    ----------
+    term: termID dari postings list
+    doc: docID pada posisi cursor saat ini, atau END jika sudah habis
+    df: banyaknya postings (document frequency)
+    max_tf: TF terbesar di postings list (None jika tidak diketahui dari index)
+    max_impact: impact BM25 terbesar yang disimpan saat indexing (atau None)
+    positions_list: PositionsList dari term, atau None jika index tidak posisional
+    """
+
+    # sentinel docID untuk cursor yang sudah habis; lebih besar dari docID manapun
+    END = float('inf')
+
+    def __init__(self, term, postings_list, tf_list):
+        self.term = term
+        self.postings_list = postings_list
+        self.tf_list = tf_list
+        self.df = len(postings_list)
+        self.pos = 0
+        self.doc = postings_list[0] if self.df > 0 else self.END
+        self.max_tf = None
+        self.max_impact = None
+        self.positions_list = None
+
+    def tf(self):
+        """TF dari term pada dokumen self.doc"""
+        return self.tf_list[self.pos]
+
+    def next(self):
+        """Maju ke posting berikutnya dan mengembalikan docID-nya (atau END)."""
+        self.pos += 1
+        self.doc = self.postings_list[self.pos] if self.pos < self.df else self.END
+        return self.doc
+
+    def next_geq(self, target):
+        """Maju ke posting pertama dengan docID >= target dan mengembalikan docID-nya (atau END)."""
+        if self.doc < target:
+            self.pos = gallop_left(self.postings_list, target, self.pos + 1)
+            self.doc = self.postings_list[self.pos] if self.pos < self.df else self.END
+        return self.doc
+
+    def positions(self):
+        """Posisi-posisi term pada dokumen self.doc (index harus posisional)"""
+        return self.positions_list[self.pos]
+
+    def postings(self):
+        """Mengembalikan seluruh (postings_list, tf_list) dari term"""
+        return self.postings_list, self.tf_list
+
+    def block_bounds(self, target):
+        """
+        Mengembalikan (last_doc, max_tf, max_impact) dari block yang mungkin
+        memuat target (block pertama dengan last_doc >= target), atau None
+        jika target melewati posting terakhir. Tanpa metadata Block-Max,
+        seluruh postings list dianggap satu block.
+        """
+        if self.df == 0 or target > self.postings_list[-1]:
+            return None
+        return self.postings_list[-1], self.max_tf, self.max_impact
+
+
+class BlockMaxCursor(PostingsCursor):
+    """
+    PostingsCursor di atas postings list yang masih ter-encode, dibagi
+    menjadi block berukuran tetap dengan metadata Block-Max (docID terakhir,
+    TF terbesar, impact BM25 terbesar, dan posisi byte setiap block).
+
+    Block hanya di-decode ketika cursor benar-benar berhenti di dalamnya,
+    dan TF list sebuah block hanya di-decode ketika tf() dipanggil, sehingga
+    next_geq dan Block-Max WAND bisa melompati block tanpa decoding.
+    docID terakhir setiap block berperan sebagai skip pointer: next_geq
+    mencari block tujuan dengan galloping di atas last_docs, lalu posting
+    tujuan dengan galloping di dalam block.
+    """
+
+    def __init__(self, term, df, encoded_postings, encoded_tf, blocks, block_size, postings_encoding):
+        """
+        Parameters
+        ----------
+        encoded_postings, encoded_tf: bytes-like
+            Postings list dan TF list term yang masih ter-encode
+        blocks: np.ndarray
+            Baris metadata Block-Max term ini (dtype InvertedIndex.BLOCK_DTYPE)
+        """
+        self.term = term
+        self.df = df
+        self.encoded_postings = encoded_postings
+        self.encoded_tf = encoded_tf
+        self.postings_encoding = postings_encoding
+        self.block_size = block_size
+        self.last_docs = blocks['last_doc'].tolist()
+        self.block_max_tfs = blocks['max_tf'].tolist()
+        self.block_max_impacts = blocks['max_impact'].tolist()
+        self.doc_offsets = blocks['doc_offset'].tolist() + [len(encoded_postings)]
+        self.tf_offsets = blocks['tf_offset'].tolist() + [len(encoded_tf)]
+        self.max_tf = None
+        self.max_impact = None
+        self.positions_list = None
+        self.load_block(0)
+
+    def load_block(self, block):
+        """Decode docIDs dari block ke-block dan menaruh cursor di posting pertamanya"""
+        self.block = block
+        self.pos = 0
+        self.block_tfs = None
+        if block >= len(self.last_docs):
+            self.block_docs = []
+            self.doc = self.END
+            return
+        prev_doc = self.last_docs[block - 1] if block > 0 else 0
+        self.block_docs = self.postings_encoding.decode_block(
+            self.encoded_postings[self.doc_offsets[block]:self.doc_offsets[block + 1]], prev_doc)
+        self.doc = self.block_docs[0]
+
+    def tf(self):
+        if self.block_tfs is None:
+            self.block_tfs = self.postings_encoding.decode_tf_block(
+                self.encoded_tf[self.tf_offsets[self.block]:self.tf_offsets[self.block + 1]])
+        return self.block_tfs[self.pos]
+
+    def next(self):
+        self.pos += 1
+        if self.pos < len(self.block_docs):
+            self.doc = self.block_docs[self.pos]
+        else:
+            self.load_block(self.block + 1)
+        return self.doc
+
+    def next_geq(self, target):
+        if self.doc >= target:
+            return self.doc
+        if target > self.last_docs[self.block]:
+            # lompati block yang seluruh docID-nya < target tanpa decoding
+            self.load_block(gallop_left(self.last_docs, target, self.block + 1))
+            if self.doc >= target:
+                return self.doc
+        self.pos = gallop_left(self.block_docs, target, self.pos + 1)
+        self.doc = self.block_docs[self.pos]
+        return self.doc
+
+    def positions(self):
+        return self.positions_list[self.block * self.block_size + self.pos]
+
+    def postings(self):
+        return (self.postings_encoding.decode(self.encoded_postings),
+                self.postings_encoding.decode_tf(self.encoded_tf))
+
+    def block_bounds(self, target):
+        block = bisect_left(self.last_docs, target, max(self.block, 0))
+        if block >= len(self.last_docs):
+            return None
+        return self.last_docs[block], self.block_max_tfs[block], self.block_max_impacts[block]
+
+
+class EliasFanoCursor(PostingsCursor):
+    """
+    PostingsCursor di atas postings list yang di-encode dengan
+    EliasFanoPostings. docIDs (dan prefix sum TF) diakses langsung di
+    representasi Elias-Fano: hanya chunk (EliasFanoSequence.SAMPLE postings)
+    tempat cursor berada yang di-decode, dan next_geq mencari chunk tujuan
+    dari sample tanpa men-decode chunk yang dilompati.
+
+    Jika index memiliki metadata Block-Max, block_bounds memakainya seperti
+    BlockMaxCursor.
+    """
+
+    def __init__(self, term, df, encoded_postings, encoded_tf, blocks=None, block_size=None):
+        self.term = term
+        self.df = df
+        self.docs = EliasFanoSequence(encoded_postings)
+        self.tf_sums = EliasFanoSequence(encoded_tf)
+        self.block_size = block_size
+        self.last_docs = None
+        if blocks is not None:
+            self.last_docs = blocks['last_doc'].tolist()
+            self.block_max_tfs = blocks['max_tf'].tolist()
+            self.block_max_impacts = blocks['max_impact'].tolist()
+        self.max_tf = None
+        self.max_impact = None
+        self.positions_list = None
+        self.load_chunk(0)
+
+    def load_chunk(self, chunk):
+        """Decode docIDs dari chunk ke-chunk dan menaruh cursor di posting pertamanya"""
+        self.chunk = chunk
+        self.chunk_start = chunk * EliasFanoSequence.SAMPLE
+        self.chunk_tfs = None
+        self.pos = self.chunk_start
+        if chunk >= self.docs.n_chunks:
+            self.chunk_docs = []
+            self.pos = self.df
+            self.doc = self.END
+            return
+        self.chunk_docs = self.docs.decode_chunk(chunk)
+        self.doc = self.chunk_docs[0]
+
+    def tf(self):
+        if self.chunk_tfs is None:
+            sums = self.tf_sums.decode_chunk(self.chunk)
+            prev = self.tf_sums.select(self.chunk_start - 1) if self.chunk_start > 0 else 0
+            self.chunk_tfs = [b - a for a, b in zip([prev] + sums, sums)]
+        return self.chunk_tfs[self.pos - self.chunk_start]
+
+    def next(self):
+        self.pos += 1
+        i = self.pos - self.chunk_start
+        if i < len(self.chunk_docs):
+            self.doc = self.chunk_docs[i]
+        else:
+            self.load_chunk(self.chunk + 1)
+        return self.doc
+
+    def next_geq(self, target):
+        if self.doc >= target:
+            return self.doc
+        if target > self.chunk_docs[-1]:
+            # chunk terakhir yang docID pertamanya <= target, dicari dari sample
+            self.load_chunk(self.docs.find_chunk(target, self.chunk + 1))
+            if self.doc >= target:
+                return self.doc
+        i = gallop_left(self.chunk_docs, target, self.pos - self.chunk_start + 1)
+        if i >= len(self.chunk_docs):
+            self.load_chunk(self.chunk + 1)
+        else:
+            self.pos = self.chunk_start + i
+            self.doc = self.chunk_docs[i]
+        return self.doc
+
+    def postings(self):
+        tf_sums = self.tf_sums.decode_all()
+        return self.docs.decode_all().tolist(), np.diff(tf_sums, prepend=0).tolist()
+
+    def block_bounds(self, target):
+        if self.last_docs is None:
+            if self.df == 0 or target > self.docs.select(self.df - 1):
+                return None
+            return self.docs.select(self.df - 1), self.max_tf, self.max_impact
+        block = bisect_left(self.last_docs, target, min(self.pos, self.df - 1) // self.block_size)
+        if block >= len(self.last_docs):
+            return None
+        return self.last_docs[block], self.block_max_tfs[block], self.block_max_impacts[block]
+
+
+class LiveDocsCursor(PostingsCursor):
+    """
+    Membungkus PostingsCursor sehingga dokumen yang sudah dihapus
+    (DeletedDocs) dilewati: doc, next dan next_geq tidak pernah berhenti di
+    docID yang dihapus. tf, positions dan block_bounds diteruskan ke cursor
+    asli. postings(), max_tf, max_impact dan block_bounds masih mencakup
+    dokumen yang dihapus, sehingga tetap berlaku sebagai upper bound.
+    """
+
+    def __init__(self, cursor, deleted):
+        self.cursor = cursor
+        self.lookup = deleted.lookup
+        self.term = cursor.term
+        self.df = cursor.df
+        self.max_tf = cursor.max_tf
+        self.max_impact = cursor.max_impact
+        self.positions_list = cursor.positions_list
+        self.doc = self.skip(cursor.doc)
+
+    def skip(self, doc):
+        """Maju dari doc sampai docID yang tidak dihapus (atau END)"""
+        lookup = self.lookup
+        while doc != self.END and doc >> 3 < len(lookup) and (lookup[doc >> 3] >> (doc & 7)) & 1:
+            doc = self.cursor.next()
+        return doc
+
+    def tf(self):
+        return self.cursor.tf()
+
+    def next(self):
+        self.doc = self.skip(self.cursor.next())
+        return self.doc
+
+    def next_geq(self, target):
+        if self.doc < target:
+            self.doc = self.skip(self.cursor.next_geq(target))
+        return self.doc
+
+    def positions(self):
+        return self.cursor.positions()
+
+    def postings(self):
+        return self.cursor.postings()
+
+    def block_bounds(self, target):
+        return self.cursor.block_bounds(target)
 
-from .compression import StandardPostings, VBEPostings
 
 class InvertedIndex:
     """
@@ -38,34 +755,76 @@ class InvertedIndex:
         List of terms IDs, untuk mengingat urutan terms yang dimasukan ke
         dalam Inverted Index.
 
+    bm25_params: (k1, b) yang dipakai untuk menghitung max_impact setiap term
+        di Lexicon, atau None jika upper bound skor BM25 tidak disimpan.
+
+    blocks: metadata Block-Max (NumPy structured array dengan dtype
+        BLOCK_DTYPE) atau None. Setiap postings list dibagi menjadi block
+        berisi block_size postings; untuk setiap block disimpan docID
+        terakhir, TF terbesar, impact BM25 terbesar, dan posisi byte awal
+        block di postings list dan TF list yang ter-encode. Block-block dari
+        satu term bersebelahan, dimulai dari kolom block_start di Lexicon.
+
+    stats: CollectionStats
+        Statistik koleksi (panjang setiap dokumen, N, total token) untuk
+        normalisasi panjang dan IDF pada TF-IDF atau BM25. Statistik per
+        term (df, cf, max_tf) ada di Lexicon.
+
+    positional: True jika index menyimpan posisi kemunculan term di setiap
+        dokumen (index posisional). Posisi-posisi sebuah term disimpan tepat
+        setelah TF list-nya di index file (gap + VBE, lihat
+        VBEPostings.encode_positions), panjangnya di kolom positions_len
+        Lexicon.
+
+    Di disk, postings_dict dan terms disimpan sebagai Lexicon biner
+    (file .lex, lihat class Lexicon), metadata Block-Max di file .blk,
+    panjang dokumen di file .stats (lihat class CollectionStats), dan file
+    .dict hanya berisi bm25_params, block_size dan positional. Saat dibaca, postings_dict adalah objek
+    Lexicon yang di-mmap. Index lama yang seluruh metadatanya di-pickle ke
+    file .dict tetap bisa dibaca.
+
     """
 
+    BLOCK_DTYPE = np.dtype([('last_doc', '<u4'),
+                            ('max_tf', '<u4'),
+                            ('max_impact', '<f8'),
+                            ('doc_offset', '<u4'),
+                            ('tf_offset', '<u4')])
+
     def __init__(self, index_name, postings_encoding, directory=''):
         """
         Parameters
         ----------
         index_name (str): Nama yang digunakan untuk menyimpan files yang berisi index
         postings_encoding : Lihat di compression.py, kandidatnya adalah StandardPostings,
-                        GapBasedPostings, dsb.
+                        GapBasedPostings, dsb. Untuk writer, AdaptivePostings
+                        berarti codec dipilih per term. Reader men-decode
+                        setiap term dengan codec yang tercatat di Lexicon;
+                        postings_encoding hanya dipakai untuk index format lama.
         directory (str): directory dimana file index berada
         """
 
         self.index_file_path = os.path.join(directory, index_name+'.index')
         self.metadata_file_path = os.path.join(directory, index_name+'.dict')
+        self.lexicon_file_path = os.path.join(directory, index_name+'.lex')
+        self.blocks_file_path = os.path.join(directory, index_name+'.blk')
+        self.stats_file_path = os.path.join(directory, index_name+'.stats')
 
         self.postings_encoding = postings_encoding
         self.directory = directory
 
         self.postings_dict = {}
         self.terms = []         # Untuk keep track urutan term yang dimasukkan ke index
-        # key: doc ID (int), value: document length (number of tokens)
-        self.doc_length = {}
+        # panjang dokumen (number of tokens) per doc ID, N dan total token.
         # Ini nantinya akan berguna untuk normalisasi Score terhadap panjang
         # dokumen saat menghitung score dengan TF-IDF atau BM25
-        
+        self.stats = CollectionStats()
+
         ## Additional Attributes ##
-        # rata2 panjang dokumen dalam index
-        self.avg_doc_length = 0
+        self.bm25_params = None
+        self.blocks = None
+        self.block_size = None
+        self.positional = False
 
     def __enter__(self):
         """
@@ -74,8 +833,8 @@ class InvertedIndex:
             1. Dictionary ---> postings_dict
             2. iterator untuk List yang berisi urutan term yang masuk ke
                 index saat konstruksi. ---> term_iter
-            3. doc_length, sebuah python's dictionary yang berisi key = doc id, dan
-                value berupa banyaknya token dalam dokumen tersebut (panjang dokumen).
+            3. stats, CollectionStats yang berisi banyaknya token dalam setiap
+                dokumen (panjang dokumen), N dan total token.
                 Berguna untuk normalisasi panjang saat menggunakan TF-IDF atau BM25
                 scoring regime; berguna untuk untuk mengetahui nilai N saat hitung IDF,
                 dimana N adalah banyaknya dokumen di koleksi
@@ -91,37 +850,132 @@ class InvertedIndex:
         self.index_file = open(self.index_file_path, 'rb+')
 
         # Kita muat postings dict dan terms iterator dari file metadata
-        with open(self.metadata_file_path, 'rb') as f:
-            self.postings_dict, self.terms, self.doc_length, self.avg_doc_length = pickle.load(f)
-            self.term_iter = self.terms.__iter__()
+        self.load_metadata()
 
         return self
 
+    @property
+    def avg_doc_length(self):
+        """rata2 panjang dokumen dalam index"""
+        return self.stats.avg_doc_length
+
+    def load_metadata(self):
+        """Memuat postings_dict, terms dan statistik koleksi dari file metadata"""
+        with open(self.metadata_file_path, 'rb') as f:
+            metadata = pickle.load(f)
+        if not isinstance(metadata, dict):
+            # format lama: semua metadata di-pickle ke file .dict
+            self.postings_dict, self.terms, doc_length, _ = metadata
+            self.stats = CollectionStats.from_dict(doc_length)
+        else:
+            if 'doc_length' in metadata:
+                # format lama: doc_length di-pickle ke file .dict
+                self.stats = CollectionStats.from_dict(metadata['doc_length'])
+            else:
+                self.stats = CollectionStats.load(self.stats_file_path)
+            self.bm25_params = metadata['bm25_params']
+            self.block_size = metadata['block_size']
+            self.positional = metadata.get('positional', False)
+            self.postings_dict = Lexicon.load(self.lexicon_file_path)
+            self.terms = self.postings_dict
+            if self.block_size is not None:
+                self.blocks = np.load(self.blocks_file_path, mmap_mode='r')
+        self.term_iter = self.terms.__iter__()
+
+    def term_encoding(self, term):
+        """
+        Codec untuk postings list term: yang tercatat di Lexicon (setiap term
+        bisa berbeda), atau self.postings_encoding untuk index format lama.
+        """
+        if isinstance(self.postings_dict, Lexicon):
+            return self.postings_dict.get_codec(term) or self.postings_encoding
+        return self.postings_encoding
+
     def __exit__(self, exception_type, exception_value, traceback):
-        """Menutup index_file dan menyimpan postings_dict dan terms ketika keluar context"""
+        """Menutup index_file ketika keluar context"""
         # Menutup index file
         self.index_file.close()
 
-        # Menyimpan metadata (postings dict dan terms) ke file metadata dengan bantuan pickle
-        with open(self.metadata_file_path, 'wb') as f:
-            pickle.dump([self.postings_dict, self.terms, self.doc_length, self.avg_doc_length], f)
-
 
 class InvertedIndexReader(InvertedIndex):
     """
     Class yang mengimplementasikan bagaimana caranya scan atau membaca secara
     efisien Inverted Index yang disimpan di sebuah file.
+
+    Reader bersifat READ-ONLY: index file dibuka sekali dengan mode 'rb' dan
+    tidak ada yang ditulis ke disk ketika reader ditutup. Satu reader yang
+    sudah dibuka (lihat open()) aman dipakai bersama oleh banyak thread,
+    karena tidak ada seek yang mengubah posisi file bersama.
+
+    Index file di-mmap (read-only), sehingga get_postings_list cukup
+    memberikan slice memoryview ke postings_encoding tanpa menyalin bytes.
+    Postings yang sering diakses dilayani langsung dari page cache, dan
+    beberapa worker (proses) yang membuka index yang sama berbagi physical
+    pages yang sama. Jika mmap tidak bisa dipakai (misal file kosong),
+    reader kembali memakai positional read (pread).
     """
 
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    def open(self):
+        """
+        Membuka index file (read-only) dan memuat metadata. Dipisah dari
+        __enter__ agar reader bisa dibuka sekali dan dipakai sepanjang umur
+        proses, tidak hanya di dalam satu blok with.
+        """
+        self.index_file = open(self.index_file_path, 'rb')
+        self.load_metadata()
+
+        # mmap tidak bisa dibuat untuk file berukuran 0 byte
+        self.index_mmap = None
+        self.index_buffer = None
+        if os.fstat(self.index_file.fileno()).st_size > 0:
+            self.index_mmap = mmap.mmap(self.index_file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.index_buffer = memoryview(self.index_mmap)
+
+        # fallback untuk platform tanpa os.pread (misal Windows): seek+read
+        # dengan lock agar tetap aman dipakai banyak thread
+        self.read_lock = None if hasattr(os, 'pread') else threading.Lock()
+        return self
+
+    def close(self):
+        """Menutup index file. Tidak ada metadata yang ditulis ulang."""
+        if self.index_mmap is not None:
+            self.index_buffer.release()
+            try:
+                self.index_mmap.close()
+            except BufferError:
+                # masih ada slice memoryview yang dipegang pemanggil;
+                # mapping akan dilepas oleh garbage collector
+                pass
+            self.index_mmap = None
+            self.index_buffer = None
+        self.index_file.close()
+
+    def read_at(self, offset, length):
+        """
+        Mengembalikan length bytes dari index file mulai dari posisi offset.
+        Jika index di-mmap, yang dikembalikan adalah slice memoryview (zero-copy)
+        """
+        if self.index_buffer is not None:
+            return self.index_buffer[offset:offset + length]
+        if self.read_lock is None:
+            return os.pread(self.index_file.fileno(), length, offset)
+        with self.read_lock:
+            self.index_file.seek(offset)
+            return self.index_file.read(length)
+
     def __iter__(self):
         return self
 
     def reset(self):
         """
-        Kembalikan file pointer ke awal, dan kembalikan pointer iterator
-        term ke awal
+        Kembalikan pointer iterator term ke awal
         """
-        self.index_file.seek(0)
         self.term_iter = self.terms.__iter__()  # reset term iterator
 
     def __next__(self):
@@ -133,7 +987,9 @@ class InvertedIndexReader(InvertedIndex):
         Ketika instance dari kelas InvertedIndexReader ini digunakan
         sebagai iterator pada sebuah loop scheme, special method __next__(...)
         bertugas untuk mengembalikan pasangan (term, postings_list, tf_list) berikutnya
-        pada inverted index.
+        pada inverted index. Untuk index posisional, yang dikembalikan adalah
+        (term, postings_list, tf_list, positions_list) dengan positions_list
+        berisi list posisi untuk setiap posting.
 
         PERHATIAN! method ini harus mengembalikan sebagian kecil data dari
         file index yang besar. Mengapa hanya sebagian kecil? karena agar muat
@@ -142,11 +998,58 @@ class InvertedIndexReader(InvertedIndex):
         curr_term = next(self.term_iter)
         pos, number_of_postings, len_in_bytes_of_postings, len_in_bytes_of_tf = self.postings_dict[
             curr_term]
-        postings_list = self.postings_encoding.decode(self.index_file.read(len_in_bytes_of_postings))
-        tf_list = self.postings_encoding.decode_tf(
-            self.index_file.read(len_in_bytes_of_tf))
+        encoded = self.read_at(pos, len_in_bytes_of_postings + len_in_bytes_of_tf)
+        postings_encoding = self.term_encoding(curr_term)
+        postings_list = postings_encoding.decode(encoded[:len_in_bytes_of_postings])
+        tf_list = postings_encoding.decode_tf(encoded[len_in_bytes_of_postings:])
+        if self.positional:
+            positions_list = self.get_positions_list(curr_term)
+            return (curr_term, postings_list, tf_list, [positions_list[i] for i in range(len(tf_list))])
         return (curr_term, postings_list, tf_list)
 
+    def iter_encoded(self, buffer_size=1 << 20):
+        """
+        Generator semua postings list di index, sesuai urutan term, TANPA
+        decoding: (term, df, postings_encoding, encoded_postings, encoded_tf,
+        encoded_positions, max_tf, cf, last_doc), dengan encoded_positions
+        b'' jika index tidak posisional. Dipakai untuk merge index secara
+        byte-level.
+
+        Index file dibaca secara sequential dengan file object tersendiri
+        yang buffer-nya buffer_size bytes, sehingga membaca banyak index
+        sekaligus (merge) tetap berupa read besar yang berurutan.
+        """
+        lexicon = self.postings_dict
+        if isinstance(lexicon, Lexicon):
+            # kolom Lexicon dibaca sekali sebagai list, bukan lookup per term
+            codecs = (lexicon.codecs.tolist() if lexicon.codecs is not None
+                      else [codec_id(self.postings_encoding)] * len(lexicon))
+            cfs = lexicon.cfs.tolist() if lexicon.cfs is not None else [None] * len(lexicon)
+            last_docs = lexicon.last_docs.tolist() if lexicon.last_docs is not None else [None] * len(lexicon)
+            entries = zip(lexicon.terms.tolist(), lexicon.offsets.tolist(), lexicon.dfs.tolist(),
+                          lexicon.postings_lens.tolist(), lexicon.tf_lens.tolist(),
+                          lexicon.positions_lens.tolist(), lexicon.max_tfs.tolist(), cfs, last_docs,
+                          [CODECS[codec] for codec in codecs])
+        else:
+            # format lama: max_tf, cf dan last_doc dihitung dari postings
+            entries = ((term,) + tuple(lexicon[term]) + (0, None, None, None, self.postings_encoding)
+                       for term in self.terms)
+        with open(self.index_file_path, 'rb', buffering=buffer_size) as f:
+            for (term, offset, df, postings_length, tf_length, positions_length, max_tf, cf, last_doc,
+                 codec) in entries:
+                if f.tell() != offset:
+                    f.seek(offset)
+                encoded = f.read(postings_length + tf_length + positions_length)
+                encoded_tf = encoded[postings_length:postings_length + tf_length]
+                if max_tf is None or cf is None:
+                    tf_list = codec.decode_tf(encoded_tf)
+                    max_tf = max(tf_list, default=0) if max_tf is None else max_tf
+                    cf = sum(tf_list)
+                if last_doc is None:
+                    last_doc = int(codec.decode_array(encoded[:postings_length])[-1]) if df else 0
+                yield (term, df, codec, encoded[:postings_length], encoded_tf,
+                       encoded[postings_length + tf_length:], max_tf, cf, last_doc)
+
     def get_postings_list(self, term):
         """
         Kembalikan sebuah postings list (list of docIDs) beserta list
@@ -161,16 +1064,79 @@ class InvertedIndexReader(InvertedIndex):
         posting = self.postings_dict.get(term)
         if posting == None:
             return []
-        # menghitung byte awal postings pada index_file
-        offset = posting[0]
-        postings_length = posting[2]
-        tf_length = posting[3]
-        
-        self.index_file.seek(offset)
-        decoded_postings = VBEPostings.decode(self.index_file.read(postings_length))
-        decoded_tf = VBEPostings.decode_tf(self.index_file.read(tf_length))
+        return self.read_postings(posting, self.term_encoding(term))
+
+    def read_postings(self, posting, postings_encoding):
+        """(postings_list, tf_list) dari entry postings_dict posting"""
+        offset, _, postings_length, tf_length = posting
+        # postings dan TF list bersebelahan di file, cukup satu kali baca
+        encoded = self.read_at(offset, postings_length + tf_length)
+        decoded_postings = postings_encoding.decode(encoded[:postings_length])
+        decoded_tf = postings_encoding.decode_tf(encoded[postings_length:])
         return (decoded_postings, decoded_tf)
 
+    def get_positions_list(self, term):
+        """
+        Mengembalikan PositionsList (posisi per posting, di-decode lazily)
+        untuk term, atau None jika index tidak posisional atau term tidak ada.
+        """
+        posting = self.postings_dict.get(term) if self.positional else None
+        if posting is None:
+            return None
+        return self.read_positions(posting, self.postings_dict.get_positions_length(term),
+                                   self.term_encoding(term))
+
+    def read_positions(self, posting, positions_length, postings_encoding):
+        """PositionsList dari entry postings_dict posting"""
+        offset, _, postings_length, tf_length = posting
+        encoded = self.read_at(offset + postings_length, tf_length + positions_length)
+        return PositionsList(encoded[tf_length:], encoded[:tf_length], postings_encoding)
+
+    def get_cursor(self, term):
+        """
+        Mengembalikan PostingsCursor untuk term, atau None jika term tidak
+        ada di index. Untuk index posisional, cursor.positions() memberikan
+        posisi term di dokumen cursor.doc.
+        """
+        lexicon = self.postings_dict if isinstance(self.postings_dict, Lexicon) else None
+        if lexicon is not None:
+            # term dicari sekali, semua kolom lain dibaca dari baris yang sama
+            row = lexicon.find(term)
+            if row < 0:
+                return None
+            posting = lexicon.entry_at(row)
+            postings_encoding = lexicon.codec_at(row) or self.postings_encoding
+        else:
+            posting = self.postings_dict.get(term)
+            if posting is None:
+                return None
+            postings_encoding = self.postings_encoding
+        random_access = getattr(postings_encoding, 'RANDOM_ACCESS', False)
+        if self.blocks is not None or random_access:
+            offset, df, postings_length, tf_length = posting
+            blocks = None
+            if self.blocks is not None:
+                # block dari term ini: ceil(df / block_size) baris mulai dari block_start
+                block_start = int(lexicon.block_starts[row])
+                blocks = self.blocks[block_start:block_start + -(-df // self.block_size)]
+            encoded = self.read_at(offset, postings_length + tf_length)
+            if random_access:
+                cursor = EliasFanoCursor(term, df, encoded[:postings_length], encoded[postings_length:],
+                                         blocks, self.block_size)
+            else:
+                cursor = BlockMaxCursor(term, df, encoded[:postings_length], encoded[postings_length:],
+                                        blocks, self.block_size, postings_encoding)
+        else:
+            cursor = PostingsCursor(term, *self.read_postings(posting, postings_encoding))
+        if lexicon is not None:
+            cursor.max_tf, cursor.max_impact = lexicon.bounds_at(row)
+        cursor.positions_list = None
+        if self.positional:
+            # index posisional selalu memakai Lexicon (format metadata baru)
+            cursor.positions_list = self.read_positions(posting, lexicon.positions_length_at(row),
+                                                        postings_encoding)
+        return cursor
+
 
 class InvertedIndexWriter(InvertedIndex):
     """
@@ -178,19 +1144,174 @@ class InvertedIndexWriter(InvertedIndex):
     efisien Inverted Index yang disimpan di sebuah file.
     """
 
+    def __init__(self, index_name, postings_encoding, directory='', bm25_params=None, block_size=128,
+                 positional=False):
+        """
+        Parameters
+        ----------
+        positional: bool
+            Jika True, append(...) juga menerima dan menyimpan posisi
+            kemunculan term di setiap dokumen.
+        bm25_params: (k1, b) atau None
+            Jika diberikan, saat index ditutup dihitung max_impact BM25 untuk
+            setiap term (upper bound skor untuk WAND/MaxScore) dan metadata
+            Block-Max untuk setiap block berisi block_size postings. Hanya
+            berguna untuk index final, karena membutuhkan panjang dokumen
+            seluruh koleksi. Jika statistik koleksi sudah final sebelum
+            postings ditulis (lihat freeze_stats), nilai-nilai ini dihitung
+            langsung saat append.
+        """
+        super().__init__(index_name, postings_encoding, directory)
+        self.bm25_params = bm25_params
+        if bm25_params is not None:
+            self.block_size = block_size
+        self.positional = positional
+        self.max_tf = {}
+        self.positions_length = {}
+        self.codec = {}
+        self.cf = {}
+        self.last_doc = {}
+        # diisi oleh freeze_stats: faktor normalisasi panjang BM25 per docID,
+        # serta upper bound skor dan block yang dihitung saat append
+        self.length_norm = None
+        self.max_impact = {}
+        self.block_start = {}
+        self.block_list = []
+        self.n_blocks = 0
+
     def __enter__(self):
         self.index_file = open(self.index_file_path, 'wb+')
         return self
 
-    def append(self, term, postings_list, tf_list):
+    def freeze_stats(self):
+        """
+        Menandai self.stats sudah final, misal saat merge (statistik semua
+        index digabung sebelum postings pertama ditulis). Setelah ini, jika
+        bm25_params diberikan, max_impact dan metadata Block-Max setiap term
+        dihitung saat term tersebut di-append, dari postings yang sudah ada
+        di memori, sehingga index file tidak perlu dibaca dan di-decode
+        ulang saat ditutup.
+        """
+        if self.bm25_params is not None and self.stats.n_docs:
+            b = self.bm25_params[1]
+            self.length_norm = (1 - b) + (b * self.stats.doc_lengths / self.avg_doc_length)
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        """Menutup index_file dan menyimpan postings_dict dan terms ketika keluar context"""
+        max_impact, block_start = None, None
+        if self.length_norm is not None:
+            max_impact, block_start = self.max_impact, self.block_start
+            self.blocks = (np.concatenate(self.block_list) if self.block_list
+                           else np.empty(0, dtype=self.BLOCK_DTYPE))
+        elif self.bm25_params is not None:
+            max_impact, block_start = self.compute_score_bounds(*self.bm25_params)
+
+        # Menutup index file
+        self.index_file.close()
+
+        # Menyimpan postings dict (dan urutan terms) sebagai Lexicon biner,
+        # sisanya ke file metadata dengan bantuan pickle
+        Lexicon.from_postings_dict(self.postings_dict, self.max_tf, max_impact,
+                                   block_start, self.positions_length, self.codec,
+                                   self.cf, self.last_doc).save(self.lexicon_file_path)
+        if self.blocks is not None:
+            with open(self.blocks_file_path, 'wb') as f:
+                np.save(f, self.blocks)
+        self.stats.save(self.stats_file_path)
+        with open(self.metadata_file_path, 'wb') as f:
+            pickle.dump({'bm25_params': self.bm25_params,
+                         'block_size': self.block_size,
+                         'positional': self.positional}, f)
+
+    def compute_score_bounds(self, k1, b):
+        """
+        Menghitung, untuk setiap term, nilai maksimum dari bagian TF BM25
+
+            ((k1 + 1) * tf) / (k1 * dlnf + tf),  dlnf = (1 - b) + b * dl / avdl
+
+        pada postings list-nya. Dikalikan IDF saat query, nilai ini adalah
+        upper bound kontribusi term tersebut ke skor dokumen manapun.
+        Dihitung setelah semua term di-append karena dl dan avdl baru final
+        di akhir.
+
+        Sekaligus membangun metadata Block-Max (self.blocks): setiap postings
+        list dibagi menjadi block berisi self.block_size postings, dan untuk
+        setiap block dicatat docID terakhir, TF dan impact terbesar, serta
+        posisi byte awal block di postings list dan TF list yang ter-encode.
+
+        Returns
+        -------
+        (Dict[int, float], Dict[int, int])
+            max_impact dan block_start untuk setiap termID
+        """
+        max_impact, block_start = {}, {}
+        if not self.stats.n_docs:
+            # index kosong (misal semua dokumennya sudah dihapus)
+            self.blocks = np.empty(0, dtype=self.BLOCK_DTYPE)
+            return max_impact, block_start
+        length_norm = (1 - b) + (b * self.stats.doc_lengths / self.avg_doc_length)
+
+        blocks = []
+        n_blocks = 0
+        self.index_file.flush()
+        # urutan term sama dengan urutan baris di Lexicon
+        for term in sorted(self.postings_dict):
+            pos, df, postings_length, tf_length = self.postings_dict[term]
+            postings_encoding = CODECS[self.codec[term]]
+            self.index_file.seek(pos)
+            docs = postings_encoding.decode_array(self.index_file.read(postings_length))
+            tf_list = postings_encoding.decode_tf_array(self.index_file.read(tf_length))
+            max_impact[term], term_blocks = self.term_score_bounds(docs, tf_list, postings_encoding,
+                                                                   length_norm, k1)
+            blocks.append(term_blocks)
+            block_start[term] = n_blocks
+            n_blocks += len(term_blocks)
+        self.blocks = np.concatenate(blocks)
+        return max_impact, block_start
+
+    def term_score_bounds(self, docs, tf_list, postings_encoding, length_norm, k1):
+        """
+        max_impact dan metadata Block-Max (lihat compute_score_bounds) untuk
+        satu postings list (docs dan tf_list berupa np.ndarray), dengan
+        length_norm faktor normalisasi panjang BM25 untuk setiap docID.
+        """
+        df = len(docs)
+        tfs = tf_list.astype(float)
+        dlnf = length_norm[docs]
+        impacts = ((k1 + 1) * tfs) / (k1 * dlnf + tfs)
+        max_impact = float(np.max(impacts))
+
+        if df <= self.block_size:
+            # satu block (kebanyakan term): block selalu mulai di byte 0
+            term_blocks = np.zeros(1, dtype=self.BLOCK_DTYPE)
+            term_blocks['last_doc'] = docs[-1]
+            term_blocks['max_tf'] = np.max(tfs)
+            term_blocks['max_impact'] = max_impact
+            return max_impact, term_blocks
+
+        starts = np.arange(0, df, self.block_size)
+        term_blocks = np.empty(len(starts), dtype=self.BLOCK_DTYPE)
+        term_blocks['last_doc'] = docs[np.minimum(starts + self.block_size, df) - 1]
+        term_blocks['max_tf'] = np.maximum.reduceat(tfs, starts)
+        term_blocks['max_impact'] = np.maximum.reduceat(impacts, starts)
+        term_blocks['doc_offset'] = postings_encoding.block_offsets(docs, self.block_size)[:-1]
+        term_blocks['tf_offset'] = postings_encoding.tf_block_offsets(tf_list, self.block_size)[:-1]
+        return max_impact, term_blocks
+
+    def append(self, term, postings_list, tf_list, positions_list=None):
         """
         Menambahkan (append) sebuah term, postings_list, dan juga TF list 
-        yang terasosiasi ke posisi akhir index file.
+        yang terasosiasi ke posisi akhir index file. Untuk index posisional,
+        positions_list (list posisi untuk setiap posting) di-encode dan
+        ditulis tepat setelah TF list.
 
         Method ini melakukan 4 hal:
         1. Encode postings_list menggunakan self.postings_encoding (method encode),
         2. Encode tf_list menggunakan self.postings_encoding (method encode_tf),
-        3. Menyimpan metadata dalam bentuk self.terms, self.postings_dict, dan self.doc_length.
+           Jika self.postings_encoding adalah AdaptivePostings, codec dipilih
+           per term (AdaptivePostings.choose); codec yang dipakai dicatat di
+           self.codec dan disimpan di Lexicon.
+        3. Menyimpan metadata dalam bentuk self.terms, self.postings_dict, dan self.stats.
            Ingat kembali bahwa self.postings_dict memetakan sebuah termID ke
            sebuah 4-tuple: - start_position_in_index_file
                            - number_of_postings_in_list
@@ -199,7 +1320,7 @@ class InvertedIndexWriter(InvertedIndex):
         4. Menambahkan (append) bystream dari postings_list yang sudah di-encode dan
            tf_list yang sudah di-encode ke posisi akhir index file di harddisk.
 
-        Jangan lupa update self.terms dan self.doc_length juga ya!
+        Jangan lupa update self.terms dan self.stats juga ya!
 
         SEARCH ON YOUR FAVORITE SEARCH ENGINE:
         - Anda mungkin mau membaca tentang Python I/O
@@ -217,42 +1338,109 @@ class InvertedIndexWriter(InvertedIndex):
             List of docIDs dimana term muncul
         tf_list: List[Int]
             List of term frequencies
+        positions_list: List[List[Int]]
+            List posisi term di setiap dokumen pada postings_list (hanya
+            untuk index posisional)
         """
         # Encode postings_list dan tf_list menggunakan self.postings_encoding
-        encoded_postings = self.postings_encoding.encode(postings_list)
-        encoded_tf = self.postings_encoding.encode_tf(tf_list)
-        # Menyimpan metadata dalam bentuk self.terms, self.postings_dict dan self.doc_length
+        postings_encoding, encoded_postings, encoded_tf = self.encode_postings(postings_list, tf_list)
+        # Menyimpan statistik koleksi (panjang dokumen, N, total token)
+        self.stats.add_postings(postings_list, tf_list)
+
+        encoded_positions = VBEPostings.encode_positions(positions_list) if self.positional else None
+        return self.append_encoded(term, len(postings_list), postings_encoding, encoded_postings, encoded_tf,
+                                   max(tf_list, default=0), encoded_positions, sum(tf_list),
+                                   postings_list[-1] if postings_list else 0)
+
+    def encode_postings(self, postings_list, tf_list):
+        """
+        Encode postings_list dan tf_list dengan self.postings_encoding (atau
+        codec pilihan AdaptivePostings.choose).
+
+        Returns
+        -------
+        (class, bytes, bytes)
+            codec yang dipakai, encoded postings list dan encoded TF list
+        """
+        if getattr(self.postings_encoding, 'ADAPTIVE', False):
+            return self.postings_encoding.choose(postings_list, tf_list)
+        return (self.postings_encoding, self.postings_encoding.encode(postings_list),
+                self.postings_encoding.encode_tf(tf_list))
+
+    def append_encoded(self, term, df, postings_encoding, encoded_postings, encoded_tf, max_tf,
+                       encoded_positions=None, cf=None, last_doc=None, docs=None, tf_list=None):
+        """
+        Menambahkan postings list yang SUDAH di-encode dengan
+        postings_encoding (misal disalin atau disambung langsung dari
+        intermediate index saat merge) ke posisi akhir index file.
+        self.stats TIDAK di-update; pemanggil yang bertanggung jawab.
+
+        Parameters
+        ----------
+        df: int
+            Banyaknya postings
+        max_tf: int
+            TF terbesar pada postings list
+        encoded_positions: bytes
+            Posisi (VBEPostings.encode_positions), untuk index posisional
+        cf: int
+            Jumlah TF pada postings list; dihitung dari encoded_tf jika None
+        last_doc: int
+            docID terakhir pada postings list; dihitung dari
+            encoded_postings jika None
+        docs, tf_list: np.ndarray
+            Postings yang sudah di-decode (opsional), agar upper bound skor
+            setelah freeze_stats tidak perlu men-decode encoded_postings
+        """
+        # Menyimpan metadata dalam bentuk self.terms dan self.postings_dict
         self.terms.append(term)
+        self.max_tf[term] = max_tf
+        self.codec[term] = codec_id(postings_encoding)
+        self.cf[term] = cf if cf is not None else int(postings_encoding.decode_tf_array(encoded_tf).sum())
+        if last_doc is None:
+            last_doc = int(postings_encoding.decode_array(encoded_postings)[-1]) if df else 0
+        self.last_doc[term] = last_doc
+        if self.length_norm is not None:
+            if docs is None:
+                docs = postings_encoding.decode_array(encoded_postings)
+            if tf_list is None:
+                tf_list = postings_encoding.decode_tf_array(encoded_tf)
+            self.max_impact[term], term_blocks = self.term_score_bounds(
+                np.asarray(docs), np.asarray(tf_list), postings_encoding, self.length_norm, self.bm25_params[0])
+            self.block_list.append(term_blocks)
+            self.block_start[term] = self.n_blocks
+            self.n_blocks += len(term_blocks)
         self.postings_dict[term] = (self.index_file.seek(0, 2), 
-                                          len(postings_list), 
+                                          df, 
                                           len(encoded_postings),
                                           len(encoded_tf))
-        for index, value in enumerate(postings_list):
-            if not self.doc_length.get(value) == None:
-                self.doc_length[value] += tf_list[index] 
-            else:
-                self.doc_length[value] = tf_list[index]
-                
+
         # Menambahkan (append) bystream dari postings_list yang sudah di-encode 
         # ke posisi akhir index file di harddisk
         self.index_file.write(encoded_postings)
         self.index_file.write(encoded_tf)
-        
-        self.avg_doc_length = sum(self.doc_length.values())/len(self.doc_length)
+        if self.positional:
+            self.positions_length[term] = len(encoded_positions)
+            self.index_file.write(encoded_positions)
         return self
 
 
 if __name__ == "__main__":
 
-    from compression import VBEPostings
+    # jalankan sebagai module agar relative import berlaku:
+    #   python -m retrieve.library.index
+    from .compression import VBEPostings, AdaptivePostings, Simple8bPostings
+
+    os.makedirs('./tmp/', exist_ok=True)
 
     with InvertedIndexWriter('test', postings_encoding=VBEPostings, directory='./tmp/') as index:
         index.append(1, [2, 3, 4, 8, 10], [2, 4, 2, 3, 30])
         index.append(2, [3, 4, 5], [34, 23, 56])
         index.index_file.seek(0)
         assert index.terms == [1, 2], "terms salah"
-        assert index.doc_length == {
-            2: 2, 3: 38, 4: 25, 5: 56, 8: 3, 10: 30}, "doc length salah"
+        assert index.stats.doc_lengths[:11].tolist() == [
+            0, 0, 2, 38, 25, 56, 0, 0, 3, 0, 30], "doc length salah"
+        assert (index.stats.n_docs, index.stats.total_tokens) == (6, 154), "statistik koleksi salah"
         assert index.postings_dict == {1: (0,
                                            5,
                                            len(VBEPostings.encode(
@@ -272,6 +1460,36 @@ if __name__ == "__main__":
     with InvertedIndexReader('test', postings_encoding=VBEPostings, directory='./tmp/') as index:
         assert index.get_postings_list(1) == ([2, 3, 4, 8, 10], [2, 4, 2, 3, 30]), "terdapat kesalahan"
         assert index.get_postings_list(2) == ([3, 4, 5], [34, 23, 56]), "terdapat kesalahan"
+        assert index.postings_dict.get_term_stats(2) == (3, 113, 56), "statistik term salah"
+        assert index.get_cursor(99) is None, "term yang tidak ada harus None"
+        assert index.postings_dict.get_bounds(99) is None and index.postings_dict.get_codec(99) is None, \
+            "term yang tidak ada harus None"
+        assert index.avg_doc_length == 154 / 6, "rata-rata panjang dokumen salah"
         
         for i in index:
             print(i)
+
+    with InvertedIndexWriter('test_pos', postings_encoding=VBEPostings, directory='./tmp/', positional=True) as index:
+        index.append(1, [2, 5], [2, 1], [[3, 10], [0]])
+        index.append(2, [5], [2], [[1, 7]])
+
+    with InvertedIndexReader('test_pos', postings_encoding=VBEPostings, directory='./tmp/') as index:
+        assert index.get_postings_list(1) == ([2, 5], [2, 1]), "terdapat kesalahan"
+        assert index.get_positions_list(1)[1] == [0], "posisi salah"
+        cursor = index.get_cursor(2)
+        assert cursor.positions() == [1, 7], "posisi salah"
+        assert list(index) == [(1, [2, 5], [2, 1], [[3, 10], [0]]),
+                               (2, [5], [2], [[1, 7]])], "terdapat kesalahan"
+
+    long_postings = list(range(0, 2000, 2))
+    with InvertedIndexWriter('test_adaptive', postings_encoding=AdaptivePostings, directory='./tmp/',
+                             bm25_params=(1.2, 0.75)) as index:
+        index.append(1, [2, 5], [2, 1])
+        index.append(2, long_postings, [1] * len(long_postings))
+
+    with InvertedIndexReader('test_adaptive', postings_encoding=AdaptivePostings, directory='./tmp/') as index:
+        assert index.term_encoding(1) is VBEPostings, "codec salah"
+        assert index.term_encoding(2) is Simple8bPostings, "codec salah"
+        assert index.get_postings_list(2) == (long_postings, [1] * len(long_postings)), "terdapat kesalahan"
+        cursor = index.get_cursor(2)
+        assert cursor.next_geq(1001) == 1002 and cursor.tf() == 1, "terdapat kesalahan"
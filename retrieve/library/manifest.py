@@ -0,0 +1,116 @@
+import hashlib
+import os
+import pickle
+
+
+def file_digest(path):
+    """Hash (BLAKE2b, 16 bytes) dari isi file path"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.digest()
+
+
+class BlockManifest:
+    """
+    Manifest change detection untuk do_indexing: untuk setiap block
+    (sub-directory koleksi) dicatat daftar file-nya beserta ukuran, mtime
+    dan hash isinya, serta nama intermediate index yang dihasilkan block
+    tersebut. Block yang isinya tidak berubah sejak indexing sebelumnya
+    tidak perlu di-parse ulang; intermediate index-nya dipakai lagi apa
+    adanya dan hanya merge yang dijalankan ulang.
+
+    Hash isi file hanya dihitung untuk file yang ukuran atau mtime-nya
+    berubah (atau file baru), sehingga scan koleksi yang tidak berubah
+    cukup dengan os.stat. File yang hanya di-touch (isi sama) tidak membuat
+    block-nya di-parse ulang.
+
+    Manifest hanya valid untuk settings yang sama (codec, positional);
+    manifest dengan settings berbeda dianggap kosong.
+
+    Attributes
+    ----------
+    path: str
+        Path file manifest (pickle)
+    settings: dict
+        Parameter indexing yang mempengaruhi isi intermediate index
+    blocks: Dict[str, dict]
+        block -> {'index': nama intermediate index,
+                  'files': {nama file: (size, mtime_ns, digest)}}
+    """
+
+    def __init__(self, path, settings):
+        self.path = path
+        self.settings = settings
+        self.blocks = {}
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path, 'rb') as f:
+                manifest = pickle.load(f)
+            if manifest['settings'] == self.settings:
+                self.blocks = manifest['blocks']
+        return self
+
+    def save(self):
+        path = self.path + '.tmp'
+        with open(path, 'wb') as f:
+            pickle.dump({'settings': self.settings, 'blocks': self.blocks}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path, self.path)
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+        self.blocks = {}
+
+    def scan(self, block, block_dir):
+        """
+        Signature {nama file: (size, mtime_ns, digest)} semua file di
+        block_dir. digest dari manifest dipakai lagi jika size dan mtime
+        file tidak berubah.
+        """
+        old = self.blocks.get(block, {}).get('files', {})
+        files = {}
+        for name in os.listdir(block_dir):
+            stat = os.stat(os.path.join(block_dir, name))
+            signature = old.get(name)
+            if signature is None or signature[:2] != (stat.st_size, stat.st_mtime_ns):
+                signature = (stat.st_size, stat.st_mtime_ns, file_digest(os.path.join(block_dir, name)))
+            files[name] = signature
+        return files
+
+    def is_unchanged(self, block, files):
+        """True jika isi block (files, hasil scan) sama dengan yang tercatat di manifest"""
+        entry = self.blocks.get(block)
+        if entry is None or entry['files'].keys() != files.keys():
+            return False
+        return all(entry['files'][name][2] == signature[2] for name, signature in files.items())
+
+
+if __name__ == '__main__':
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as directory:
+        block_dir = os.path.join(directory, '0')
+        os.makedirs(block_dir)
+        for name, text in [('a.txt', 'halo'), ('b.txt', 'dunia')]:
+            with open(os.path.join(block_dir, name), 'w') as f:
+                f.write(text)
+
+        manifest = BlockManifest(os.path.join(directory, 'blocks.manifest'), {'positional': False})
+        files = manifest.scan('0', block_dir)
+        assert not manifest.is_unchanged('0', files), "block baru harus dianggap berubah"
+        manifest.blocks['0'] = {'index': 'intermediate_index_0', 'files': files}
+        manifest.save()
+
+        manifest = BlockManifest(manifest.path, {'positional': False}).load()
+        os.utime(os.path.join(block_dir, 'a.txt'), ns=(0, 0))
+        assert manifest.is_unchanged('0', manifest.scan('0', block_dir)), "file yang hanya di-touch bukan perubahan"
+        with open(os.path.join(block_dir, 'b.txt'), 'w') as f:
+            f.write('dunia!')
+        assert not manifest.is_unchanged('0', manifest.scan('0', block_dir)), "perubahan isi tidak terdeteksi"
+        assert not BlockManifest(manifest.path, {'positional': True}).load().blocks, \
+            "manifest dengan settings berbeda harus diabaikan"
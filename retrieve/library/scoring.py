@@ -0,0 +1,534 @@
+import heapq
+import itertools
+import math
+from bisect import bisect_left
+from collections import Counter
+
+from .boolean import intersect, phrase
+from .index import PostingsCursor
+
+
+class TfIdfScorer:
+    """
+    w(t, D) = (1 + log tf(t, D))       jika tf(t, D) > 0
+            = 0                        jika sebaliknya
+
+    w(t, Q) = IDF = log (N / df(t))
+
+    Score = untuk setiap term di query, akumulasikan w(t, Q) * w(t, D).
+            (tidak perlu dinormalisasi dengan panjang dokumen)
+    """
+
+    def __init__(self, index):
+        self.N = index.stats.n_docs
+
+    def term_weight(self, df):
+        """w(t, Q) untuk term dengan document frequency df"""
+        return math.log10(self.N / df)
+
+    def score(self, weight, tf, doc):
+        """Kontribusi satu term dengan bobot query weight pada dokumen doc"""
+        return weight * (1 + math.log10(tf))
+
+    def upper_bound(self, cursor):
+        """Upper bound kontribusi term dari cursor ke skor dokumen manapun"""
+        max_tf = cursor.max_tf if cursor.max_tf is not None else max(cursor.postings()[1])
+        return _inflate(cursor.weight * (1 + math.log10(max_tf)))
+
+    def block_upper_bound(self, cursor, bounds):
+        """Upper bound kontribusi term pada block dengan bounds (last_doc, max_tf, max_impact)"""
+        if bounds[1] is None:
+            return cursor.upper_bound
+        return _inflate(cursor.weight * (1 + math.log10(bounds[1])))
+
+
+class BM25Scorer:
+    """
+    Scoring dengan Okapi BM25
+
+        IDF = log (N / df(t))
+        score(t, D) = IDF * ((k1 + 1) * tf) / (k1 * dlnf + tf)
+        dlnf = (1 - b) + b * dl / avdl
+
+    N, dl dan avdl diambil dari statistik koleksi index (CollectionStats);
+    dlnf setiap dokumen dihitung sekali per nilai b dan di-cache di sana.
+    """
+
+    def __init__(self, index, k1=1.2, b=0.75):
+        self.N = index.stats.n_docs
+        self.avg_doc_length = index.stats.avg_doc_length
+        self.length_norm = index.stats.length_norm(b)
+        self.k1 = k1
+        self.b = b
+        # max_impact di index hanya berlaku untuk k1 dan b yang sama
+        self.use_stored_bounds = index.bm25_params == (k1, b)
+
+    def term_weight(self, df):
+        """IDF untuk term dengan document frequency df"""
+        return math.log10(self.N / df)
+
+    def score(self, weight, tf, doc):
+        """Kontribusi satu term dengan bobot query weight pada dokumen doc"""
+        # document length normalization factor
+        dlnf = self.length_norm[doc]
+        return weight * ((self.k1 + 1) * tf) / (self.k1 * dlnf + tf)
+
+    def max_impact(self, postings_list, tf_list):
+        """Nilai maksimum ((k1 + 1) * tf) / (k1 * dlnf + tf) pada postings"""
+        return max(self.score(1.0, tf, doc) for doc, tf in zip(postings_list, tf_list))
+
+    def upper_bound(self, cursor):
+        """
+        Upper bound kontribusi term dari cursor ke skor dokumen manapun.
+        Memakai max_impact yang disimpan saat indexing jika k1 dan b sama,
+        jika tidak dihitung dari postings list cursor.
+        """
+        if self.use_stored_bounds and cursor.max_impact is not None:
+            max_impact = cursor.max_impact
+        else:
+            max_impact = self.max_impact(*cursor.postings())
+        return _inflate(cursor.weight * max_impact)
+
+    def block_upper_bound(self, cursor, bounds):
+        """
+        Upper bound kontribusi term pada block dengan bounds (last_doc, max_tf,
+        max_impact). Impact per block hanya berlaku untuk k1 dan b yang sama
+        dengan saat indexing; jika tidak, dipakai upper bound seluruh term.
+        """
+        if self.use_stored_bounds and bounds[2] is not None:
+            return _inflate(cursor.weight * bounds[2])
+        return cursor.upper_bound
+
+
+def _inflate(bound):
+    """
+    Melonggarkan upper bound sedikit, agar perbedaan pembulatan floating
+    point antara bound dan skor sebenarnya tidak membuat pruning membuang
+    dokumen yang seharusnya masuk top-k.
+    """
+    return bound * (1 + 1e-9) + 1e-12
+
+
+class TopK:
+    """
+    Bounded min-heap untuk menyimpan k dokumen dengan skor tertinggi.
+    Jika skor sama, dokumen dengan docID lebih kecil yang didahulukan.
+    """
+
+    def __init__(self, k):
+        self.k = k
+        self.heap = []
+
+    def threshold(self):
+        """Skor minimum untuk masuk top-k (-inf selama heap belum penuh)"""
+        return self.heap[0][0] if len(self.heap) >= self.k else -math.inf
+
+    def push(self, score, doc):
+        """Menambahkan dokumen ke top-k; mengembalikan True jika dokumen masuk."""
+        if self.k <= 0:
+            return False
+        entry = (score, -doc)
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, entry)
+            return True
+        if entry > self.heap[0]:
+            heapq.heapreplace(self.heap, entry)
+            return True
+        return False
+
+    def results(self):
+        """List of (score, docID) terurut mengecil berdasarkan skor"""
+        return [(score, -neg_doc) for (score, neg_doc) in sorted(self.heap, reverse=True)]
+
+
+def open_cursors(index, term_ids, scorer, df=None):
+    """
+    Membuka satu PostingsCursor untuk setiap term unik di query, dengan
+    atribut weight = frekuensi term di query * w(t, Q). Term yang tidak ada
+    di index (atau yang semua dokumennya sudah dihapus) diabaikan.
+
+    df (opsional) adalah fungsi termID -> document frequency yang dipakai
+    untuk w(t, Q), misal df global SegmentSnapshot jika index hanya satu
+    segment; default df postings list di index.
+    """
+    cursors = []
+    for term, query_tf in Counter(term_ids).items():
+        cursor = index.get_cursor(term)
+        if cursor is None:
+            continue
+        term_df = cursor.df if df is None else df(term)
+        if term_df == 0:
+            continue
+        cursor.weight = query_tf * scorer.term_weight(term_df)
+        cursors.append(cursor)
+    return cursors
+
+
+def merge_top_k(results, k):
+    """
+    Menggabungkan beberapa top-k (hasil query processor, terurut mengecil
+    berdasarkan skor lalu menaik berdasarkan docID) dari index dengan docID
+    yang tidak beririsan, misal segment-segment SegmentedIndex, menjadi
+    satu top-k dengan urutan yang sama seperti TopK.
+    """
+    return list(itertools.islice(heapq.merge(*results, key=lambda x: (-x[0], x[1])), k))
+
+
+def daat_top_k(cursors, scorer, k):
+    """
+    Query processing document-at-a-time: semua cursor maju bersama secara
+    terurut docID, kontribusi setiap term pada sebuah dokumen diakumulasikan
+    menjadi satu skor, lalu dokumen dimasukkan ke bounded min-heap top-k.
+    Biayanya sebanding dengan banyaknya postings yang disentuh, tanpa
+    sorting seluruh hasil.
+
+    Returns
+    -------
+    List[(float, int)]
+        top-k (score, docID) terurut mengecil berdasarkan skor
+    """
+    top_k = TopK(k)
+    doc = min((cursor.doc for cursor in cursors), default=PostingsCursor.END)
+    while doc != PostingsCursor.END:
+        score = 0.0
+        next_doc = PostingsCursor.END
+        for cursor in cursors:
+            if cursor.doc == doc:
+                score += scorer.score(cursor.weight, cursor.tf(), doc)
+                cursor.next()
+            if cursor.doc < next_doc:
+                next_doc = cursor.doc
+        top_k.push(score, doc)
+        doc = next_doc
+    return top_k.results()
+
+
+def wand_top_k(cursors, scorer, k):
+    """
+    Query processing dengan dynamic pruning WAND (Weak AND).
+
+    Cursor diurutkan berdasarkan docID saat ini. Upper bound term
+    diakumulasikan sesuai urutan tersebut sampai jumlahnya mencapai
+    threshold top-k; docID cursor terakhir yang diakumulasikan adalah pivot.
+    Dokumen sebelum pivot tidak mungkin masuk top-k, sehingga cursor di
+    depan pivot langsung di-next_geq ke pivot tanpa dihitung skornya.
+
+    Hasilnya identik dengan daat_top_k.
+    """
+    top_k = TopK(k)
+    for cursor in cursors:
+        cursor.upper_bound = scorer.upper_bound(cursor)
+    ordered = list(cursors)
+    while True:
+        ordered.sort(key=_cursor_doc)
+        threshold = top_k.threshold()
+        bound = 0.0
+        pivot = None
+        for cursor in ordered:
+            if cursor.doc == PostingsCursor.END:
+                break
+            bound += cursor.upper_bound
+            if bound >= threshold:
+                pivot = cursor.doc
+                break
+        if pivot is None:
+            break
+        if ordered[0].doc == pivot:
+            # semua cursor sampai pivot berada di dokumen pivot: hitung skor
+            # penuh (urutan penjumlahan sama dengan daat_top_k)
+            score = 0.0
+            for cursor in cursors:
+                if cursor.doc == pivot:
+                    score += scorer.score(cursor.weight, cursor.tf(), pivot)
+                    cursor.next()
+            top_k.push(score, pivot)
+        else:
+            for cursor in ordered:
+                if cursor.doc >= pivot:
+                    break
+                cursor.next_geq(pivot)
+    return top_k.results()
+
+
+def maxscore_top_k(cursors, scorer, k):
+    """
+    Query processing dengan dynamic pruning MaxScore.
+
+    Cursor diurutkan menaik berdasarkan upper bound. Prefix terpanjang yang
+    jumlah upper bound-nya masih di bawah threshold top-k adalah term
+    "non-essential": dokumen yang hanya memuat term tersebut tidak mungkin
+    masuk top-k, sehingga kandidat dokumen hanya diambil dari term
+    "essential". Term non-essential hanya di-next_geq ke kandidat, dan
+    evaluasi dihentikan lebih awal jika skor parsial ditambah sisa upper
+    bound tidak lagi mencapai threshold.
+
+    Hasilnya identik dengan daat_top_k.
+    """
+    top_k = TopK(k)
+    for cursor in cursors:
+        cursor.upper_bound = scorer.upper_bound(cursor)
+    ordered = sorted(cursors, key=lambda cursor: cursor.upper_bound)
+    # prefix_bound[i] = jumlah upper bound ordered[0..i-1]
+    prefix_bound = [0.0]
+    for cursor in ordered:
+        prefix_bound.append(prefix_bound[-1] + cursor.upper_bound)
+
+    first_essential = 0
+    while True:
+        threshold = top_k.threshold()
+        while first_essential < len(ordered) and prefix_bound[first_essential + 1] < threshold:
+            first_essential += 1
+        essential = ordered[first_essential:]
+        doc = min((cursor.doc for cursor in essential), default=PostingsCursor.END)
+        if doc == PostingsCursor.END:
+            break
+
+        contributions = {}
+        partial = 0.0
+        for cursor in essential:
+            if cursor.doc == doc:
+                contributions[cursor] = scorer.score(cursor.weight, cursor.tf(), doc)
+                partial += contributions[cursor]
+        # term non-essential, dari upper bound terbesar
+        pruned = False
+        for i in range(first_essential - 1, -1, -1):
+            if partial + prefix_bound[i + 1] < threshold:
+                pruned = True
+                break
+            cursor = ordered[i]
+            if cursor.next_geq(doc) == doc:
+                contributions[cursor] = scorer.score(cursor.weight, cursor.tf(), doc)
+                partial += contributions[cursor]
+        if not pruned:
+            # skor penuh dengan urutan penjumlahan yang sama dengan daat_top_k
+            score = 0.0
+            for cursor in cursors:
+                if cursor in contributions:
+                    score += contributions[cursor]
+            top_k.push(score, doc)
+
+        for cursor in essential:
+            if cursor.doc == doc:
+                cursor.next()
+    return top_k.results()
+
+
+def bmw_top_k(cursors, scorer, k):
+    """
+    Query processing dengan dynamic pruning Block-Max WAND.
+
+    Pivot dipilih seperti pada WAND dengan upper bound seluruh term. Setelah
+    itu upper bound dicek ulang dengan metadata Block-Max: jumlah upper bound
+    block (yang memuat pivot) dari cursor-cursor sampai pivot. Jika masih di
+    bawah threshold, tidak ada dokumen sampai akhir block terpendek yang bisa
+    masuk top-k, sehingga cursor-cursor tersebut dilompatkan melewati block
+    itu tanpa mendecode postings di dalamnya.
+
+    Hasilnya identik dengan daat_top_k.
+    """
+    top_k = TopK(k)
+    for cursor in cursors:
+        cursor.upper_bound = scorer.upper_bound(cursor)
+    ordered = list(cursors)
+    while True:
+        ordered.sort(key=_cursor_doc)
+        threshold = top_k.threshold()
+        bound = 0.0
+        pivot_index = None
+        for i, cursor in enumerate(ordered):
+            if cursor.doc == PostingsCursor.END:
+                break
+            bound += cursor.upper_bound
+            if bound >= threshold:
+                pivot_index = i
+                break
+        if pivot_index is None:
+            break
+        pivot = ordered[pivot_index].doc
+        # cursor lain yang juga berada di dokumen pivot ikut dihitung
+        while pivot_index + 1 < len(ordered) and ordered[pivot_index + 1].doc == pivot:
+            pivot_index += 1
+
+        block_bound = 0.0
+        next_block = PostingsCursor.END
+        for cursor in ordered[:pivot_index + 1]:
+            bounds = cursor.block_bounds(pivot)
+            if bounds is None:
+                # tidak ada lagi posting >= pivot di term ini
+                continue
+            block_bound += scorer.block_upper_bound(cursor, bounds)
+            next_block = min(next_block, bounds[0] + 1)
+
+        if block_bound >= threshold:
+            if ordered[0].doc == pivot:
+                score = 0.0
+                for cursor in cursors:
+                    if cursor.doc == pivot:
+                        score += scorer.score(cursor.weight, cursor.tf(), pivot)
+                        cursor.next()
+                top_k.push(score, pivot)
+            else:
+                for cursor in ordered:
+                    if cursor.doc >= pivot:
+                        break
+                    cursor.next_geq(pivot)
+        else:
+            # tidak ada dokumen di [pivot, next_block) yang bisa masuk top-k,
+            # kecuali dokumen dari cursor setelah pivot yang belum dihitung
+            if pivot_index + 1 < len(ordered):
+                next_block = min(next_block, ordered[pivot_index + 1].doc)
+            for cursor in ordered[:pivot_index + 1]:
+                cursor.next_geq(next_block)
+    return top_k.results()
+
+
+def conjunctive_top_k(cursors, scorer, k):
+    """
+    Query processing konjungtif (AND): hanya dokumen yang memuat SEMUA term
+    query yang dihitung skornya. Kandidat diambil dengan leapfrog
+    intersection (lihat boolean.intersect), sehingga untuk query panjang
+    hanya postings dari term paling jarang yang benar-benar dijelajahi.
+
+    Hasilnya bisa berisi kurang dari k dokumen; lihat mode 'and_or' di
+    BSBIIndex yang kembali ke query disjungtif (OR) jika hasilnya kurang.
+    """
+    top_k = TopK(k)
+    for doc in intersect(cursors):
+        score = 0.0
+        for cursor in cursors:
+            score += scorer.score(cursor.weight, cursor.tf(), doc)
+        top_k.push(score, doc)
+    return top_k.results()
+
+
+def phrase_top_k(cursors, terms, scorer, k):
+    """
+    Top-k dokumen yang memuat terms sebagai frase (berurutan), dengan skor
+    yang sama seperti conjunctive_top_k. cursors harus berasal dari index
+    posisional, satu cursor untuk setiap termID unik (lihat open_cursors).
+    """
+    top_k = TopK(k)
+    for doc in phrase(terms, {cursor.term: cursor for cursor in cursors}):
+        score = 0.0
+        for cursor in cursors:
+            score += scorer.score(cursor.weight, cursor.tf(), doc)
+        top_k.push(score, doc)
+    return top_k.results()
+
+
+def proximity_score(positions_lists, weights, window):
+    """
+    Skor proximity sebuah dokumen. Untuk setiap pasangan term yang
+    bersebelahan di query (a, b), c adalah banyaknya kemunculan a yang
+    memiliki kemunculan b dalam jarak paling jauh window token. Kontribusi
+    pasangan tersebut adalah min(w(a), w(b)) * c / (c + 1), sehingga
+    pasangan term yang jarang dan sering berdekatan mendapat skor lebih
+    tinggi, dengan efek yang tersaturasi seperti TF pada BM25.
+
+    Parameters
+    ----------
+    positions_lists: List[List[int]]
+        Posisi (terurut) setiap term query di dokumen, sesuai urutan query
+    weights: List[float]
+        Bobot (IDF) setiap term query
+    window: int
+        Jarak maksimum (dalam token) agar dua kemunculan dianggap berdekatan
+    """
+    score = 0.0
+    for i in range(len(positions_lists) - 1):
+        positions_a, positions_b = positions_lists[i], positions_lists[i + 1]
+        if not positions_a or not positions_b:
+            continue
+        close = 0
+        for position in positions_a:
+            j = bisect_left(positions_b, position - window)
+            # posisi yang sama hanya mungkin jika a dan b adalah term yang sama
+            while j < len(positions_b) and positions_b[j] <= position + window:
+                if positions_b[j] != position:
+                    close += 1
+                    break
+                j += 1
+        score += min(weights[i], weights[i + 1]) * close / (close + 1)
+    return score
+
+
+def _cursor_doc(cursor):
+    return cursor.doc
+
+
+# query processor yang bisa dipilih di BSBIIndex.retrieve_bm25 / retrieve_tfidf
+QUERY_PROCESSORS = {
+    'daat': daat_top_k,
+    'wand': wand_top_k,
+    'maxscore': maxscore_top_k,
+    'bmw': bmw_top_k,
+    'and': conjunctive_top_k,
+}
+
+
+if __name__ == "__main__":
+
+    # Benchmark query processor di qrels-folder/test_queries.txt: latency
+    # dan banyaknya postings yang dihitung skornya, serta memastikan hasil
+    # top-k dynamic pruning identik dengan daat (exhaustive).
+    import os
+    import sys
+    import time
+
+    from .bsbi import BSBIIndex
+    from .compression import VBEPostings
+
+    class CountingScorer:
+        """Membungkus scorer untuk menghitung banyaknya pemanggilan score()"""
+
+        def __init__(self, scorer):
+            self.scorer = scorer
+            self.scored = 0
+
+        def term_weight(self, df):
+            return self.scorer.term_weight(df)
+
+        def upper_bound(self, cursor):
+            return self.scorer.upper_bound(cursor)
+
+        def block_upper_bound(self, cursor, bounds):
+            return self.scorer.block_upper_bound(cursor, bounds)
+
+        def score(self, weight, tf, doc):
+            self.scored += 1
+            return self.scorer.score(weight, tf, doc)
+
+    this_dir = os.path.dirname(__file__)
+    k = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    bsbi = BSBIIndex(data_dir=os.path.join(this_dir, 'collections'),
+                     postings_encoding=VBEPostings,
+                     output_dir=os.path.join(this_dir, 'index'))
+    bsbi.load()
+    # satu snapshot untuk seluruh benchmark; query diproses per segment
+    index = bsbi.open_index().snapshot()
+    with open(os.path.join(this_dir, 'qrels-folder/test_queries.txt')) as f:
+        queries = [bsbi.query_term_ids(" ".join(line.strip().split()[1:])) for line in f]
+
+    expected = None
+    for mode, processor in QUERY_PROCESSORS.items():
+        scored = 0
+        elapsed = 0.0
+        results = []
+        for q_terms in queries:
+            scorer = CountingScorer(BM25Scorer(index))
+            segment_cursors = [open_cursors(segment, q_terms, scorer, index.df) for segment in index.segments]
+            start = time.perf_counter()
+            results.append(merge_top_k([processor(cursors, scorer, k) for cursors in segment_cursors], k))
+            elapsed += time.perf_counter() - start
+            scored += scorer.scored
+        if expected is None:
+            expected = results
+        if processor is conjunctive_top_k:
+            # AND memang tidak identik; tampilkan berapa query yang hasilnya < k
+            check = f"query dengan hasil < k: {sum(len(res) < k for res in results)}"
+        else:
+            check = f"identik dengan daat: {results == expected}"
+        print(f"{mode:10s}: {1000 * elapsed / len(queries):8.3f} ms/query, "
+              f"{scored / len(queries):10.1f} postings dihitung/query, {check}")
+    index.owner.release(index)
+    bsbi.close_index()
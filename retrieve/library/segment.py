@@ -0,0 +1,462 @@
+import contextlib
+import math
+import os
+import pickle
+import threading
+import traceback
+
+from .index import InvertedIndexReader, InvertedIndexWriter, CollectionStats, DeletedDocs, LiveDocsCursor
+
+
+INDEX_FILE_EXTENSIONS = ('.index', '.dict', '.lex', '.blk', '.stats')
+
+
+def remove_index_files(directory, name):
+    """Menghapus semua file milik index name (yang ada) di directory"""
+    for extension in INDEX_FILE_EXTENSIONS:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(os.path.join(directory, name + extension))
+
+
+def tiered_merge_window(sizes, merge_factor=10, floor_docs=1000, max_merged_docs=None):
+    """
+    Merge policy bertingkat (tiered) berdasarkan ukuran segment.
+
+    Setiap segment masuk ke tier floor(log_{merge_factor}(size / floor_docs))
+    (segment yang lebih kecil dari floor_docs masuk tier 0). Jika ada
+    merge_factor segment BERSEBELAHAN di tier yang sama, segment-segment itu
+    di-merge menjadi satu segment di tier berikutnya. Hanya segment
+    bersebelahan yang di-merge agar rentang docID antar segment tetap tidak
+    beririsan dan terurut. Jendela dicari mulai dari segment tertua,
+    sehingga ukuran segment tetap menurun dari yang tertua ke yang terbaru
+    dan tidak ada segment kecil yang terjepit di antara segment besar.
+
+    Parameters
+    ----------
+    sizes: List[int]
+        Banyaknya dokumen setiap segment, sesuai urutan segment
+    max_merged_docs: int
+        Jika diberikan, merge yang hasilnya lebih besar dari ini tidak
+        dilakukan (segment sebesar itu tidak di-merge lagi)
+
+    Returns
+    -------
+    (int, int) atau None
+        (start, end) sehingga sizes[start:end] perlu di-merge
+    """
+    tiers = [int(math.log(max(size, floor_docs) / floor_docs, merge_factor)) for size in sizes]
+    for start in range(len(sizes) - merge_factor + 1):
+        end = start + merge_factor
+        if min(tiers[start:end]) != max(tiers[start:end]):
+            continue
+        if max_merged_docs is not None and sum(sizes[start:end]) > max_merged_docs:
+            continue
+        return start, end
+    return None
+
+
+class LiveSegment:
+    """
+    Tampilan sebuah segment (InvertedIndexReader) tanpa dokumen-dokumen
+    yang sudah dihapus: get_cursor mengembalikan LiveDocsCursor dan stats
+    tidak memuat dokumen yang dihapus. Hanya dipakai untuk segment yang
+    memang memuat dokumen terhapus, sehingga segment lain tidak membayar
+    biaya pengecekan tombstone bitset.
+    """
+
+    def __init__(self, reader, deleted):
+        self.reader = reader
+        self.deleted = deleted
+        self.stats = reader.stats.without(deleted)
+        self.positional = reader.positional
+        self.postings_dict = reader.postings_dict
+
+    def get_cursor(self, term):
+        cursor = self.reader.get_cursor(term)
+        return None if cursor is None else LiveDocsCursor(cursor, self.deleted)
+
+
+class SegmentSnapshot:
+    """
+    Daftar segment yang hidup pada satu saat, untuk dipakai oleh satu query
+    (with segments.snapshot() as index: ...). Selama snapshot dipegang,
+    reader-reader segment di dalamnya tidak akan ditutup walaupun segment
+    tersebut sudah di-merge oleh background merge.
+
+    Statistik koleksi (stats) adalah gabungan statistik semua segment, dan
+    df(term) adalah document frequency global, sehingga skor setiap
+    dokumen sama dengan skornya jika semua segment adalah satu index.
+    Snapshot memiliki atribut stats, bm25_params dan positional seperti
+    InvertedIndexReader, sehingga bisa diberikan ke scorer.
+
+    Dokumen yang sudah dihapus (deleted) tidak ikut di stats maupun df,
+    dan segment yang memuatnya dibungkus LiveSegment, sehingga query harus
+    memakai segments (bukan readers).
+
+    Attributes
+    ----------
+    names: List[str]
+        Nama segment, terurut berdasarkan rentang docID
+    readers: List[InvertedIndexReader]
+        Reader (sudah dibuka) untuk setiap segment
+    deleted: DeletedDocs
+        Tombstone bitset dokumen yang dihapus
+    deleted_counts: List[int]
+        Banyaknya dokumen terhapus di setiap segment
+    segments: List
+        Segment untuk query: reader itu sendiri, atau LiveSegment jika
+        segment tersebut memuat dokumen terhapus
+    """
+
+    def __init__(self, owner, names, readers, deleted=None):
+        self.owner = owner
+        self.names = names
+        self.readers = readers
+        self.deleted = deleted if deleted is not None else DeletedDocs()
+        self.deleted_counts = [reader.stats.n_deleted(self.deleted) for reader in readers]
+        self.segments = [LiveSegment(reader, self.deleted) if count else reader
+                         for reader, count in zip(readers, self.deleted_counts)]
+        self.users = 0
+        self.retired = False
+        self.positional = bool(readers) and all(reader.positional for reader in readers)
+        # upper bound skor yang disimpan setiap segment dihitung dengan
+        # statistik segment itu sendiri, sehingga hanya valid jika
+        # segment-nya satu dan tidak ada dokumen yang dihapus
+        self.bm25_params = readers[0].bm25_params if len(readers) == 1 and not any(self.deleted_counts) else None
+        self._stats = None
+        self.df_cache = {}
+
+    @property
+    def stats(self):
+        if self._stats is None:
+            if len(self.segments) == 1:
+                stats = self.segments[0].stats
+            else:
+                stats = CollectionStats()
+                for segment in self.segments:
+                    stats.add(segment.stats)
+            self._stats = stats
+        return self._stats
+
+    def df(self, term):
+        """Document frequency term di semua segment, tanpa dokumen yang dihapus"""
+        df = self.df_cache.get(term)
+        if df is None:
+            df = 0
+            for reader, count in zip(self.readers, self.deleted_counts):
+                entry = reader.postings_dict.get(term)
+                if entry is None:
+                    continue
+                if count:
+                    df += sum(1 for doc in reader.get_postings_list(term)[0] if doc not in self.deleted)
+                else:
+                    df += entry[1]
+            self.df_cache[term] = df
+        return df
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.owner.release(self)
+
+
+class SegmentedIndex:
+    """
+    Index yang terdiri dari beberapa segment immutable. Setiap segment
+    adalah InvertedIndex biasa; docID di setiap segment tidak beririsan dan
+    naik sesuai urutan segment (dokumen baru selalu mendapat docID baru).
+
+    Daftar segment yang hidup disimpan di manifest (file <name>.segments,
+    pickle) yang ditulis ulang secara atomik (os.replace) setiap kali daftar
+    segment berubah, sehingga manifest adalah commit point: segment baru
+    baru terlihat oleh query setelah manifest ditulis. Index lama tanpa
+    manifest dianggap satu segment bernama name.
+
+    Dokumen baru di-index ke segment kecil (lihat BSBIIndex.add_documents)
+    lalu di-publish dengan add_segment. Background merge (satu thread)
+    memadatkan segment-segment kecil menjadi segment yang lebih besar
+    dengan merge policy bertingkat (tiered_merge_window). Merge ditulis ke
+    segment baru tanpa memegang lock; hanya penggantian daftar segment yang
+    memakai lock, sehingga query tidak pernah menunggu merge. Reader segment
+    lama ditutup dan file-nya dihapus setelah tidak ada snapshot yang
+    memakainya lagi.
+
+    Dokumen dihapus dengan menandai docID-nya di tombstone bitset global
+    (DeletedDocs) yang disimpan di manifest, sehingga penghapusan dan
+    penambahan segment (update) ter-commit bersamaan. Postings dokumen yang
+    dihapus baru dibuang secara fisik saat segment-nya di-merge; segment
+    dengan proporsi dokumen terhapus di atas max_deleted_ratio ditulis
+    ulang walaupun tidak masuk jendela merge policy.
+
+    Attributes
+    ----------
+    directory: str
+        Directory index
+    name: str
+        Nama index (merged index hasil do_indexing), juga nama manifest
+    merge_index: callable
+        merge_index(readers, merged_index, deleted), lihat BSBIIndex.merge_index
+    merge_factor, floor_docs, max_merged_docs:
+        Parameter merge policy, lihat tiered_merge_window
+    max_deleted_ratio: float
+        Proporsi dokumen terhapus di sebuah segment yang memicu penulisan
+        ulang segment tersebut
+    """
+
+    def __init__(self, directory, postings_encoding, merge_index, name='main_index', bm25_params=(1.2, 0.75),
+                 merge_factor=10, floor_docs=1000, max_merged_docs=None, max_deleted_ratio=0.25,
+                 background=True):
+        self.directory = directory
+        self.postings_encoding = postings_encoding
+        self.merge_index = merge_index
+        self.name = name
+        self.bm25_params = bm25_params
+        self.merge_factor = merge_factor
+        self.floor_docs = floor_docs
+        self.max_merged_docs = max_merged_docs
+        self.max_deleted_ratio = max_deleted_ratio
+        self.background = background
+        self.manifest_file_path = os.path.join(directory, name + '.segments')
+
+        self.lock = threading.Lock()
+        self.names = []
+        self.next_segment = 0
+        self.deleted = DeletedDocs()
+        self.current = None
+        # nama segment -> reader yang sedang dibuka, dan banyaknya snapshot
+        # (yang belum dilepas) yang memuat reader tersebut
+        self.readers = {}
+        self.reader_refs = {}
+
+        self.merge_requested = threading.Condition(self.lock)
+        self.merge_pending = False
+        self.merge_running = False
+        self.merge_thread = None
+        self.closed = False
+
+    def read_manifest(self):
+        """Mengembalikan (names, next_segment, deleted) dari manifest, atau default untuk index lama"""
+        if not os.path.exists(self.manifest_file_path):
+            return [self.name], 0, DeletedDocs()
+        with open(self.manifest_file_path, 'rb') as f:
+            manifest = pickle.load(f)
+        return manifest['segments'], manifest['next_segment'], DeletedDocs(manifest.get('deleted'))
+
+    def write_manifest(self, names, next_segment, deleted):
+        path = self.manifest_file_path + '.tmp'
+        with open(path, 'wb') as f:
+            pickle.dump({'segments': names, 'next_segment': next_segment, 'deleted': deleted.bits}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path, self.manifest_file_path)
+
+    def reset(self, names=None):
+        """
+        Mengganti seluruh daftar segment dengan names (default [self.name]),
+        misal setelah do_indexing menulis merged index baru sebagai segment
+        baru (lihat new_segment_name). File segment lama yang tidak ada di
+        names dihapus dan tombstone bitset dikosongkan. Tidak boleh
+        dipanggil selama index sedang dibuka (open) oleh objek ini; reader
+        lain (misal engine proses lain) yang masih me-mmap file segment lama
+        tetap aman karena file hanya di-unlink, tidak ditulis ulang.
+        """
+        names = names or [self.name]
+        old_names, next_segment, _ = self.read_manifest()
+        self.write_manifest(names, max(next_segment, self.next_segment), DeletedDocs())
+        for name in old_names:
+            if name not in names:
+                remove_index_files(self.directory, name)
+
+    def open(self):
+        """Membuka reader untuk setiap segment di manifest"""
+        with self.lock:
+            self.names, self.next_segment, self.deleted = self.read_manifest()
+            self.closed = False
+            self.publish(list(self.names))
+        if self.background:
+            self.request_merge()
+        return self
+
+    def close(self):
+        """Menghentikan background merge dan menutup semua reader"""
+        with self.lock:
+            self.closed = True
+            self.merge_requested.notify_all()
+        if self.merge_thread is not None:
+            self.merge_thread.join()
+            self.merge_thread = None
+        with self.lock:
+            for reader in self.readers.values():
+                reader.close()
+            self.readers = {}
+            self.reader_refs = {}
+            self.current = None
+
+    def snapshot(self):
+        """Mengambil snapshot segment yang hidup; lepaskan dengan with atau release()"""
+        with self.lock:
+            snapshot = self.current
+            snapshot.users += 1
+        return snapshot
+
+    def release(self, snapshot):
+        with self.lock:
+            snapshot.users -= 1
+            if snapshot.retired and snapshot.users == 0:
+                self.drop(snapshot)
+
+    def publish(self, names):
+        """
+        Menjadikan names daftar segment yang hidup (self.lock harus
+        dipegang). Snapshot lama dipensiunkan; reader-nya ditutup setelah
+        snapshot tersebut tidak dipakai lagi.
+        """
+        readers = []
+        for name in names:
+            if name not in self.readers:
+                self.readers[name] = InvertedIndexReader(name, self.postings_encoding,
+                                                         directory=self.directory).open()
+                self.reader_refs[name] = 0
+            self.reader_refs[name] += 1
+            readers.append(self.readers[name])
+        self.names = names
+        old, self.current = self.current, SegmentSnapshot(self, names, readers, self.deleted)
+        if old is not None:
+            old.retired = True
+            if old.users == 0:
+                self.drop(old)
+
+    def drop(self, snapshot):
+        """Melepas reader snapshot yang sudah pensiun (self.lock harus dipegang)"""
+        for name in snapshot.names:
+            self.reader_refs[name] -= 1
+            if self.reader_refs[name] == 0:
+                self.readers.pop(name).close()
+                del self.reader_refs[name]
+                if name not in self.names:
+                    remove_index_files(self.directory, name)
+
+    def new_segment_name(self):
+        """Nama unik untuk segment baru"""
+        with self.lock:
+            if self.current is None:
+                # index belum dibuka (misal do_indexing): penomoran dilanjutkan
+                # dari manifest agar tidak menimpa segment yang masih hidup
+                self.next_segment = max(self.next_segment, self.read_manifest()[1])
+            name = 'segment_' + str(self.next_segment)
+            self.next_segment += 1
+        return name
+
+    def add_segment(self, name, deleted_docs=()):
+        """
+        Mem-publish segment name (sudah ditulis ke disk) sebagai segment
+        terakhir, lalu meminta background merge bila perlu. deleted_docs
+        (docID versi lama dari dokumen yang di-update) dihapus pada commit
+        yang sama, sehingga query tidak pernah melihat kedua versi sekaligus.
+        """
+        with self.lock:
+            names = self.names + [name]
+            self.deleted = self.deleted.delete(deleted_docs)
+            self.write_manifest(names, self.next_segment, self.deleted)
+            self.publish(names)
+        self.schedule_merge()
+
+    def delete_documents(self, doc_ids):
+        """Menandai doc_ids sebagai dihapus; langsung berlaku untuk snapshot berikutnya"""
+        with self.lock:
+            self.deleted = self.deleted.delete(doc_ids)
+            self.write_manifest(self.names, self.next_segment, self.deleted)
+            self.publish(list(self.names))
+        self.schedule_merge()
+
+    def schedule_merge(self):
+        if self.background:
+            self.request_merge()
+        else:
+            self.maybe_merge()
+
+    def find_merge(self):
+        """Nama-nama segment yang perlu di-merge menurut merge policy, atau None"""
+        with self.lock:
+            names = list(self.current.names)
+            counts = self.current.deleted_counts
+            sizes = [reader.stats.n_docs for reader in self.current.readers]
+        for name, size, count in zip(names, sizes, counts):
+            if count and count >= self.max_deleted_ratio * size:
+                return [name]
+        sizes = [size - count for size, count in zip(sizes, counts)]
+        window = tiered_merge_window(sizes, self.merge_factor, self.floor_docs, self.max_merged_docs)
+        if window is None:
+            return None
+        return names[window[0]:window[1]]
+
+    def merge_segments(self, names):
+        """
+        Me-merge segment-segment bersebelahan names menjadi satu segment
+        baru (tanpa postings dokumen yang sudah dihapus), lalu mengganti
+        mereka di daftar segment. Query yang berjalan tetap memakai snapshot
+        lama sampai selesai.
+        """
+        merged_name = self.new_segment_name()
+        with self.lock:
+            positional = self.readers[names[0]].positional
+            deleted = self.deleted
+        with InvertedIndexWriter(merged_name, self.postings_encoding, directory=self.directory,
+                                 bm25_params=self.bm25_params, positional=positional) as merged_index:
+            with contextlib.ExitStack() as stack:
+                # reader tersendiri, karena iter_encoded membaca file secara sequential
+                indices = [stack.enter_context(InvertedIndexReader(name, self.postings_encoding,
+                                                                   directory=self.directory))
+                           for name in names]
+                self.merge_index(indices, merged_index, deleted)
+        with self.lock:
+            start = self.names.index(names[0])
+            merged = self.names[:start] + [merged_name] + self.names[start + len(names):]
+            self.write_manifest(merged, self.next_segment, self.deleted)
+            self.publish(merged)
+        return merged_name
+
+    def maybe_merge(self):
+        """Menjalankan merge (di thread pemanggil) sampai merge policy tidak menemukan kandidat"""
+        while True:
+            names = self.find_merge()
+            if names is None:
+                return
+            self.merge_segments(names)
+
+    def request_merge(self):
+        """Membangunkan background merge thread (dibuat saat pertama kali dibutuhkan)"""
+        with self.lock:
+            if self.merge_thread is None:
+                self.merge_thread = threading.Thread(target=self.merge_loop, daemon=True)
+                self.merge_thread.start()
+            self.merge_pending = True
+            self.merge_requested.notify_all()
+
+    def merge_loop(self):
+        while True:
+            with self.lock:
+                while not self.merge_pending and not self.closed:
+                    self.merge_requested.wait()
+                if self.closed:
+                    return
+                # permintaan yang datang selama merge berjalan akan diproses
+                # di iterasi berikutnya
+                self.merge_pending = False
+                self.merge_running = True
+            try:
+                self.maybe_merge()
+            except Exception:
+                # segment lama tetap dipakai; merge dicoba lagi saat diminta
+                traceback.print_exc()
+            finally:
+                with self.lock:
+                    self.merge_running = False
+                    self.merge_requested.notify_all()
+
+    def wait_for_merges(self):
+        """Menunggu sampai background merge tidak punya pekerjaan lagi"""
+        with self.lock:
+            while (self.merge_pending or self.merge_running) and not self.closed:
+                self.merge_requested.wait()
@@ -1,3 +1,12 @@
+import mmap
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
 class IdMap:
     """
     Ingat kembali di kuliah, bahwa secara praktis, sebuah dokumen dan
@@ -42,6 +51,27 @@ class IdMap:
             self.id_to_str.insert(res, s)
         return res
 
+    def get(self, s, default=None):
+        """
+        Mengembalikan integer id dari string s TANPA meng-assign id baru
+        jika s tidak ada (kembalikan default). Dipakai saat query, agar term
+        yang tidak ada di koleksi tidak membuat IdMap terus membesar.
+        """
+
+        return self.str_to_id.get(s, default)
+
+    def reassign(self, s):
+        """
+        Memberikan id baru untuk string s yang sudah ada (misal dokumen yang
+        di-update) dan mengembalikan id tersebut. id lama tetap memetakan
+        ke s, tetapi s sekarang memetakan ke id baru.
+        """
+
+        res = self.__len__()
+        self.str_to_id[s] = res
+        self.id_to_str.append(s)
+        return res
+
     def __get_str(self, i):
         """Mengembalikan string yang terasosiasi dengan index i."""
 
@@ -64,6 +94,252 @@ class IdMap:
 
         return self.__get_str(key) if isinstance(key, int) else self.__get_id(key)
 
+    def freeze(self):
+        """Mengembalikan FrozenIdMap (read-only) dengan mapping yang sama."""
+
+        return FrozenIdMap.from_strings(self.id_to_str)
+
+
+class FrozenIdMap:
+    """
+    Versi read-only dan compact dari IdMap, untuk dipakai saat query.
+
+    Semua string disimpan sebagai satu buffer UTF-8 yang di-pack dan terurut
+    (sorted string table), ditambah tiga array NumPy:
+
+        offsets[i]   : posisi awal string ke-i (urutan terurut) di buffer;
+                       offsets[n] adalah panjang buffer
+        ids[i]       : id dari string ke-i (urutan terurut)
+        positions[j] : posisi (urutan terurut) dari string dengan id j
+
+    string -> id dicari dengan binary search, id -> string dengan positions.
+    Berbeda dengan IdMap, string yang tidak ada TIDAK di-assign id baru:
+    get(s) mengembalikan default (None), dan map[s] melempar KeyError.
+
+    File hasil save() bisa langsung di-mmap oleh load(), sehingga beberapa
+    worker berbagi physical pages yang sama dan tidak ada jutaan objek
+    str/int Python di heap seperti pada pasangan dict+list di IdMap.
+    """
+
+    MAGIC = b'YSIDMAP1'
+    HEADER = np.dtype([('magic', 'S8'), ('count', '<u8'), ('buffer_len', '<u8')])
+
+    def __init__(self, buffer, offsets, ids, positions, base=0):
+        self.buffer = buffer
+        self.base = base
+        self.offsets = offsets
+        self.ids = ids
+        self.positions = positions
+        # indexing memoryview menghasilkan int Python langsung, jauh lebih
+        # murah daripada indexing elemen array NumPy satu per satu
+        self.offsets_view = memoryview(offsets).cast('B').cast('I')
+        self.ids_view = memoryview(ids).cast('B').cast('I')
+        self.positions_view = memoryview(positions).cast('B').cast('I')
+
+    @classmethod
+    def from_strings(cls, id_to_str):
+        """Membangun FrozenIdMap dari list string, dimana id adalah index di list."""
+        encoded = [s.encode('utf-8') for s in id_to_str]
+        # urutkan berdasarkan bytes UTF-8, sama dengan urutan perbandingan di
+        # lookup; string yang sama (lihat IdMap.reassign) diurutkan dari id
+        # terbesar, sehingga lookup menemukan id terbaru
+        order = sorted(range(len(encoded)), key=lambda i: (encoded[i], -i))
+        offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+        np.cumsum([len(encoded[i]) for i in order], out=offsets[1:])
+        ids = np.array(order, dtype='<u4')
+        positions = np.empty(len(encoded), dtype='<u4')
+        positions[ids] = np.arange(len(encoded), dtype='<u4')
+        return cls(b''.join(encoded[i] for i in order), offsets, ids, positions)
+
+    def save(self, path):
+        """
+        Menyimpan FrozenIdMap ke path. File lama bisa saja sedang di-mmap oleh
+        reader (lihat load), sehingga tidak boleh di-truncate di tempat: isi
+        ditulis ke file sementara lalu di-os.replace, reader lama tetap
+        memegang inode lama.
+        """
+        buffer_len = int(self.offsets[-1])
+        header = np.array([(self.MAGIC, len(self.ids), buffer_len)], dtype=self.HEADER)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(header.tobytes())
+            f.write(self.offsets.tobytes())
+            f.write(self.ids.tobytes())
+            f.write(self.positions.tobytes())
+            f.write(self.buffer[self.base:self.base + buffer_len])
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Memuat FrozenIdMap dari file hasil save() dengan mmap (read-only)."""
+        with open(path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        header = np.frombuffer(mm, dtype=cls.HEADER, count=1)[0]
+        if header['magic'] != cls.MAGIC:
+            raise ValueError(f"{path} bukan file FrozenIdMap")
+        n = int(header['count'])
+        pos = cls.HEADER.itemsize
+        offsets = np.frombuffer(mm, dtype='<u4', count=n + 1, offset=pos)
+        pos += offsets.nbytes
+        ids = np.frombuffer(mm, dtype='<u4', count=n, offset=pos)
+        pos += ids.nbytes
+        positions = np.frombuffer(mm, dtype='<u4', count=n, offset=pos)
+        pos += positions.nbytes
+        # buffer dibiarkan sebagai mmap (slicing mmap menghasilkan bytes yang
+        # bisa dibandingkan), string dimulai dari posisi base di dalam file
+        return cls(mm, offsets, ids, positions, base=pos)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __string_at(self, i):
+        """Mengembalikan bytes dari string pada posisi terurut ke-i."""
+        return self.buffer[self.base + self.offsets_view[i]:self.base + self.offsets_view[i + 1]]
+
+    def __find(self, s):
+        """Binary search; mengembalikan posisi terurut dari s, atau -1."""
+        target = s.encode('utf-8')
+        lo, hi = 0, len(self.ids)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.__string_at(mid) < target:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.ids) and self.__string_at(lo) == target:
+            return lo
+        return -1
+
+    def get(self, s, default=None):
+        """Mengembalikan id dari string s, atau default jika s tidak ada."""
+        i = self.__find(s)
+        return default if i < 0 else self.ids_view[i]
+
+    def __contains__(self, s):
+        return self.__find(s) >= 0
+
+    def __getitem__(self, key):
+        """
+        Jika key adalah integer, kembalikan string-nya; jika key adalah string,
+        kembalikan id-nya (KeyError jika tidak ada, TIDAK meng-assign id baru).
+        """
+        if isinstance(key, (int, np.integer)):
+            return self.__string_at(self.positions_view[key]).decode('utf-8')
+        i = self.__find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self.ids_view[i]
+
+    def thaw(self):
+        """Mengembalikan IdMap (mutable) dengan mapping yang sama, misal untuk re-indexing."""
+        id_map = IdMap()
+        id_map.id_to_str = [self[i] for i in range(len(self))]
+        # string yang muncul lebih dari sekali memetakan ke id terbaru
+        id_map.str_to_id = {s: i for i, s in enumerate(id_map.id_to_str)}
+        return id_map
+
+
+class TermCache:
+    """
+    Cache (bounded, LRU) dari token mentah ke hasil normalisasinya (stemming
+    dan stopword removal). Vocabulary koleksi jauh lebih kecil daripada
+    banyaknya token, sehingga stemmer cukup dipanggil sekali per token unik.
+
+    Cache dibatasi maxsize entry; jika penuh, entry yang paling lama tidak
+    diakses dibuang. Cache bisa disimpan ke disk (save) dan dimuat lagi
+    (load) agar run berikutnya tidak perlu men-stem ulang vocabulary yang
+    sama. Aman dipakai bersama oleh banyak thread (retrieve).
+
+    Attributes
+    ----------
+    hits, misses: banyaknya lookup yang ditemukan / tidak ditemukan di cache
+    new_entries: dict entry yang dihitung sejak drain_new() terakhir, atau
+        None jika tidak dicatat (lihat track_new)
+    """
+
+    def __init__(self, maxsize=1 << 20, track_new=False):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.new_entries = {} if track_new else None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, token, compute):
+        """
+        Mengembalikan hasil normalisasi token dari cache; jika tidak ada,
+        dihitung dengan compute(token) lalu disimpan.
+        """
+        with self.lock:
+            value = self.entries.get(token)
+            if value is not None:
+                self.hits += 1
+                self.entries.move_to_end(token)
+                return value
+            self.misses += 1
+        value = compute(token)
+        with self.lock:
+            self._insert(token, value)
+            if self.new_entries is not None:
+                self.new_entries[token] = value
+        return value
+
+    def put(self, token, value):
+        with self.lock:
+            self._insert(token, value)
+
+    def _insert(self, token, value):
+        # dipanggil dengan self.lock sudah dipegang
+        self.entries[token] = value
+        self.entries.move_to_end(token)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def drain_new(self):
+        """Mengembalikan lalu mengosongkan new_entries"""
+        with self.lock:
+            new_entries = self.new_entries
+            if new_entries is not None:
+                self.new_entries = {}
+        return new_entries
+
+    def update(self, entries, hits=0, misses=0):
+        """
+        Menambahkan entries (dari cache lain, misal milik worker process)
+        beserta statistik lookup-nya.
+        """
+        for token, value in entries.items():
+            self.put(token, value)
+        with self.lock:
+            self.hits += hits
+            self.misses += misses
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'hits': self.hits, 'misses': self.misses, 'size': len(self.entries),
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+    def save(self, path):
+        """Menyimpan entries (urutan LRU) ke file dengan pickle"""
+        with self.lock:
+            entries = list(self.entries.items())
+        with open(path, 'wb') as f:
+            pickle.dump(entries, f)
+
+    def load(self, path):
+        """Memuat entries dari file hasil save, jika file tersebut ada"""
+        if not os.path.exists(path):
+            return self
+        with open(path, 'rb') as f:
+            for token, value in pickle.load(f):
+                self.put(token, value)
+        return self
+
 
 def merge_and_sort_posts_and_tfs(posts_tfs1, posts_tfs2):
     """
@@ -91,7 +367,7 @@ def merge_and_sort_posts_and_tfs(posts_tfs1, posts_tfs2):
     # adapted from union() function posted on scele
     res = []
     i=0; j=0
-    while i < len(posts_tfs1) and  j <= len(posts_tfs2):
+    while i < len(posts_tfs1) and j < len(posts_tfs2):
         if posts_tfs1[i][0] == posts_tfs2[j][0]:
             res.append((posts_tfs1[i][0], posts_tfs1[i][1]+posts_tfs2[j][1]))
             i+=1
@@ -111,6 +387,36 @@ def merge_and_sort_posts_and_tfs(posts_tfs1, posts_tfs2):
     return res
 
 
+def merge_and_sort_posts_tfs_and_positions(posts1, posts2):
+    """
+    Seperti merge_and_sort_posts_and_tfs, untuk index posisional: menggabung
+    dua sorted lists of tuples (doc id, tf, positions). Untuk doc id yang
+    sama, TF dijumlahkan dan posisinya digabung secara terurut.
+
+    contoh: posts1 = [(1, 2, [3, 9]), (4, 1, [0])]
+            posts2 = [(1, 1, [5]), (2, 1, [7])]
+
+            return   [(1, 3, [3, 5, 9]), (2, 1, [7]), (4, 1, [0])]
+    """
+    res = []
+    i = 0; j = 0
+    while i < len(posts1) and j < len(posts2):
+        if posts1[i][0] == posts2[j][0]:
+            res.append((posts1[i][0], posts1[i][1] + posts2[j][1],
+                        sorted(posts1[i][2] + posts2[j][2])))
+            i += 1
+            j += 1
+        elif posts1[i][0] < posts2[j][0]:
+            res.append(posts1[i])
+            i += 1
+        else:
+            res.append(posts2[j])
+            j += 1
+    res.extend(posts1[i:])
+    res.extend(posts2[j:])
+    return res
+
+
 if __name__ == '__main__':
 
     doc = ["halo", "semua", "selamat", "pagi", "semua"]
@@ -130,5 +436,28 @@ if __name__ == '__main__':
     assert [doc_id_map[docname]
             for docname in docs] == [0, 1, 2], "docs_id salah"
 
+    frozen_term_id_map = term_id_map.freeze()
+    assert [frozen_term_id_map[term]
+            for term in doc] == [0, 1, 2, 3, 1], "term_id frozen salah"
+    assert frozen_term_id_map[3] == "pagi", "term_id frozen salah"
+    assert frozen_term_id_map.get("malam") is None, "term baru tidak boleh di-assign"
+    assert len(frozen_term_id_map) == 4, "term baru tidak boleh di-assign"
+
+    assert doc_id_map.reassign(docs[1]) == 3 and doc_id_map[docs[1]] == 3, "reassign salah"
+    assert doc_id_map[1] == docs[1], "id lama harus tetap memetakan ke string"
+    frozen_doc_id_map = doc_id_map.freeze()
+    assert frozen_doc_id_map[docs[1]] == 3 and frozen_doc_id_map[1] == docs[1], "reassign frozen salah"
+    assert frozen_doc_id_map.thaw()[docs[1]] == 3, "reassign thaw salah"
+
     assert merge_and_sort_posts_and_tfs([(1, 34), (3, 2), (4, 23)],
                                         [(1, 11), (2, 4), (4, 3), (6, 13)]) == [(1, 45), (2, 4), (3, 2), (4, 26), (6, 13)], "merge_and_sort_posts_and_tfs salah"
+    assert merge_and_sort_posts_tfs_and_positions([(1, 2, [3, 9]), (4, 1, [0])],
+                                                  [(1, 1, [5]), (2, 1, [7])]) == [(1, 3, [3, 5, 9]), (2, 1, [7]), (4, 1, [0])], "merge_and_sort_posts_tfs_and_positions salah"
+
+    cache = TermCache(maxsize=2)
+    assert cache.get("makanannya", lambda token: token[:-3]) == "makanan", "term cache salah"
+    assert cache.get("makanannya", lambda token: None) == "makanan", "term cache salah"
+    cache.get("a", str.upper)
+    cache.get("b", str.upper)
+    assert "makanannya" not in cache.entries and len(cache) == 2, "entry LRU tidak dibuang"
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 3, "statistik term cache salah"
@@ -4,6 +4,7 @@ from . import views
 from .library.bsbi import BSBIIndex
 from .library.compression import VBEPostings
 from .library.letor import Letor
+from .library.engine import get_engine, reset_engine
 
 import os
 
@@ -22,7 +23,8 @@ BSBI_instance = BSBIIndex(data_dir=os.path.join(this_dir, 'library/collections')
                             postings_encoding=VBEPostings,
                             output_dir=os.path.join(this_dir, 'library/index'))
 
-BSBI_instance.do_indexing()
+# parsing block dikerjakan paralel oleh sebanyak CPU yang tersedia
+BSBI_instance.do_indexing(workers=None)
 
 print("Tunggu lagi, sedang training letor...")
 letor = Letor()
@@ -30,3 +32,9 @@ letor = Letor()
 letor.train("qrels-folder/train_queries.txt", 
             "qrels-folder/train_docs.txt", 
             "qrels-folder/train_qrels.txt")
+
+# memuat index dan id map sekali saat worker boot, sehingga request pertama
+# tidak menanggung biaya loading; letor yang baru di-train dipakai langsung
+print("Memuat search engine...")
+reset_engine()
+get_engine(letor=letor)
@@ -1,19 +1,12 @@
 from django.shortcuts import render
 from django.http import HttpResponse
 from .library.search import retrieve
-from .library.bsbi import BSBIIndex
-from .library.compression import VBEPostings
+from .library.engine import acquire_engine
 
-import sys
 import os
 
 def index(request):
     query = request.GET.get('search_bar')
-    this_dir = os.path.dirname(__file__)
-    BSBI_instance = BSBIIndex(data_dir='library/collections',
-                            postings_encoding=VBEPostings,
-                            output_dir=os.path.join(this_dir,'library/index'))
-    BSBI_instance.load()
     
     if query == None or query == "":
         context = {
@@ -23,24 +16,27 @@ def index(request):
         return render(request, 'retrieve/index.html', context)
     else:
         result = {}
-        sys.path.append(os.path.join(os.path.dirname(__file__)))
         
-        result_raw = retrieve(100, query, BSBI_instance)
+        # engine (index, id map, letor) dimuat sekali per worker, bukan per
+        # request; dipegang sampai doc ID hasil retrieve selesai dibaca agar
+        # tidak ditutup oleh reset_engine() di tengah request
+        with acquire_engine() as engine:
+            result_raw = retrieve(100, query, engine.bsbi)
 
-        if result_raw == None:
-            context = {
-                'result': result,
-                'query': query,
-                'signal': 0
-            }
-            return render(request, 'retrieve/index.html', context)
-        else:
-            for doc in result_raw:
-                text = open(doc).read()
-                # text = text.lower()
-                did = BSBI_instance.doc_id_map[doc]
-                doc_name = os.path.basename(doc)
-                result[did] = [doc_name, text]
+            if result_raw == None:
+                context = {
+                    'result': result,
+                    'query': query,
+                    'signal': 0
+                }
+                return render(request, 'retrieve/index.html', context)
+            else:
+                for doc in result_raw:
+                    text = open(doc).read()
+                    # text = text.lower()
+                    did = engine.doc_id(doc)
+                    doc_name = os.path.basename(doc)
+                    result[did] = [doc_name, text]
 
             context = {
                 'result': result,
@@ -50,15 +46,10 @@ def index(request):
             return render(request, 'retrieve/index.html', context)
 
 def content(request, doc_id):
-    this_dir = os.path.dirname(__file__)
-    BSBI_instance = BSBIIndex(data_dir='library/collections',
-                            postings_encoding=VBEPostings,
-                            output_dir=os.path.join(this_dir,'library/index'))
-    BSBI_instance.load()
-    doc = BSBI_instance.doc_id_map[int(doc_id)]
+    with acquire_engine() as engine:
+        doc = engine.doc_path(int(doc_id))
     
     # print(doc_id)
-    # print(BSBI_instance.doc_id_map[int(doc_id)])
     
     doc_name = os.path.basename(doc)
     text = open(doc).read()